@@ -12,6 +12,7 @@ export const authApi = {
     }),
   listUsers: () => api.get("/auth/users"),
   getUserById: (id: string) => api.get(`/auth/users/${id}`),
+  getUsersByIds: (ids: string[], fields?: string[]) => api.post("/auth/users/batch", { ids, fields }),
   forgotPassword: (email: string) => api.post("/auth/forgot-password", { email }),
   verifyOtp: (email: string, otp: string) => api.post("/auth/verify-otp", { email, otp }),
   resetPassword: (password: string, resetToken: string) =>
@@ -29,30 +30,60 @@ export const authApi = {
 export const userApi = {
   list: () => api.get("/users/"),
   create: (payload: Record<string, string>) => api.post("/users/", payload),
-  byRole: (role: string) => api.get(`/users/by-role/${role}`)
+  byRole: (role: string) => api.get(`/users/by-role/${role}`),
+  search: (q: string) => api.get("/users/search", { params: { q } })
 };
 
 export const courseApi = {
   list: () => api.get("/courses/courses/"),
+  search: (q: string, params: { department?: string; semester?: string; cursor?: string; limit?: number } = {}) =>
+    api.get("/courses/courses/search", { params: { q, ...params } }),
   get: (id: string) => api.get(`/courses/courses/${id}`),
+  stats: () => api.get("/courses/courses/stats"),
   create: (payload: Record<string, unknown>) => api.post("/courses/courses/", payload),
   update: (id: string, payload: Record<string, unknown>) => api.put(`/courses/courses/${id}`, payload),
   delete: (id: string) => api.delete(`/courses/courses/${id}`),
-  myCourses: (studentId: string) => api.get(`/courses/students/${studentId}/courses`),
-  enroll: (courseId: string, studentId: string) => api.post(`/courses/courses/${courseId}/enroll?student_id=${studentId}`),
+  myCourses: (studentId: string, status: "active" | "waitlisted" = "active") =>
+    api.get(`/courses/students/${studentId}/courses`, { params: { status } }),
+  enroll: (courseId: string, studentId: string, waitlist = true) =>
+    api.post(`/courses/courses/${courseId}/enroll?student_id=${studentId}&waitlist=${waitlist}`),
   drop: (courseId: string, studentId: string) => api.delete(`/courses/courses/${courseId}/enroll?student_id=${studentId}`),
+  studentHome: (studentId: string, materialsPerCourse = 5) =>
+    api.get(`/courses/students/${studentId}/home`, { params: { materials_per_course: materialsPerCourse } }),
+  enrollmentStatus: (courseId: string, studentId: string) =>
+    api.get(`/courses/courses/${courseId}/enroll/status`, { params: { student_id: studentId } }),
   students: (courseId: string) => api.get(`/courses/courses/${courseId}/students`),
+  exportRoster: (courseId: string, format: "csv" | "xlsx" = "csv") =>
+    api.get(`/courses/courses/${courseId}/enrollments/export`, { params: { format }, responseType: "blob" }),
   materials: (courseId: string) => api.get(`/courses/courses/${courseId}/materials`),
   uploadMaterial: (courseId: string, form: FormData) => api.post(`/courses/courses/${courseId}/materials`, form),
+  createUpload: (courseId: string, payload: Record<string, unknown>) =>
+    api.post(`/courses/courses/${courseId}/materials/uploads`, payload),
+  uploadStatus: (courseId: string, uploadId: string) => api.get(`/courses/courses/${courseId}/materials/uploads/${uploadId}`),
+  uploadChunk: (courseId: string, uploadId: string, offset: number, chunk: Blob) =>
+    api.put(`/courses/courses/${courseId}/materials/uploads/${uploadId}`, chunk, {
+      params: { offset },
+      headers: { "Content-Type": "application/octet-stream" }
+    }),
+  completeUpload: (courseId: string, uploadId: string) =>
+    api.post(`/courses/courses/${courseId}/materials/uploads/${uploadId}/complete`),
   deleteMaterial: (courseId: string, materialId: string) => api.delete(`/courses/courses/${courseId}/materials/${materialId}`)
 };
 
 export const meetingApi = {
   list: () => api.get("/meetings/meetings/"),
   get: (id: string) => api.get(`/meetings/meetings/${id}`),
+  calendar: (from: string, to: string, courseIds: string[], includeGeneral = false) =>
+    api.get("/meetings/meetings/calendar", {
+      params: { from, to, course_id: courseIds, include_general: includeGeneral },
+      paramsSerializer: { indexes: null }
+    }),
   create: (payload: Record<string, unknown>) => api.post("/meetings/meetings/", payload),
   update: (id: string, payload: Record<string, unknown>) => api.put(`/meetings/meetings/${id}`, payload),
   cancel: (id: string) => api.delete(`/meetings/meetings/${id}`),
+  skipOccurrence: (id: string, occurrence: string) => api.post(`/meetings/meetings/${id}/occurrences/skip`, { occurrence }),
+  moveOccurrence: (id: string, payload: { occurrence: string; scheduled_at: string; duration_minutes?: number }) =>
+    api.post(`/meetings/meetings/${id}/occurrences/move`, payload),
   join: (id: string) => api.post(`/meetings/meetings/${id}/join`),
   sessions: () => api.get("/meetings/sessions/"),
   reserveSession: (payload: Record<string, unknown>) => api.post("/meetings/sessions/", payload),
@@ -27,9 +27,9 @@ const AnalyticsPage = () => {
 
   useEffect(() => {
     const load = async () => {
-      const [usersRes, coursesRes, meetingsRes] = await Promise.all([authApi.listUsers(), courseApi.list(), meetingApi.list()]);
+      const [usersRes, statsRes, meetingsRes] = await Promise.all([authApi.listUsers(), courseApi.stats(), meetingApi.list()]);
       const users = usersRes.data as Array<{ role: string; created_at: string }>;
-      const courses = coursesRes.data as Array<{ id: string; code: string }>;
+      const courseStats = statsRes.data.courses as Array<{ code: string; active_enrollments: number }>;
       const meetings = meetingsRes.data as Array<{ scheduled_at: string }>;
 
       const roleCounts = users.reduce(
@@ -55,12 +55,7 @@ const AnalyticsPage = () => {
       );
       setGrowthData(Object.entries(byMonth).map(([month, usersCount]) => ({ month, users: usersCount })));
 
-      const enrollCounts: Array<{ name: string; count: number }> = [];
-      for (const c of courses) {
-        const students = await courseApi.students(c.id);
-        enrollCounts.push({ name: c.code, count: students.data.length });
-      }
-      setEnrollData(enrollCounts);
+      setEnrollData(courseStats.map((c) => ({ name: c.code, count: c.active_enrollments })));
 
       const weekCounts = meetings.reduce(
         (acc, m) => {
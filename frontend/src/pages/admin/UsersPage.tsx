@@ -1,7 +1,7 @@
 import { useEffect, useMemo, useState } from "react";
 
 import DashboardLayout from "../../components/layout/DashboardLayout";
-import { authApi } from "../../api/services";
+import { authApi, userApi } from "../../api/services";
 
 interface UserRow {
   id: string;
@@ -15,14 +15,34 @@ interface UserRow {
 const UsersPage = () => {
   const [rows, setRows] = useState<UserRow[]>([]);
   const [search, setSearch] = useState("");
+  const [matches, setMatches] = useState<UserRow[] | null>(null);
 
   useEffect(() => {
     authApi.listUsers().then(({ data }) => setRows(data)).catch(() => setRows([]));
   }, []);
 
+  useEffect(() => {
+    const q = search.trim();
+    if (q.length < 2) {
+      setMatches(null);
+      return;
+    }
+    let active = true;
+    const timer = setTimeout(() => {
+      userApi
+        .search(q)
+        .then(({ data }) => active && setMatches(data))
+        .catch(() => active && setMatches(null));
+    }, 200);
+    return () => {
+      active = false;
+      clearTimeout(timer);
+    };
+  }, [search]);
+
   const filtered = useMemo(
-    () => rows.filter((r) => `${r.full_name} ${r.email} ${r.role}`.toLowerCase().includes(search.toLowerCase())),
-    [rows, search]
+    () => matches ?? rows.filter((r) => `${r.full_name} ${r.email} ${r.role}`.toLowerCase().includes(search.toLowerCase())),
+    [matches, rows, search]
   );
 
   return (
@@ -10,6 +10,7 @@ const CreateMeetingPage = () => {
   const [meetingUrl, setMeetingUrl] = useState("");
   const [scheduledAt, setScheduledAt] = useState("");
   const [duration, setDuration] = useState("60");
+  const [repeatUntil, setRepeatUntil] = useState("");
 
   return (
     <DashboardLayout title="Create Meeting">
@@ -19,6 +20,10 @@ const CreateMeetingPage = () => {
           <input value={meetingUrl} onChange={(e) => setMeetingUrl(e.target.value)} className="rounded-xl border p-3" placeholder="Meeting URL" />
           <input type="datetime-local" value={scheduledAt} onChange={(e) => setScheduledAt(e.target.value)} className="rounded-xl border p-3" />
           <input value={duration} onChange={(e) => setDuration(e.target.value)} className="rounded-xl border p-3" placeholder="Duration minutes" />
+          <label className="flex items-center gap-3 rounded-xl border p-3 text-sm text-slate-600">
+            Repeat weekly until
+            <input type="date" value={repeatUntil} onChange={(e) => setRepeatUntil(e.target.value)} className="flex-1" />
+          </label>
         </div>
         <textarea className="mt-3 w-full rounded-xl border p-3" placeholder="Description" value={description} onChange={(e) => setDescription(e.target.value)} />
         <button
@@ -31,7 +36,9 @@ const CreateMeetingPage = () => {
                 meeting_url: meetingUrl,
                 scheduled_at: new Date(scheduledAt).toISOString(),
                 duration_minutes: Number(duration),
-                is_recurring: false
+                is_recurring: Boolean(repeatUntil),
+                rrule: repeatUntil ? `FREQ=WEEKLY;UNTIL=${repeatUntil.replace(/-/g, "")}` : null,
+                time_zone: Intl.DateTimeFormat().resolvedOptions().timeZone
               });
               toast.success("Meeting created");
               setTitle("");
@@ -39,6 +46,7 @@ const CreateMeetingPage = () => {
               setMeetingUrl("");
               setScheduledAt("");
               setDuration("60");
+              setRepeatUntil("");
             } catch {
               toast.error("Meeting creation failed");
             }
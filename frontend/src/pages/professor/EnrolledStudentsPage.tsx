@@ -47,25 +47,34 @@ const EnrolledStudentsPage = () => {
       }
       const res = await courseApi.students(courseId);
       setRows(res.data);
-      const pairs = await Promise.all(
-        res.data.map(async (e: Enrollment) => {
-          try {
-            const u = await authApi.getUserById(e.student_id);
-            return [e.student_id, u.data.full_name] as const;
-          } catch {
-            return [e.student_id, e.student_id] as const;
-          }
-        })
-      );
+      const ids = [...new Set<string>(res.data.map((e: Enrollment) => e.student_id))];
       const map: Record<string, string> = {};
-      pairs.forEach(([id, name]) => {
-        map[id] = name;
-      });
+      if (ids.length) {
+        try {
+          const users = await authApi.getUsersByIds(ids, ["full_name"]);
+          ids.forEach((id) => {
+            map[id] = users.data[id]?.full_name ?? id;
+          });
+        } catch {
+          ids.forEach((id) => {
+            map[id] = id;
+          });
+        }
+      }
       setStudentNames(map);
     };
     void loadStudents();
   }, [courseId]);
 
+  // The full roster with student names is built server-side and streamed as a download.
+  const exportRoster = async (format: "csv" | "xlsx") => {
+    const res = await courseApi.exportRoster(courseId, format);
+    const a = document.createElement("a");
+    a.href = URL.createObjectURL(res.data);
+    a.download = `enrolled_students.${format}`;
+    a.click();
+  };
+
   return (
     <DashboardLayout title="Enrolled Students">
       <div className="rounded-2xl bg-white/70 p-4">
@@ -77,14 +86,13 @@ const EnrolledStudentsPage = () => {
               </option>
             ))}
           </select>
-          <button className="rounded-xl border px-3" onClick={() => {
-            const csv = ["student_id,enrolled_at,status", ...rows.map((r) => `${r.student_id},${r.enrolled_at},${r.status}`)].join("\n");
-            const blob = new Blob([csv], { type: "text/csv" });
-            const a = document.createElement("a");
-            a.href = URL.createObjectURL(blob);
-            a.download = "enrolled_students.csv";
-            a.click();
-          }}>Export CSV</button>
+          <div className="flex gap-2">
+            {(["csv", "xlsx"] as const).map((format) => (
+              <button key={format} className="rounded-xl border px-3" disabled={!courseId} onClick={() => void exportRoster(format)}>
+                Export {format.toUpperCase()}
+              </button>
+            ))}
+          </div>
         </div>
         <table className="w-full text-left text-sm">
           <thead>
@@ -18,6 +18,39 @@ interface Material {
   file_type: string;
 }
 
+// Sends the file in chunks through the resumable upload API. The upload id is remembered per
+// file, so retrying after a dropped connection or a reload continues from the last chunk.
+const uploadInChunks = async (
+  courseId: string,
+  file: File,
+  meta: { title: string; description: string; file_type: string },
+  onProgress: (fraction: number) => void
+) => {
+  const key = `upload:${courseId}:${file.name}:${file.size}:${file.lastModified}`;
+  let upload: { id: string; received_bytes: number; chunk_size: number } | null = null;
+  const saved = localStorage.getItem(key);
+  if (saved) {
+    try {
+      upload = (await courseApi.uploadStatus(courseId, saved)).data;
+    } catch {
+      localStorage.removeItem(key);
+    }
+  }
+  if (!upload) {
+    upload = (await courseApi.createUpload(courseId, { ...meta, filename: file.name, size: file.size })).data;
+    localStorage.setItem(key, upload!.id);
+  }
+  let offset = upload!.received_bytes;
+  while (offset < file.size) {
+    onProgress(offset / file.size);
+    const res = await courseApi.uploadChunk(courseId, upload!.id, offset, file.slice(offset, offset + upload!.chunk_size));
+    offset = res.data.received_bytes;
+  }
+  onProgress(1);
+  await courseApi.completeUpload(courseId, upload!.id);
+  localStorage.removeItem(key);
+};
+
 const UploadMaterialPage = () => {
   const user = useAuthStore((s) => s.user);
   const [courses, setCourses] = useState<Course[]>([]);
@@ -27,6 +60,7 @@ const UploadMaterialPage = () => {
   const [fileType, setFileType] = useState("pdf");
   const [file, setFile] = useState<File | null>(null);
   const [materials, setMaterials] = useState<Material[]>([]);
+  const [progress, setProgress] = useState<number | null>(null);
 
   const load = async (selectedCourseId?: string) => {
     if (!user) return;
@@ -76,13 +110,8 @@ const UploadMaterialPage = () => {
               toast.error("Select course and file");
               return;
             }
-            const form = new FormData();
-            form.append("title", title);
-            form.append("description", description);
-            form.append("file_type", fileType);
-            form.append("file", file);
             try {
-              await courseApi.uploadMaterial(courseId, form);
+              await uploadInChunks(courseId, file, { title, description, file_type: fileType }, setProgress);
               toast.success("Material uploaded");
               setTitle("");
               setDescription("");
@@ -90,11 +119,13 @@ const UploadMaterialPage = () => {
               await load(courseId);
             } catch (err: unknown) {
               const detail = axios.isAxiosError(err) ? err.response?.data?.detail : undefined;
-              toast.error(detail || "Upload failed");
+              toast.error(detail || "Upload failed - retry to resume");
+            } finally {
+              setProgress(null);
             }
           }}
         >
-          Upload
+          {progress === null ? "Upload" : `Uploading ${Math.round(progress * 100)}%`}
         </button>
       </div>
 
@@ -8,12 +8,29 @@ import Modal from "../../components/common/Modal";
 import { useCourses } from "../../hooks/useCourses";
 import { courseApi } from "../../api/services";
 import { useAuthStore } from "../../store/authStore";
+import { Course } from "../../types";
+
+type Facet = { value: string; count: number };
+type SearchResults = {
+  total: number | null;
+  facets: { department: Facet[]; semester: Facet[] } | null;
+  items: Course[];
+  next_cursor: string | null;
+};
 
 const EnrollPage = () => {
   const [search, setSearch] = useState("");
+  const [department, setDepartment] = useState("");
+  // Server-side search results; null while the search box is empty.
+  const [results, setResults] = useState<Course[] | null>(null);
+  const [facets, setFacets] = useState<Facet[]>([]);
+  const [total, setTotal] = useState(0);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
   const [open, setOpen] = useState(false);
   const [selectedId, setSelectedId] = useState<string>("");
   const [enrolled, setEnrolled] = useState<Set<string>>(new Set());
+  // Waitlisted course id -> place in the queue.
+  const [waitlisted, setWaitlisted] = useState<Record<string, number | null>>({});
   const { courses } = useCourses();
   const user = useAuthStore((s) => s.user);
 
@@ -21,8 +38,9 @@ const EnrollPage = () => {
     const load = async () => {
       if (!user) return;
       try {
-        const res = await courseApi.myCourses(user.id);
+        const [res, waitRes] = await Promise.all([courseApi.myCourses(user.id), courseApi.myCourses(user.id, "waitlisted")]);
         setEnrolled(new Set(res.data.map((e: { course_id: string }) => e.course_id)));
+        setWaitlisted(Object.fromEntries(waitRes.data.map((e: { course_id: string }) => [e.course_id, null])));
       } catch {
         setEnrolled(new Set());
       }
@@ -30,9 +48,70 @@ const EnrollPage = () => {
     void load();
   }, [user]);
 
+  const waitlistedIds = Object.keys(waitlisted).sort().join(",");
+
+  // Poll the waitlist status instead of retrying the enroll POST; unchanged places come back as 304s.
+  useEffect(() => {
+    if (!user || !waitlistedIds) return;
+    const poll = async () => {
+      for (const courseId of waitlistedIds.split(",")) {
+        try {
+          const res = await courseApi.enrollmentStatus(courseId, user.id);
+          const { status, position } = res.data as { status: string; position: number | null };
+          if (status === "active") {
+            setEnrolled((prev) => new Set(prev).add(courseId));
+            toast.success("A seat opened up - you are now enrolled");
+          }
+          setWaitlisted((prev) => {
+            const next = { ...prev };
+            if (status === "waitlisted") next[courseId] = position;
+            else delete next[courseId];
+            return next;
+          });
+        } catch {
+          // Keep the last known place; the next tick retries.
+        }
+      }
+    };
+    void poll();
+    const timer = window.setInterval(() => void poll(), 15000);
+    return () => window.clearInterval(timer);
+  }, [user, waitlistedIds]);
+
+  useEffect(() => {
+    const q = search.trim();
+    if (!q) {
+      setResults(null);
+      setFacets([]);
+      setNextCursor(null);
+      return;
+    }
+    const timer = window.setTimeout(async () => {
+      try {
+        const res = await courseApi.search(q, { department: department || undefined });
+        const data = res.data as SearchResults;
+        setResults(data.items);
+        setFacets(data.facets?.department ?? []);
+        setTotal(data.total ?? data.items.length);
+        setNextCursor(data.next_cursor);
+      } catch {
+        setResults([]);
+      }
+    }, 300);
+    return () => window.clearTimeout(timer);
+  }, [search, department]);
+
+  const loadMore = async () => {
+    if (!nextCursor) return;
+    const res = await courseApi.search(search.trim(), { department: department || undefined, cursor: nextCursor });
+    const data = res.data as SearchResults;
+    setResults((prev) => [...(prev ?? []), ...data.items]);
+    setNextCursor(data.next_cursor);
+  };
+
   const rows = useMemo(
-    () => courses.filter((c) => `${c.title} ${c.code} ${c.department}`.toLowerCase().includes(search.toLowerCase())),
-    [courses, search]
+    () => results ?? courses.filter((c) => !department || c.department === department),
+    [results, courses, department]
   );
 
   const selected = rows.find((r) => r.id === selectedId);
@@ -45,6 +124,20 @@ const EnrollPage = () => {
         placeholder="Search courses"
         className="mb-4 w-full rounded-xl border p-3"
       />
+      {results !== null && (
+        <div className="mb-4 flex flex-wrap items-center gap-2 text-sm">
+          <span>{total} results</span>
+          {facets.map((f) => (
+            <button
+              key={f.value}
+              onClick={() => setDepartment(department === f.value ? "" : f.value)}
+              className={`rounded-full border px-3 py-1 ${department === f.value ? "bg-indigo-600 text-white" : "bg-white/70"}`}
+            >
+              {f.value} ({f.count})
+            </button>
+          ))}
+        </div>
+      )}
       <div className="overflow-x-auto rounded-2xl bg-white/70 p-4">
         <table className="w-full text-left text-sm">
           <thead>
@@ -63,19 +156,28 @@ const EnrollPage = () => {
                 <td>{r.department}</td>
                 <td>
                   <Button
-                    disabled={enrolled.has(r.id)}
+                    disabled={enrolled.has(r.id) || r.id in waitlisted}
                     onClick={() => {
                       setSelectedId(r.id);
                       setOpen(true);
                     }}
                   >
-                    {enrolled.has(r.id) ? "Enrolled" : "Enroll"}
+                    {enrolled.has(r.id)
+                      ? "Enrolled"
+                      : r.id in waitlisted
+                        ? `Waitlisted${waitlisted[r.id] ? ` #${waitlisted[r.id]}` : ""}`
+                        : "Enroll"}
                   </Button>
                 </td>
               </tr>
             ))}
           </tbody>
         </table>
+        {nextCursor && (
+          <div className="mt-4 text-center">
+            <Button onClick={() => void loadMore()}>Load more</Button>
+          </div>
+        )}
       </div>
       <Modal open={open} onClose={() => setOpen(false)} title="Confirm Enrollment">
         <p className="mb-4">Enroll in {selected?.title}?</p>
@@ -83,9 +185,14 @@ const EnrollPage = () => {
           onClick={async () => {
             if (!selected || !user) return;
             try {
-              await courseApi.enroll(selected.id, user.id);
-              setEnrolled((prev) => new Set(prev).add(selected.id));
-              toast.success("Enrollment successful");
+              const res = await courseApi.enroll(selected.id, user.id);
+              if (res.data.status === "waitlisted") {
+                setWaitlisted((prev) => ({ ...prev, [selected.id]: null }));
+                toast.success("Course is full - you joined the waitlist");
+              } else {
+                setEnrolled((prev) => new Set(prev).add(selected.id));
+                toast.success("Enrollment successful");
+              }
             } catch (err: unknown) {
               const detail =
                 typeof err === "object" &&
@@ -29,11 +29,11 @@ const MaterialsPage = () => {
   useEffect(() => {
     const loadCourses = async () => {
       if (!user) return;
-      const [allCoursesRes, enrollmentsRes] = await Promise.all([courseApi.list(), courseApi.myCourses(user.id)]);
-      const enrolledIds = new Set<string>(enrollmentsRes.data.map((e: { course_id: string }) => e.course_id));
-      const enrolledCourses = allCoursesRes.data
-        .filter((c: { id: string }) => enrolledIds.has(c.id))
-        .map((c: { id: string; title: string }) => ({ id: c.id, title: c.title }));
+      const home = await courseApi.studentHome(user.id, 0);
+      const enrolledCourses: CourseOption[] = home.data.courses.map((entry: { course: CourseOption }) => ({
+        id: entry.course.id,
+        title: entry.course.title
+      }));
       setCourses(enrolledCourses);
       if (!selectedCourseId && enrolledCourses[0]) {
         setSelectedCourseId(enrolledCourses[0].id);
@@ -24,10 +24,8 @@ const StudentCoursesPage = () => {
     const load = async () => {
       if (!user) return;
       try {
-        const [allCoursesRes, enrollmentsRes] = await Promise.all([courseApi.list(), courseApi.myCourses(user.id)]);
-        const allCourses: CourseRow[] = allCoursesRes.data;
-        const enrolledIds = new Set<string>(enrollmentsRes.data.map((e: { course_id: string }) => e.course_id));
-        setCourses(allCourses.filter((c) => enrolledIds.has(c.id)));
+        const home = await courseApi.studentHome(user.id, 0);
+        setCourses(home.data.courses.map((entry: { course: CourseRow }) => entry.course));
       } finally {
         setLoading(false);
       }
@@ -15,17 +15,14 @@ const StudentDashboard = () => {
   useEffect(() => {
     const load = async () => {
       if (!user) return;
-      const enrollments = await courseApi.myCourses(user.id);
-      const allMeetings = await meetingApi.list();
-      setEnrolledCount(String(enrollments.data.length));
-      setUpcomingMeetings(String(allMeetings.data.filter((m: { status: string }) => m.status !== "completed").length));
-
-      let totalMaterials = 0;
-      for (const e of enrollments.data) {
-        const materials = await courseApi.materials(e.course_id);
-        totalMaterials += materials.data.length;
-      }
-      setMaterialCount(String(totalMaterials));
+      const home = await courseApi.studentHome(user.id, 0);
+      const now = new Date();
+      const weekAhead = new Date(now.getTime() + 7 * 24 * 60 * 60 * 1000);
+      const courseIds = home.data.courses.map((c: { course: { id: string } }) => c.course.id);
+      const week = await meetingApi.calendar(now.toISOString(), weekAhead.toISOString(), courseIds, true);
+      setEnrolledCount(String(home.data.courses.length));
+      setUpcomingMeetings(String(week.data.length));
+      setMaterialCount(String(home.data.total_materials));
     };
     void load();
   }, [user]);
@@ -0,0 +1,107 @@
+"""Enrollment rush benchmark: many students enrolling into one small course at once.
+
+Run against a running stack (nginx on localhost by default) with the same JWT secret the
+services use:
+
+    JWT_SECRET=... python scripts/bench_enrollment.py --seats 50 --students 2000 --concurrency 200
+
+Creates a course with `--seats` seats, fires one enroll per student concurrently, and checks
+that no more than `--seats` enrollments succeeded and that the course's enrolled_count agrees.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import jwt
+
+
+def make_token(secret: str, algorithm: str, user_id: str, role: str) -> str:
+    claims = {
+        "sub": user_id,
+        "email": f"{role}-{user_id[:8]}@example.com",
+        "role": role,
+        "exp": datetime.now(timezone.utc) + timedelta(minutes=30),
+        "jti": uuid.uuid4().hex,
+    }
+    return jwt.encode(claims, secret, algorithm=algorithm)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default=os.getenv("COURSES_URL", "http://localhost/api/courses"))
+    parser.add_argument("--seats", type=int, default=50)
+    parser.add_argument("--students", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    args = parser.parse_args()
+
+    secret = os.environ["JWT_SECRET"]
+    algorithm = os.getenv("JWT_ALGORITHM", "HS256")
+    admin = {"Authorization": f"Bearer {make_token(secret, algorithm, str(uuid.uuid4()), 'admin')}"}
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=30, limits=httpx.Limits(max_connections=args.concurrency)) as client:
+        response = await client.post(
+            "/courses/",
+            headers=admin,
+            json={
+                "title": "Enrollment rush",
+                "description": "bench_enrollment.py",
+                "code": f"BENCH-{uuid.uuid4().hex[:6]}",
+                "credits": 3,
+                "professor_id": str(uuid.uuid4()),
+                "department": "Benchmark",
+                "semester": "bench",
+                "max_students": args.seats,
+            },
+        )
+        response.raise_for_status()
+        course_id = response.json()["id"]
+
+        semaphore = asyncio.Semaphore(args.concurrency)
+        outcomes: Counter[str] = Counter()
+        latencies: list[float] = []
+
+        async def enroll() -> None:
+            student_id = str(uuid.uuid4())
+            headers = {"Authorization": f"Bearer {make_token(secret, algorithm, student_id, 'student')}"}
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post(f"/courses/{course_id}/enroll", params={"student_id": student_id}, headers=headers)
+                latencies.append(time.perf_counter() - started)
+            if response.status_code == 200:
+                outcomes["enrolled"] += 1
+            else:
+                outcomes[f"{response.status_code} {response.json().get('detail', '')}"] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(enroll() for _ in range(args.students)))
+        elapsed = time.perf_counter() - started
+
+        students: list[dict] = []
+        params = {"limit": 100}
+        while True:
+            response = await client.get(f"/courses/{course_id}/students", params=params, headers=admin)
+            students.extend(response.json())
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["cursor"] = response.headers["X-Next-Cursor"]
+        course = (await client.get(f"/courses/{course_id}", headers=admin)).json()
+
+    latencies.sort()
+    print(f"{args.students} enroll attempts in {elapsed:.2f}s ({args.students / elapsed:,.0f} req/s)")
+    print(f"latency p50 {latencies[len(latencies) // 2] * 1000:.1f}ms  p95 {latencies[int(len(latencies) * 0.95)] * 1000:.1f}ms")
+    for outcome, count in outcomes.most_common():
+        print(f"  {outcome:<30} {count}")
+    active = sum(1 for enrollment in students if enrollment["status"] == "active")
+    print(f"seats {args.seats}, active enrollments {active}, enrolled_count {course['enrolled_count']}")
+    assert active <= args.seats, "course overbooked"
+    assert active == outcomes["enrolled"] == course["enrolled_count"], "enrolled_count out of sync"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""Round-trips a blob through the S3 backend of the blob store, e.g. against MinIO:
+
+    docker compose --profile s3 up -d minio
+    S3_ENDPOINT_URL=http://localhost:9000 S3_ACCESS_KEY=minioadmin S3_SECRET_KEY=minioadmin \\
+        python scripts/blobstore_smoke.py
+
+The bucket (S3_BUCKET, default "uploads") must exist.
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "services", "course-service"))
+
+from blobstore import S3Backend, StagedFile  # noqa: E402
+
+
+async def main() -> None:
+    backend = S3Backend(
+        os.getenv("S3_ENDPOINT_URL", "http://localhost:9000"),
+        os.getenv("S3_BUCKET", "uploads"),
+        os.getenv("S3_ACCESS_KEY", "minioadmin"),
+        os.getenv("S3_SECRET_KEY", "minioadmin"),
+        os.getenv("S3_REGION", "us-east-1"),
+        os.getenv("BLOB_PUBLIC_URL", "http://localhost:9000/uploads"),
+    )
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    digest = hashlib.sha256(data).hexdigest()
+    key = f"smoke/{digest[:2]}/{digest}.bin"
+    with tempfile.NamedTemporaryFile(delete=False) as tmp:
+        tmp.write(data)
+
+    assert not await backend.exists(key)
+    await backend.put(key, StagedFile(path=tmp.name, size=len(data), digest=digest), "application/octet-stream")
+    assert await backend.exists(key)
+    print(f"stored {len(data)} bytes at {backend.url(key)}")
+    await backend.delete(key)
+    assert not await backend.exists(key)
+    os.remove(tmp.name)
+    print("ok")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
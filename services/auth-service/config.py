@@ -15,6 +15,22 @@ class Settings(BaseSettings):
     email_from: str = "noreply@example.com"
     notification_service_url: str = "http://localhost:8006"
     user_service_url: str = "http://user-service-1:8002"
+    principal_cache_local_ttl_seconds: int = 30
+    principal_cache_redis_ttl_seconds: int = 300
+    principal_cache_max_entries: int = 10000
+    pbkdf2_rounds: int = 29000
+    hash_pool_workers: int = 0
+    hash_pool_max_pending: int = 64
+    import_batch_size: int = 500
+    outbox_batch_size: int = 200
+    outbox_poll_interval_seconds: float = 2.0
+    outbox_max_backoff_seconds: int = 300
+    outbox_max_attempts: int = 20
+    outbox_lease_seconds: int = 300
+    login_throttle_window_seconds: int = 300
+    login_throttle_per_email_ip: int = 10
+    login_throttle_per_email: int = 100
+    login_throttle_per_ip: int = 1000
 
     class Config:
         env_file = ".env"
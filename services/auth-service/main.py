@@ -1,13 +1,21 @@
 import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from sqlalchemy.exc import OperationalError
 
-from database import Base, engine
+from database import Base, engine, sync_schema
 from routers.auth import router as auth_router
+from routers.bulk_import import router as bulk_import_router
 from routers.password_reset import router as password_router
+from utils.hashing import HashingPoolSaturated, hashing_pool
+from utils.outbox import outbox_worker
+from utils.pagination import NEXT_CURSOR_HEADER
+from utils.principal_cache import principal_cache
+from utils.revocation import revocation_filter
+from utils.throttle import Throttled, login_throttle
 
 
 @asynccontextmanager
@@ -16,12 +24,22 @@ async def lifespan(app: FastAPI):
         try:
             async with engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(sync_schema)
             break
         except OperationalError:
             await asyncio.sleep(2)
     else:
         raise RuntimeError("Database is not reachable for auth-service")
+    hashing_pool.start()
+    listeners = [
+        asyncio.create_task(principal_cache.listen()),
+        asyncio.create_task(revocation_filter.listen()),
+        asyncio.create_task(outbox_worker.run()),
+    ]
     yield
+    for listener in listeners:
+        listener.cancel()
+    hashing_pool.shutdown()
 
 
 app = FastAPI(title="auth-service", lifespan=lifespan)
@@ -31,12 +49,41 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin callers (the dev server) can only read listed response headers.
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_pool_saturated(request: Request, exc: HashingPoolSaturated):
+    return JSONResponse(status_code=503, content={"detail": "Server busy, retry shortly"}, headers={"Retry-After": "1"})
+
+
+@app.exception_handler(Throttled)
+async def throttled(request: Request, exc: Throttled):
+    return JSONResponse(
+        status_code=429,
+        content={"detail": "Too many attempts, retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
 app.include_router(auth_router)
 app.include_router(password_router)
+app.include_router(bulk_import_router)
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "auth-service"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "principal_cache": principal_cache.stats(),
+        "revocations": revocation_filter.stats(),
+        "hashing_pool": hashing_pool.stats(),
+        "outbox": outbox_worker.stats(),
+        "login_throttle": login_throttle.stats(),
+    }
@@ -3,50 +3,72 @@ from datetime import timedelta
 import redis.asyncio as redis
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
-from passlib.context import CryptContext
-from sqlalchemy import select
+from sqlalchemy import any_, bindparam, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import settings
 from database import get_db
 from models import AuthUser
-from schemas import LoginRequest, RefreshRequest, RegisterRequest, TokenResponse, UserOut
+from schemas import AuthUserUpdate, LoginRequest, RefreshRequest, RegisterRequest, TokenResponse, UserBatchRequest, UserOut
+from utils.hashing import HashingPoolSaturated, hashing_pool
 from utils.jwt import create_token, decode_token
-from utils.user_sync import create_user_profile
+from utils.outbox import enqueue_profile_sync, outbox_worker
+from utils.pagination import page_rows, paginate
+from utils.principal_cache import load_principal, principal_cache
+from utils.revocation import revocation_filter
+from utils.throttle import client_ip, login_throttle
 
 router = APIRouter()
 security = HTTPBearer(auto_error=False)
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 redis_client = redis.from_url(settings.redis_url, decode_responses=True)
 
 
-async def get_current_user(
+async def get_current_principal(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: AsyncSession = Depends(get_db),
-) -> AuthUser:
+) -> dict:
     if not credentials:
         raise HTTPException(status_code=401, detail="Missing token")
     token = credentials.credentials
-    if await redis_client.get(f"blacklist:{token}"):
-        raise HTTPException(status_code=401, detail="Token blacklisted")
     try:
         payload = decode_token(token)
     except Exception as exc:
         raise HTTPException(status_code=401, detail="Invalid token") from exc
+    jti = payload.get("jti")
+    if jti:
+        if await revocation_filter.is_revoked(jti):
+            raise HTTPException(status_code=401, detail="Token revoked")
+    elif await redis_client.get(f"blacklist:{token}"):
+        # Tokens minted before jti was introduced are still revoked by value.
+        raise HTTPException(status_code=401, detail="Token blacklisted")
     user_id = payload.get("sub")
-    result = await db.execute(select(AuthUser).where(AuthUser.id == user_id))
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Invalid token")
+    principal = await principal_cache.get(user_id, lambda: load_principal(db, user_id))
+    if not principal or not principal["is_active"]:
+        raise HTTPException(status_code=401, detail="Inactive user")
+    return principal
+
+
+async def get_current_user(
+    principal: dict = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+) -> AuthUser:
+    result = await db.execute(select(AuthUser).where(AuthUser.id == principal["id"]))
     user = result.scalar_one_or_none()
     if not user or not user.is_active:
+        await principal_cache.invalidate(principal["id"])
         raise HTTPException(status_code=401, detail="Inactive user")
     return user
 
 
-async def require_admin(user: AuthUser = Depends(get_current_user)) -> AuthUser:
-    if user.role.value != "admin":
+async def require_admin(principal: dict = Depends(get_current_principal)) -> dict:
+    if principal["role"] != "admin":
         raise HTTPException(status_code=403, detail="Forbidden")
-    return user
+    return principal
 
 
 @router.post("/register", response_model=UserOut, status_code=201)
@@ -58,25 +80,40 @@ async def register(payload: RegisterRequest, db: AsyncSession = Depends(get_db))
         email=payload.email,
         full_name=payload.full_name,
         role=payload.role,
-        password_hash=pwd_context.hash(payload.password),
+        password_hash=await hashing_pool.hash(payload.password),
     )
     db.add(user)
+    await db.flush()
+    enqueue_profile_sync(db, user)
     await db.commit()
-    await db.refresh(user)
-    synced = await create_user_profile(user)
-    if not synced:
-        await db.delete(user)
-        await db.commit()
-        raise HTTPException(status_code=500, detail="User profile sync failed")
+    outbox_worker.notify()
     return user
 
 
 @router.post("/login", response_model=TokenResponse)
-async def login(payload: LoginRequest, response: Response, db: AsyncSession = Depends(get_db)):
+async def login(
+    payload: LoginRequest,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+):
+    ip = client_ip(request)
+    attempt = await login_throttle.check("login", payload.email, ip)
     result = await db.execute(select(AuthUser).where(AuthUser.email == payload.email))
     user = result.scalar_one_or_none()
-    if not user or not pwd_context.verify(payload.password, user.password_hash):
+    if not user:
+        raise HTTPException(status_code=401, detail="Invalid credentials")
+    try:
+        valid, new_hash = await hashing_pool.verify_and_update(payload.password, user.password_hash)
+    except HashingPoolSaturated:
+        await login_throttle.withdraw("login", payload.email, ip, attempt)
+        raise
+    if not valid:
         raise HTTPException(status_code=401, detail="Invalid credentials")
+    if new_hash:
+        user.password_hash = new_hash
+        await db.commit()
+    await login_throttle.succeeded("login", payload.email, ip, attempt)
 
     access = create_token(
         {"sub": str(user.id), "email": user.email, "role": user.role.value},
@@ -107,6 +144,8 @@ async def refresh(payload: RefreshRequest, response: Response):
         raise HTTPException(status_code=401, detail="Invalid refresh token") from exc
     if claims.get("type") != "refresh":
         raise HTTPException(status_code=401, detail="Invalid token type")
+    if await revocation_filter.is_revoked(claims.get("jti")):
+        raise HTTPException(status_code=401, detail="Token revoked")
 
     access = create_token(
         {"sub": claims["sub"], "email": claims.get("email", ""), "role": claims.get("role", "student")},
@@ -117,13 +156,35 @@ async def refresh(payload: RefreshRequest, response: Response):
 
 @router.post("/logout")
 async def logout(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
     response: Response = None,
 ):
+    # Revokes the access token and the refresh token cookie, so the session cannot be renewed
+    # either. Other refresh tokens of the same user (other devices) stay valid.
     if not credentials:
         raise HTTPException(status_code=400, detail="Missing token")
     token = credentials.credentials
-    await redis_client.setex(f"blacklist:{token}", settings.access_token_expire_minutes * 60, "1")
+    try:
+        claims = decode_token(token)
+    except Exception as exc:
+        raise HTTPException(status_code=401, detail="Invalid token") from exc
+    if claims.get("jti"):
+        await revocation_filter.revoke(claims["jti"], claims["exp"])
+    else:
+        # Tokens without a jti can only be blacklisted in Redis; no local fallback exists for them.
+        try:
+            await redis_client.setex(f"blacklist:{token}", settings.access_token_expire_minutes * 60, "1")
+        except redis.RedisError as exc:
+            raise HTTPException(status_code=503, detail="Logout is temporarily unavailable, try again") from exc
+    refresh_token = request.cookies.get("refresh_token")
+    if refresh_token:
+        try:
+            refresh_claims = decode_token(refresh_token)
+        except Exception:
+            refresh_claims = {}
+        if refresh_claims.get("type") == "refresh" and refresh_claims.get("sub") == claims.get("sub"):
+            await revocation_filter.revoke(refresh_claims["jti"], refresh_claims["exp"])
     if response:
         response.delete_cookie("refresh_token")
     return {"message": "Logged out"}
@@ -136,28 +197,85 @@ async def me(user: AuthUser = Depends(get_current_user)):
 
 @router.get("/users", response_model=list[UserOut])
 async def list_users(
+    response: Response,
     role: str | None = None,
+    is_active: bool | None = None,
+    cursor: str | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
-    _: AuthUser = Depends(require_admin),
+    _: dict = Depends(require_admin),
 ):
     stmt = select(AuthUser)
     if role:
         stmt = stmt.where(AuthUser.role == role)
-    stmt = stmt.offset(skip).limit(limit)
+    if is_active is not None:
+        stmt = stmt.where(AuthUser.is_active.is_(is_active))
+    stmt = paginate(stmt, AuthUser.created_at, AuthUser.id, cursor, skip, limit)
     result = await db.execute(stmt)
-    return result.scalars().all()
+    return page_rows(result.scalars().all(), AuthUser.created_at, limit, response)
+
+
+@router.post("/users/batch", response_model=dict[str, dict | None])
+async def get_users_batch(
+    payload: UserBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_principal),
+):
+    fields = payload.fields or list(UserOut.model_fields)
+    columns = [getattr(AuthUser, name) for name in dict.fromkeys(["id", *fields])]
+    ids = bindparam("ids", payload.ids, type_=ARRAY(PG_UUID(as_uuid=True)))
+    result = await db.execute(select(*columns).where(AuthUser.id == any_(ids)))
+    found = {row.id: {name: row._mapping[name] for name in fields} for row in result}
+    return {str(user_id): found.get(user_id) for user_id in payload.ids}
 
 
 @router.get("/users/{user_id}", response_model=UserOut)
 async def get_user_by_id(
     user_id: UUID,
     db: AsyncSession = Depends(get_db),
-    _: AuthUser = Depends(get_current_user),
+    _: dict = Depends(get_current_principal),
 ):
     result = await db.execute(select(AuthUser).where(AuthUser.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     return user
+
+
+@router.put("/users/{user_id}", response_model=UserOut)
+async def update_user(
+    user_id: UUID,
+    payload: AuthUserUpdate,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_admin),
+):
+    result = await db.execute(select(AuthUser).where(AuthUser.id == user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    changes = payload.model_dump(exclude_none=True)
+    principal_changed = any(getattr(user, key) != value for key, value in changes.items() if key in ("role", "is_active"))
+    for key, value in changes.items():
+        setattr(user, key, value)
+    await db.commit()
+    await db.refresh(user)
+    if principal_changed:
+        await principal_cache.invalidate(str(user.id))
+    return user
+
+
+@router.delete("/users/{user_id}")
+async def deactivate_user(
+    user_id: UUID,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_admin),
+):
+    result = await db.execute(select(AuthUser).where(AuthUser.id == user_id))
+    user = result.scalar_one_or_none()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    user.is_active = False
+    await db.commit()
+    await principal_cache.invalidate(str(user.id))
+    return {"message": "User deactivated"}
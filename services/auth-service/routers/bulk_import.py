@@ -0,0 +1,268 @@
+import csv
+import json
+import uuid
+from collections import Counter, deque
+from collections.abc import Iterator
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import ValidationError
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import get_db
+from models import AuthUser, OutboxEvent
+from routers.auth import require_admin
+from schemas import ImportReport, ImportRowResult, RegisterRequest
+from utils.hashing import HashingPoolSaturated, hashing_pool
+from utils.outbox import PROFILE_CREATED, outbox_worker
+from utils.user_sync import profile_payload
+
+router = APIRouter()
+
+
+async def iter_lines(request: Request):
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8-sig").rstrip("\r")
+    if buffer:
+        yield buffer.decode("utf-8-sig").rstrip("\r")
+
+
+MAX_RECORD_LINES = 100
+
+
+def still_quoted(line: str, quoted: bool) -> bool:
+    # Whether a record is still inside a quoted field at the end of `line`, read the way csv's
+    # default dialect reads it: a quote opens a field only at the field's start, "" inside one
+    # is a literal quote, and any other quote is plain text (O"Brien is one unquoted field).
+    at_start = not quoted
+    closing = False
+    for char in line:
+        if quoted:
+            if char == '"':
+                quoted, closing = False, True
+            continue
+        if closing and char == '"':
+            quoted, closing = True, False
+            continue
+        closing = False
+        if char == ",":
+            at_start = True
+        elif char == '"' and at_start:
+            quoted, at_start = True, False
+        else:
+            at_start = False
+    return quoted
+
+
+class RecordSplitter:
+    # Groups physical lines into CSV records. A record still open after MAX_RECORD_LINES (or at
+    # the end of the file) has an unclosed quote: its first line is reported as malformed (None)
+    # and the lines after it are read again on their own, so one bad quote costs one row.
+    def __init__(self):
+        self.record: list[str] = []
+        self.quoted = False
+
+    def push(self, line: str) -> Iterator[list[str] | None]:
+        pending = deque([line])
+        while pending:
+            line = pending.popleft()
+            if not self.record and not line.strip():
+                continue
+            self.record.append(line)
+            self.quoted = still_quoted(line, self.quoted)
+            if not self.quoted:
+                yield self.record
+                self.record = []
+            elif len(self.record) > MAX_RECORD_LINES:
+                yield None
+                pending.extendleft(reversed(self.record[1:]))
+                self.record, self.quoted = [], False
+
+    def finish(self) -> Iterator[list[str] | None]:
+        while self.record:
+            rest = self.record[1:]
+            self.record, self.quoted = [], False
+            yield None
+            for line in rest:
+                yield from self.push(line)
+
+
+class LineFeed:
+    # Sync iterator for csv.reader over lines pushed from the request stream. The reader is
+    # only advanced once a whole record is queued, so it never sees the feed run dry mid-record.
+    def __init__(self):
+        self.lines: deque[str] = deque()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        return self.lines.popleft()
+
+
+async def iter_rows(request: Request, fmt: str):
+    header = None
+    feed = LineFeed()
+    reader = csv.reader(feed)
+    splitter = RecordSplitter()
+
+    def parse(records: Iterator[list[str] | None]) -> Iterator[dict | None]:
+        nonlocal header
+        for record in records:
+            if record is None:
+                yield None
+                continue
+            feed.lines.extend(line + "\n" for line in record)
+            values = next(reader)
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            yield dict(zip(header, values))
+
+    async for line in iter_lines(request):
+        if fmt == "ndjson":
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                yield None
+            continue
+        for row in parse(splitter.push(line)):
+            yield row
+    for row in parse(splitter.finish()):
+        yield row
+
+
+async def import_batch(db: AsyncSession, batch: list[tuple[int, RegisterRequest]]) -> list[ImportRowResult]:
+    results = []
+    existing = await db.execute(select(AuthUser.email).where(AuthUser.email.in_([item.email for _, item in batch])))
+    existing_emails = set(existing.scalars().all())
+    pending = []
+    for row, item in batch:
+        if item.email in existing_emails:
+            results.append(ImportRowResult(row=row, email=item.email, status="exists", detail="Email already exists"))
+        else:
+            pending.append((row, item))
+    if not pending:
+        return results
+
+    hashes = await hashing_pool.hash_many([item.password for _, item in pending])
+    now = datetime.utcnow()
+    users = [
+        AuthUser(
+            id=uuid.uuid4(),
+            email=item.email,
+            full_name=item.full_name,
+            role=item.role,
+            password_hash=password_hash,
+            is_active=True,
+            created_at=now,
+        )
+        for (_, item), password_hash in zip(pending, hashes)
+    ]
+    stmt = (
+        insert(AuthUser)
+        .values([{column.key: getattr(user, column.key) for column in AuthUser.__table__.columns} for user in users])
+        .on_conflict_do_nothing(index_elements=[AuthUser.email])
+        .returning(AuthUser.id)
+    )
+    inserted_ids = set((await db.execute(stmt)).scalars().all())
+    created = [user for user in users if user.id in inserted_ids]
+    if created:
+        # Profile creation rides the outbox, committed in the same transaction as the users.
+        await db.execute(
+            insert(OutboxEvent).values(
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "event_type": PROFILE_CREATED,
+                        "payload": profile_payload(user),
+                        "attempts": 0,
+                        "next_attempt_at": now,
+                        "created_at": now,
+                    }
+                    for user in created
+                ]
+            )
+        )
+    await db.commit()
+    outbox_worker.notify()
+
+    for (row, item), user in zip(pending, users):
+        if user.id in inserted_ids:
+            results.append(ImportRowResult(row=row, email=item.email, status="created", id=user.id))
+        else:
+            # Lost a race with a concurrent registration of the same email.
+            results.append(ImportRowResult(row=row, email=item.email, status="exists", detail="Email already exists"))
+    return results
+
+
+@router.post("/users/import", response_model=ImportReport)
+async def import_users(
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_admin),
+):
+    content_type = request.headers.get("content-type", "")
+    if "ndjson" in content_type or "jsonl" in content_type:
+        fmt = "ndjson"
+    elif "csv" in content_type:
+        fmt = "csv"
+    else:
+        raise HTTPException(status_code=415, detail="Expected text/csv or application/x-ndjson body")
+
+    results: list[ImportRowResult] = []
+    seen: set[str] = set()
+    batch: list[tuple[int, RegisterRequest]] = []
+    # Batches commit as they go, so a failure part-way still returns the report: the failed
+    # batch and every later valid row are marked for retry instead of attempted.
+    stopped: tuple[str, str] | None = None
+
+    async def flush(batch: list[tuple[int, RegisterRequest]]) -> None:
+        nonlocal stopped
+        if stopped is None:
+            try:
+                results.extend(await import_batch(db, batch))
+                return
+            except HashingPoolSaturated:
+                stopped = ("retry", f"Server busy; import stopped at row {batch[0][0]}")
+            except SQLAlchemyError:
+                await db.rollback()
+                stopped = ("failed", f"Database error; import stopped at row {batch[0][0]}")
+        status, detail = stopped
+        results.extend(ImportRowResult(row=row, email=item.email, status=status, detail=detail) for row, item in batch)
+
+    row = 0
+    async for raw in iter_rows(request, fmt):
+        row += 1
+        email = raw.get("email") if isinstance(raw, dict) else None
+        try:
+            item = RegisterRequest.model_validate(raw)
+        except ValidationError as exc:
+            detail = "; ".join(f"{'.'.join(map(str, err['loc'])) or 'row'}: {err['msg']}" for err in exc.errors())
+            results.append(ImportRowResult(row=row, email=email, status="invalid", detail=detail))
+            continue
+        if item.email in seen:
+            results.append(ImportRowResult(row=row, email=item.email, status="duplicate", detail="Email repeated in file"))
+            continue
+        seen.add(item.email)
+        batch.append((row, item))
+        if len(batch) >= settings.import_batch_size:
+            await flush(batch)
+            batch = []
+    if batch:
+        await flush(batch)
+
+    results.sort(key=lambda result: result.row)
+    return ImportReport(summary=dict(Counter(result.status for result in results)), results=results)
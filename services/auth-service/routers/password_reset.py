@@ -1,8 +1,7 @@
 from datetime import timedelta
 
 import redis.asyncio as redis
-from fastapi import APIRouter, Depends, Header, HTTPException
-from passlib.context import CryptContext
+from fastapi import APIRouter, Depends, Header, HTTPException, Request
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -11,11 +10,12 @@ from database import get_db
 from models import AuthUser
 from schemas import ForgotPasswordRequest, ResetPasswordRequest, VerifyOtpRequest
 from utils.email import send_otp_email
+from utils.hashing import hashing_pool
 from utils.jwt import create_token, decode_token
 from utils.otp import store_otp, verify_otp
+from utils.throttle import client_ip, login_throttle
 
 router = APIRouter()
-pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 redis_client = redis.from_url(settings.redis_url)
 
 
@@ -31,10 +31,13 @@ async def forgot_password(payload: ForgotPasswordRequest, db: AsyncSession = Dep
 
 
 @router.post("/verify-otp")
-async def verify(payload: VerifyOtpRequest):
+async def verify(payload: VerifyOtpRequest, request: Request):
+    ip = client_ip(request)
+    attempt = await login_throttle.check("verify_otp", payload.email, ip)
     ok = await verify_otp(payload.email, payload.otp, redis_client)
     if not ok:
         raise HTTPException(status_code=400, detail="Invalid OTP")
+    await login_throttle.succeeded("verify_otp", payload.email, ip, attempt)
     reset_token = create_token({"email": payload.email, "type": "reset"}, timedelta(minutes=10))
     return {"reset_token": reset_token}
 
@@ -59,6 +62,6 @@ async def reset_password(
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    user.password_hash = pwd_context.hash(payload.password)
+    user.password_hash = await hashing_pool.hash(payload.password)
     await db.commit()
     return {"message": "Password updated"}
@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 from models import UserRole
 
@@ -40,6 +40,12 @@ class ResetPasswordRequest(BaseModel):
     password: str = Field(min_length=8)
 
 
+class AuthUserUpdate(BaseModel):
+    full_name: str | None = None
+    role: UserRole | None = None
+    is_active: bool | None = None
+
+
 class UserOut(BaseModel):
     id: UUID
     email: EmailStr
@@ -50,3 +56,30 @@ class UserOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ImportRowResult(BaseModel):
+    row: int
+    email: str | None = None
+    status: str
+    id: UUID | None = None
+    detail: str | None = None
+
+
+class ImportReport(BaseModel):
+    summary: dict[str, int]
+    results: list[ImportRowResult]
+
+
+class UserBatchRequest(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=500)
+    fields: list[str] | None = None
+
+    @field_validator("fields")
+    @classmethod
+    def known_fields(cls, value: list[str] | None) -> list[str] | None:
+        if value is not None:
+            unknown = set(value) - set(UserOut.model_fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return value
@@ -0,0 +1,88 @@
+import asyncio
+
+from routers import bulk_import
+from utils.hashing import HashingPoolSaturated
+
+
+class FakeRequest:
+    def __init__(self, body: bytes, content_type: str, chunk: int = 7):
+        self.headers = {"content-type": content_type}
+        self._body = body
+        self._chunk = chunk
+
+    async def stream(self):
+        for start in range(0, len(self._body), self._chunk):
+            yield self._body[start : start + self._chunk]
+
+
+async def collect(request, fmt):
+    return [row async for row in bulk_import.iter_rows(request, fmt)]
+
+
+def test_csv_quoted_newlines_do_not_shift_rows():
+    body = (
+        b'\xef\xbb\xbfemail,full_name,password\r\n'
+        b'a@example.com,"Ada\r\nLovelace",secret123\r\n'
+        b'\r\n'
+        b'b@example.com,"Said ""Bob""",secret123\n'
+        b'c@example.com,"unterminated,secret123\n'
+    )
+    rows = asyncio.run(collect(FakeRequest(body, "text/csv"), "csv"))
+    assert rows[0] == {"email": "a@example.com", "full_name": "Ada\nLovelace", "password": "secret123"}
+    assert rows[1] == {"email": "b@example.com", "full_name": 'Said "Bob"', "password": "secret123"}
+    assert rows[2] is None
+    assert len(rows) == 3
+
+
+def test_stray_quote_in_unquoted_field_does_not_swallow_later_rows():
+    body = (
+        b"email,full_name,password\n"
+        b'o@example.com,Miles O"Brien,secret123\n'
+        b"a@example.com,Ada,secret123\n"
+        b"b@example.com,Bob,secret123\n"
+    )
+    rows = asyncio.run(collect(FakeRequest(body, "text/csv"), "csv"))
+    assert [row["email"] for row in rows] == ["o@example.com", "a@example.com", "b@example.com"]
+    assert rows[0]["full_name"] == 'Miles O"Brien'
+
+
+def test_unclosed_quote_costs_only_its_own_row(monkeypatch):
+    body = (
+        b"email,full_name,password\n"
+        b'x@example.com,"Never closed,secret123\n'
+        b"a@example.com,Ada,secret123\n"
+        b"b@example.com,Bob,secret123\n"
+        b"c@example.com,Cy,secret123\n"
+    )
+    # At the end of the file.
+    rows = asyncio.run(collect(FakeRequest(body, "text/csv"), "csv"))
+    assert rows[0] is None
+    assert [row["email"] for row in rows[1:]] == ["a@example.com", "b@example.com", "c@example.com"]
+    # And once the record runs past MAX_RECORD_LINES.
+    monkeypatch.setattr(bulk_import, "MAX_RECORD_LINES", 2)
+    rows = asyncio.run(collect(FakeRequest(body, "text/csv"), "csv"))
+    assert rows[0] is None
+    assert [row["email"] for row in rows[1:]] == ["a@example.com", "b@example.com", "c@example.com"]
+
+
+def test_failure_in_later_batch_still_returns_report(monkeypatch):
+    monkeypatch.setattr(bulk_import.settings, "import_batch_size", 2)
+    calls = []
+
+    async def import_batch(db, batch):
+        calls.append(batch)
+        if len(calls) == 2:
+            raise HashingPoolSaturated()
+        return [bulk_import.ImportRowResult(row=row, email=item.email, status="created") for row, item in batch]
+
+    monkeypatch.setattr(bulk_import, "import_batch", import_batch)
+    lines = ["email,full_name,password,role"] + [f"user{i}@example.com,User {i},secret123,student" for i in range(6)]
+    lines.insert(3, "not-an-email,Nobody,secret123,student")
+    request = FakeRequest("\n".join(lines).encode(), "text/csv")
+
+    report = asyncio.run(bulk_import.import_users(request, db=None, _={}))
+
+    assert [result.status for result in report.results] == ["created", "created", "invalid", "retry", "retry", "retry", "retry"]
+    assert report.summary == {"created": 2, "invalid": 1, "retry": 4}
+    # Nothing after the failing batch is attempted.
+    assert len(calls) == 2
@@ -0,0 +1,111 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+
+import httpx
+
+from utils import outbox
+
+
+class FakeSession:
+    def __init__(self, log):
+        self._log = log
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def execute(self, stmt):
+        self._log.append(stmt)
+
+    async def commit(self):
+        pass
+
+
+def make_worker(monkeypatch, events, statements, max_attempts=20):
+    worker = outbox.OutboxWorker(batch_size=len(events), poll_interval=1, max_backoff=300, max_attempts=max_attempts, lease=300)
+
+    async def claim():
+        return events
+
+    monkeypatch.setattr(worker, "_claim", claim)
+    monkeypatch.setattr(outbox, "AsyncSessionLocal", lambda: FakeSession(statements))
+    return worker
+
+
+def make_events(count, attempts=0):
+    return [SimpleNamespace(id=uuid.uuid4(), payload={"email": f"user{i}@example.com"}, attempts=attempts) for i in range(count)]
+
+
+def rejecting(bad_emails, status_code=422, posted=None):
+    async def create_user_profiles(profiles):
+        if posted is not None:
+            posted.append(len(profiles))
+        if any(profile["email"] in bad_emails for profile in profiles):
+            request = httpx.Request("POST", "http://user-service/users/bulk")
+            raise httpx.HTTPStatusError("rejected", request=request, response=httpx.Response(status_code, request=request))
+
+    return create_user_profiles
+
+
+def updates(statements):
+    # {event id: values} for the per-event UPDATEs issued by _settle.
+    result = {}
+    for stmt in statements:
+        if stmt.is_update:
+            params = stmt.compile().params
+            result[params["id_1"]] = {key: value for key, value in params.items() if key != "id_1"}
+    return result
+
+
+def test_poison_event_is_dead_lettered_and_the_rest_delivered(monkeypatch):
+    events = make_events(8)
+    statements = []
+    posted = []
+    worker = make_worker(monkeypatch, events, statements)
+    monkeypatch.setattr(outbox, "create_user_profiles", rejecting({"user5@example.com"}, posted=posted))
+
+    assert asyncio.run(worker.drain_once()) == 7
+
+    deleted = next(stmt for stmt in statements if stmt.is_delete).compile().params["id_1"]
+    assert set(deleted) == {event.id for event in events} - {events[5].id}
+    assert updates(statements) == {events[5].id: {"attempts": 1, "last_error": "rejected", "status": "dead"}}
+    assert worker.stats() == {"delivered": 7, "failed_attempts": 1, "dead_lettered": 1}
+    # Bisection isolates the bad payload in a handful of calls, not one per event.
+    assert len(posted) <= 7
+
+
+def test_server_errors_retry_until_max_attempts(monkeypatch):
+    events = make_events(1, attempts=2)
+    statements = []
+    worker = make_worker(monkeypatch, events, statements, max_attempts=4)
+    monkeypatch.setattr(outbox, "create_user_profiles", rejecting({"user0@example.com"}, status_code=503))
+
+    asyncio.run(worker.drain_once())
+    values = updates(statements)[events[0].id]
+    assert values["attempts"] == 3 and "status" not in values and "next_attempt_at" in values
+
+    events[0].attempts = 3
+    statements.clear()
+    asyncio.run(worker.drain_once())
+    assert updates(statements)[events[0].id]["status"] == "dead"
+
+
+def test_unreachable_service_reschedules_without_splitting(monkeypatch):
+    events = make_events(6)
+    statements = []
+    posted = []
+    worker = make_worker(monkeypatch, events, statements)
+
+    async def down(profiles):
+        posted.append(len(profiles))
+        raise httpx.ConnectError("connection refused")
+
+    monkeypatch.setattr(outbox, "create_user_profiles", down)
+
+    assert asyncio.run(worker.drain_once()) == 0
+    assert posted == [6]
+    assert all("status" not in values for values in updates(statements).values())
+    assert len(updates(statements)) == 6
@@ -0,0 +1,123 @@
+import asyncio
+
+import redis.asyncio as redis
+
+from utils.principal_cache import PrincipalCache, generation_key, principal_key
+
+
+class FakeRedis:
+    # Just the commands PrincipalCache uses; FILL_IF_CURRENT is mirrored in Python.
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise redis.ConnectionError("connection refused")
+
+    def register_script(self, script):
+        async def fill(keys, args):
+            self._check()
+            if self.data.get(keys[1], "0") == str(args[0]):
+                self.data[keys[0]] = args[2]
+                return 1
+            return 0
+
+        return fill
+
+    async def mget(self, keys):
+        self._check()
+        return [self.data.get(key) for key in keys]
+
+    async def publish(self, channel, message):
+        self._check()
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, r):
+        self._redis = r
+        self._ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self._ops.append(lambda data: data.__setitem__(key, str(int(data.get(key, "0")) + 1)))
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, key):
+        self._ops.append(lambda data: data.pop(key, None))
+
+    async def execute(self):
+        self._redis._check()
+        for op in self._ops:
+            op(self._redis.data)
+
+
+def make_cache(r):
+    return PrincipalCache(r, local_ttl=30, redis_ttl=300, max_entries=100)
+
+
+def test_load_racing_invalidation_is_not_cached():
+    r = FakeRedis()
+    cache = make_cache(r)
+    row = {"role": "admin"}
+
+    async def scenario():
+        read = asyncio.Event()
+        updated = asyncio.Event()
+
+        async def slow_loader():
+            principal = {"id": "u1", "role": row["role"], "is_active": True}
+            read.set()
+            await updated.wait()
+            return principal
+
+        stale = asyncio.create_task(cache.get("u1", slow_loader))
+        await read.wait()
+        # The admin demotes the user while the old row is still in flight.
+        row["role"] = "student"
+        await cache.invalidate("u1")
+        updated.set()
+        assert (await stale)["role"] == "admin"
+
+        async def loader():
+            return {"id": "u1", "role": row["role"], "is_active": True}
+
+        return await cache.get("u1", loader)
+
+    assert asyncio.run(scenario())["role"] == "student"
+    assert cache.stats()["stale_fills"] == 1
+    assert r.data[generation_key("u1")] == "1"
+
+
+def test_redis_errors_fall_back_to_loader():
+    r = FakeRedis()
+    r.down = True
+    cache = make_cache(r)
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        return {"id": "u1", "role": "student", "is_active": True}
+
+    async def scenario():
+        first = await cache.get("u1", loader)
+        await cache.invalidate("u1")
+        second = await cache.get("u1", loader)
+        return first, second
+
+    first, second = asyncio.run(scenario())
+    assert first == second
+    # Nothing is cached locally while invalidations cannot be broadcast.
+    assert len(calls) == 2
+    assert cache.stats()["errors"] == 3
+    assert principal_key("u1") not in r.data
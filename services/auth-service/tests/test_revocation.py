@@ -0,0 +1,95 @@
+import asyncio
+import time
+from datetime import timedelta
+from types import SimpleNamespace
+
+import redis.asyncio as redis
+from fastapi.security import HTTPAuthorizationCredentials
+
+from routers import auth
+from utils.jwt import create_token, decode_token
+from utils.revocation import RevocationFilter
+
+
+class DownRedis:
+    async def exists(self, *keys):
+        raise redis.ConnectionError("connection refused")
+
+
+class UpRedis:
+    def __init__(self, keys):
+        self.keys = set(keys)
+
+    async def exists(self, *keys):
+        return sum(key in self.keys for key in keys)
+
+
+def test_unsynced_check_uses_redis():
+    revocations = RevocationFilter(UpRedis({"revoked:a"}))
+    assert asyncio.run(revocations.is_revoked("a")) is True
+    assert asyncio.run(revocations.is_revoked("b")) is False
+    assert revocations.stats()["remote_checks"] == 2
+
+
+def test_redis_outage_fails_open_to_local_mirror(caplog):
+    revocations = RevocationFilter(DownRedis())
+    revocations._revoked["seen"] = time.time() + 60
+    revocations._revoked["expired"] = time.time() - 1
+
+    assert asyncio.run(revocations.is_revoked("seen")) is True
+    assert asyncio.run(revocations.is_revoked("expired")) is False
+    assert asyncio.run(revocations.is_revoked("unknown")) is False
+
+    stats = revocations.stats()
+    assert stats["fallback_checks"] == 3
+    assert stats["rejected"] == 1
+    # One warning per outage, not one per request.
+    assert len([record for record in caplog.records if "Redis unreachable" in record.message]) == 1
+
+
+class FlakyRedis:
+    def __init__(self):
+        self.down = True
+        self.keys: dict[str, str] = {}
+        self.published: list[str] = []
+
+    async def setex(self, key, ttl, value):
+        if self.down:
+            raise redis.ConnectionError("connection refused")
+        self.keys[key] = value
+
+    async def publish(self, channel, message):
+        if self.down:
+            raise redis.ConnectionError("connection refused")
+        self.published.append(message)
+
+
+def test_revoke_during_outage_applies_locally_and_publishes_later():
+    r = FlakyRedis()
+    revocations = RevocationFilter(r)
+    exp = time.time() + 60
+
+    asyncio.run(revocations.revoke("a", exp))
+    assert revocations._revoked_locally("a")
+    assert revocations.stats()["unpublished"] == 1
+    assert r.published == []
+
+    r.down = False
+    asyncio.run(revocations.revoke("b", exp))
+    assert set(r.keys) == {"revoked:a", "revoked:b"}
+    assert [message.split(":")[0] for message in r.published] == ["a", "b"]
+    assert revocations.stats()["unpublished"] == 0
+
+
+def test_logout_succeeds_while_redis_is_down(monkeypatch):
+    revocations = RevocationFilter(FlakyRedis())
+    monkeypatch.setattr(auth, "revocation_filter", revocations)
+    access = create_token({"sub": "u1", "type": "access"}, timedelta(minutes=5))
+    refresh = create_token({"sub": "u1", "type": "refresh"}, timedelta(days=1))
+    request = SimpleNamespace(cookies={"refresh_token": refresh})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=access)
+
+    assert asyncio.run(auth.logout(request, credentials, None)) == {"message": "Logged out"}
+    assert revocations._revoked_locally(decode_token(access)["jti"])
+    assert revocations._revoked_locally(decode_token(refresh)["jti"])
+    assert revocations.stats()["unpublished"] == 2
@@ -0,0 +1,150 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from routers import auth
+from schemas import LoginRequest
+from utils.hashing import HashingPoolSaturated
+from utils.throttle import LoginThrottle, Throttled
+
+
+class FakeRedis:
+    # Sorted sets as dicts member -> score; SLIDING_WINDOW_LUA mirrored in Python.
+    def __init__(self):
+        self.zsets: dict[str, dict[str, int]] = {}
+
+    def register_script(self, script):
+        async def sliding_window(keys, args):
+            now, window, member, *limits = args
+            retry, exhausted = 0, 0
+            for i, key in enumerate(keys, start=1):
+                entries = {m: t for m, t in self.zsets.get(key, {}).items() if t > now - window}
+                self.zsets[key] = entries
+                if len(entries) >= limits[i - 1]:
+                    wait = min(entries.values()) + window - now
+                    if wait > retry:
+                        retry, exhausted = wait, i
+            if retry > 0:
+                return [retry, exhausted]
+            for key in keys:
+                self.zsets[key][member] = now
+            return [0, 0]
+
+        return sliding_window
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, r):
+        self._redis = r
+        self._ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def delete(self, *keys):
+        self._ops.append(lambda zsets: [zsets.pop(key, None) for key in keys])
+
+    def zrem(self, key, member):
+        self._ops.append(lambda zsets: zsets.get(key, {}).pop(member, None))
+
+    async def execute(self):
+        for op in self._ops:
+            op(self._redis.zsets)
+
+
+def make_throttle():
+    return LoginThrottle(FakeRedis(), window_seconds=300, per_email_ip=3, per_email=5, per_ip=10)
+
+
+async def login(throttle, email, ip, ok):
+    attempt = await throttle.check("login", email, ip)
+    if ok:
+        await throttle.succeeded("login", email, ip, attempt)
+
+
+def test_successful_logins_do_not_use_up_the_budget():
+    throttle = make_throttle()
+
+    async def scenario():
+        # A whole lecture hall behind one NAT address.
+        for i in range(50):
+            await login(throttle, f"student{i}@example.com", "10.0.0.1", ok=True)
+
+    asyncio.run(scenario())
+    assert throttle.stats() == {"login_allowed": 50}
+
+
+def test_success_resets_the_account_counter():
+    throttle = make_throttle()
+
+    async def scenario():
+        for _ in range(2):
+            await login(throttle, "ada@example.com", "10.0.0.1", ok=False)
+        await login(throttle, "ada@example.com", "10.0.0.1", ok=True)
+        for _ in range(3):
+            await login(throttle, "ada@example.com", "10.0.0.1", ok=False)
+
+    asyncio.run(scenario())
+
+
+def test_guessing_from_one_address_does_not_lock_out_the_victim():
+    throttle = make_throttle()
+
+    async def scenario():
+        for _ in range(3):
+            await login(throttle, "victim@example.com", "203.0.113.9", ok=False)
+        with pytest.raises(Throttled):
+            await login(throttle, "victim@example.com", "203.0.113.9", ok=False)
+        await login(throttle, "victim@example.com", "10.0.0.1", ok=True)
+
+    asyncio.run(scenario())
+    assert throttle.stats()["login_rejected_email_ip"] == 1
+
+
+def test_distributed_guessing_hits_the_account_ceiling():
+    throttle = make_throttle()
+
+    async def scenario():
+        for i in range(5):
+            await login(throttle, "victim@example.com", f"203.0.113.{i}", ok=False)
+        with pytest.raises(Throttled):
+            await login(throttle, "victim@example.com", "203.0.113.99", ok=False)
+
+    asyncio.run(scenario())
+    assert throttle.stats()["login_rejected_email"] == 1
+
+
+class OneUserSession:
+    async def execute(self, stmt):
+        return SimpleNamespace(scalar_one_or_none=lambda: SimpleNamespace(password_hash="hash"))
+
+
+def test_saturated_hashing_pool_does_not_count_as_a_failure(monkeypatch):
+    throttle = make_throttle()
+
+    async def saturated(password, password_hash):
+        raise HashingPoolSaturated()
+
+    monkeypatch.setattr(auth, "login_throttle", throttle)
+    monkeypatch.setattr(auth.hashing_pool, "verify_and_update", saturated)
+    request = SimpleNamespace(headers={"x-real-ip": "10.0.0.1"}, client=None)
+    payload = LoginRequest(email="ada@example.com", password="secret123")
+
+    async def scenario():
+        for _ in range(5):
+            with pytest.raises(HashingPoolSaturated):
+                await auth.login(payload, request, response=None, db=OneUserSession())
+        # Well past per_email_ip=3, yet the next real attempt is still allowed.
+        await throttle.check("login", "ada@example.com", "10.0.0.1")
+
+    asyncio.run(scenario())
+    assert throttle.stats() == {"login_allowed": 6}
+    # Only that last attempt is on the windows.
+    assert [len(entries) for entries in throttle._redis.zsets.values()] == [1, 1, 1]
@@ -0,0 +1,101 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from passlib.context import CryptContext
+
+from config import settings
+
+# Pinning min/max to the configured rounds makes needs_update() flag every hash made
+# with different cost parameters, so it is upgraded on the next successful login.
+pwd_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    deprecated="auto",
+    pbkdf2_sha256__default_rounds=settings.pbkdf2_rounds,
+    pbkdf2_sha256__min_rounds=settings.pbkdf2_rounds,
+    pbkdf2_sha256__max_rounds=settings.pbkdf2_rounds,
+)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _hash_many(passwords: list[str]) -> list[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def _verify_and_update(password: str, password_hash: str) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(password, password_hash)
+
+
+class HashingPoolSaturated(Exception):
+    pass
+
+
+class HashingPool:
+    def __init__(self, workers: int, max_pending: int):
+        self._workers = workers or os.cpu_count() or 1
+        self._max_pending = max_pending
+        self._executor: ProcessPoolExecutor | None = None
+        self._pending = 0
+        self._latencies: deque[float] = deque(maxlen=1024)
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        self._executor = ProcessPoolExecutor(
+            max_workers=self._workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, fn, *args):
+        if self._pending >= self._max_pending:
+            self.rejected += 1
+            raise HashingPoolSaturated()
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self._pending -= 1
+            self.completed += 1
+            self._latencies.append(time.perf_counter() - started)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password)
+
+    async def hash_many(self, passwords: list[str]) -> list[str]:
+        # One job per worker rather than per password, so a bulk import only takes
+        # `workers` queue slots and leaves room for interactive logins.
+        size = max(1, -(-len(passwords) // self._workers))
+        chunks = [passwords[start : start + size] for start in range(0, len(passwords), size)]
+        results = await asyncio.gather(*(self._run(_hash_many, chunk) for chunk in chunks))
+        return [password_hash for chunk in results for password_hash in chunk]
+
+    async def verify_and_update(self, password: str, password_hash: str) -> tuple[bool, str | None]:
+        return await self._run(_verify_and_update, password, password_hash)
+
+    def stats(self) -> dict[str, float | int]:
+        latencies = sorted(self._latencies)
+        return {
+            "workers": self._workers,
+            "queue_depth": self._pending,
+            "max_pending": self._max_pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_ms_p50": round(latencies[len(latencies) // 2] * 1000, 2) if latencies else 0,
+            "latency_ms_p95": round(latencies[int(len(latencies) * 0.95)] * 1000, 2) if latencies else 0,
+            "latency_ms_max": round(latencies[-1] * 1000, 2) if latencies else 0,
+        }
+
+
+hashing_pool = HashingPool(settings.hash_pool_workers, settings.hash_pool_max_pending)
@@ -0,0 +1,158 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import httpx
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from database import AsyncSessionLocal
+from models import AuthUser, OutboxEvent
+from utils.user_sync import create_user_profiles, profile_payload
+
+PROFILE_CREATED = "user_profile.create"
+
+
+def enqueue_profile_sync(db: AsyncSession, user: AuthUser) -> None:
+    # Added to the caller's session so it commits atomically with the user row.
+    db.add(OutboxEvent(event_type=PROFILE_CREATED, payload=profile_payload(user)))
+
+
+# Delivery runs in three steps so no row lock is held across the network call:
+#   1. claim: lock due events with SKIP LOCKED, push next_attempt_at out by the lease and
+#      commit; other workers skip them until the lease runs out (or a crashed worker's does);
+#   2. deliver: post the batch; when user-service rejects it, bisect to isolate the bad
+#      payloads so the rest of the batch still goes through;
+#   3. settle: delete what was delivered, reschedule the rest with backoff, and mark events
+#      dead on a 4xx or after max_attempts.
+# user-service inserts idempotently, so a lease that expires mid-delivery only re-sends.
+class OutboxWorker:
+    def __init__(self, batch_size: int, poll_interval: float, max_backoff: int, max_attempts: int, lease: int):
+        self._batch_size = batch_size
+        self._poll_interval = poll_interval
+        self._max_backoff = max_backoff
+        self._max_attempts = max_attempts
+        self._lease = timedelta(seconds=lease)
+        self._wakeup = asyncio.Event()
+        self.delivered = 0
+        self.failed_attempts = 0
+        self.dead_lettered = 0
+
+    def notify(self) -> None:
+        self._wakeup.set()
+
+    async def _claim(self) -> list:
+        async with AsyncSessionLocal() as db:
+            now = datetime.utcnow()
+            result = await db.execute(
+                select(OutboxEvent.id, OutboxEvent.payload, OutboxEvent.attempts)
+                .where(
+                    OutboxEvent.event_type == PROFILE_CREATED,
+                    OutboxEvent.status == "pending",
+                    OutboxEvent.next_attempt_at <= now,
+                )
+                .order_by(OutboxEvent.next_attempt_at)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+            )
+            events = result.all()
+            if events:
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_([event.id for event in events]))
+                    .values(next_attempt_at=now + self._lease)
+                )
+                await db.commit()
+            return events
+
+    async def _deliver(self, events: list) -> tuple[list, dict]:
+        # Returns the delivered events and {event id: (error, permanent)} for the others.
+        delivered = []
+        failures = {}
+        unreachable = None
+
+        async def attempt(chunk: list) -> None:
+            nonlocal unreachable
+            if unreachable is not None:
+                failures.update({event.id: (unreachable, False) for event in chunk})
+                return
+            try:
+                await create_user_profiles([event.payload for event in chunk])
+            except httpx.HTTPStatusError as exc:
+                if len(chunk) == 1:
+                    failures[chunk[0].id] = (str(exc), exc.response.status_code < 500)
+                    return
+                middle = len(chunk) // 2
+                await attempt(chunk[:middle])
+                await attempt(chunk[middle:])
+                return
+            except Exception as exc:
+                # Down or timing out: splitting the batch would not help.
+                unreachable = str(exc) or type(exc).__name__
+                failures.update({event.id: (unreachable, False) for event in chunk})
+                return
+            delivered.extend(chunk)
+
+        await attempt(list(events))
+        return delivered, failures
+
+    async def _settle(self, events: list, delivered: list, failures: dict) -> int:
+        # Returns how many events were dead-lettered.
+        dead = 0
+        async with AsyncSessionLocal() as db:
+            if delivered:
+                await db.execute(delete(OutboxEvent).where(OutboxEvent.id.in_([event.id for event in delivered])))
+            now = datetime.utcnow()
+            for event in events:
+                if event.id not in failures:
+                    continue
+                error, permanent = failures[event.id]
+                attempts = event.attempts + 1
+                values = {"attempts": attempts, "last_error": error[:1000]}
+                if permanent or attempts >= self._max_attempts:
+                    values["status"] = "dead"
+                    dead += 1
+                else:
+                    values["next_attempt_at"] = now + timedelta(seconds=min(2**attempts, self._max_backoff))
+                await db.execute(update(OutboxEvent).where(OutboxEvent.id == event.id).values(**values))
+            await db.commit()
+        return dead
+
+    async def drain_once(self) -> int:
+        events = await self._claim()
+        if not events:
+            return 0
+        delivered, failures = await self._deliver(events)
+        self.dead_lettered += await self._settle(events, delivered, failures)
+        self.delivered += len(delivered)
+        if failures:
+            self.failed_attempts += 1
+        return len(delivered)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                drained = await self.drain_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                drained = 0
+            if drained == self._batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self._poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"delivered": self.delivered, "failed_attempts": self.failed_attempts, "dead_lettered": self.dead_lettered}
+
+
+outbox_worker = OutboxWorker(
+    settings.outbox_batch_size,
+    settings.outbox_poll_interval_seconds,
+    settings.outbox_max_backoff_seconds,
+    settings.outbox_max_attempts,
+    settings.outbox_lease_seconds,
+)
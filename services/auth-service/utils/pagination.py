@@ -0,0 +1,48 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: datetime, row_id: uuid.UUID) -> str:
+    raw = json.dumps([sort_value.isoformat(), str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(sort_value), uuid.UUID(row_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def paginate(
+    stmt: Select,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    cursor: str | None,
+    skip: int,
+    limit: int,
+) -> Select:
+    # Keyset mode when a cursor is given, legacy offset mode otherwise; both use the same
+    # stable (sort_column, id) ordering and fetch one extra row to detect a next page.
+    stmt = stmt.order_by(sort_column, id_column).limit(limit + 1)
+    if cursor:
+        return stmt.where(tuple_(sort_column, id_column) > tuple_(*decode_cursor(cursor)))
+    return stmt.offset(skip)
+
+
+def page_rows(rows, sort_column: InstrumentedAttribute, limit: int, response: Response) -> list:
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_column.key), last.id)
+    return rows
@@ -0,0 +1,169 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+import redis.asyncio as redis
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import AuthUser
+
+INVALIDATE_CHANNEL = "principal:invalidate"
+GENERATION_TTL = 86400
+
+# Fills the shared entry only if no invalidation happened since the loader started reading.
+FILL_IF_CURRENT = """
+if (redis.call('GET', KEYS[2]) or '0') == ARGV[1] then
+    redis.call('SETEX', KEYS[1], ARGV[2], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+def principal_key(user_id: str) -> str:
+    return f"principal:{user_id}"
+
+
+def generation_key(user_id: str) -> str:
+    return f"principal:gen:{user_id}"
+
+
+# Per-process LRU of {id, role, is_active} in front of a shared Redis copy, keyed by user id.
+# invalidate() bumps a per-user generation before deleting the shared entry; a load records the
+# generation before reading the row and stores its result only if the generation is unchanged,
+# so a read that raced an admin update cannot re-publish the old role. Without Redis every
+# request goes to the loader.
+class PrincipalCache:
+    def __init__(self, r: redis.Redis, local_ttl: int, redis_ttl: int, max_entries: int):
+        self._redis = r
+        self._local_ttl = local_ttl
+        self._redis_ttl = redis_ttl
+        self._max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_fills = 0
+        self.errors = 0
+        self._fill = r.register_script(FILL_IF_CURRENT)
+
+    def _get_local(self, user_id: str) -> dict[str, Any] | None:
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        expires_at, principal = entry
+        if expires_at < time.monotonic():
+            del self._entries[user_id]
+            return None
+        self._entries.move_to_end(user_id)
+        return principal
+
+    def _set_local(self, user_id: str, principal: dict[str, Any]) -> None:
+        self._entries[user_id] = (time.monotonic() + self._local_ttl, principal)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def evict_local(self, user_id: str) -> None:
+        self._entries.pop(user_id, None)
+
+    async def get(
+        self,
+        user_id: str,
+        loader: Callable[[], Awaitable[dict[str, Any] | None]],
+    ) -> dict[str, Any] | None:
+        principal = self._get_local(user_id)
+        if principal is not None:
+            self.local_hits += 1
+            return principal
+
+        try:
+            cached, generation = await self._redis.mget([principal_key(user_id), generation_key(user_id)])
+        except redis.RedisError:
+            self.errors += 1
+            return await loader()
+        if cached:
+            self.redis_hits += 1
+            principal = json.loads(cached)
+            self._set_local(user_id, principal)
+            return principal
+
+        self.misses += 1
+        principal = await loader()
+        if principal is not None:
+            try:
+                filled = await self._fill(
+                    keys=[principal_key(user_id), generation_key(user_id)],
+                    args=[generation or "0", self._redis_ttl, json.dumps(principal)],
+                )
+            except redis.RedisError:
+                self.errors += 1
+                return principal
+            if filled:
+                self._set_local(user_id, principal)
+            else:
+                self.stale_fills += 1
+        return principal
+
+    async def invalidate(self, user_id: str) -> None:
+        self.invalidations += 1
+        self.evict_local(user_id)
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.incr(generation_key(user_id))
+                pipe.expire(generation_key(user_id), GENERATION_TTL)
+                pipe.delete(principal_key(user_id))
+                await pipe.execute()
+            await self._redis.publish(INVALIDATE_CHANNEL, user_id)
+        except redis.RedisError:
+            # The other workers drop their local entries while their subscription is down.
+            self.errors += 1
+
+    async def listen(self) -> None:
+        # Evict entries invalidated by other workers/replicas.
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                await pubsub.subscribe(INVALIDATE_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        self.evict_local(message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                # Redis unavailable: drop local entries so we do not serve stale roles, then retry.
+                self._entries.clear()
+                await asyncio.sleep(2)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "stale_fills": self.stale_fills,
+            "errors": self.errors,
+        }
+
+
+async def load_principal(db: AsyncSession, user_id: str) -> dict[str, Any] | None:
+    result = await db.execute(select(AuthUser.role, AuthUser.is_active).where(AuthUser.id == user_id))
+    row = result.one_or_none()
+    if row is None:
+        return None
+    return {"id": user_id, "role": row.role.value, "is_active": row.is_active}
+
+
+redis_client = redis.from_url(settings.redis_url, decode_responses=True)
+principal_cache = PrincipalCache(
+    redis_client,
+    local_ttl=settings.principal_cache_local_ttl_seconds,
+    redis_ttl=settings.principal_cache_redis_ttl_seconds,
+    max_entries=settings.principal_cache_max_entries,
+)
@@ -0,0 +1,127 @@
+import math
+import time
+import uuid
+from collections import Counter
+
+import redis.asyncio as redis
+from fastapi import Request
+
+from config import settings
+
+# Sliding-window log over one sorted set per key. All keys are checked and, only if every
+# one is under its limit, the attempt is recorded in all of them - atomically, so
+# concurrent attempts cannot both slip under a limit. A successful attempt is taken back out
+# afterwards (LoginThrottle.succeeded), and one whose check never ran is withdrawn
+# (LoginThrottle.withdraw), so the windows effectively count failures only.
+# Returns {0, 0} when allowed, otherwise {retry_after_ms, index of the exhausted key}.
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local member = ARGV[3]
+local retry, exhausted = 0, 0
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[3 + i]) then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry then
+            retry, exhausted = wait, i
+        end
+    end
+end
+if retry > 0 then
+    return {retry, exhausted}
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, window)
+end
+return {0, 0}
+"""
+
+
+class Throttled(Exception):
+    def __init__(self, retry_after: int):
+        self.retry_after = retry_after
+
+
+def client_ip(request: Request) -> str:
+    # nginx overwrites X-Real-IP with the peer address, so it cannot be spoofed by clients.
+    return request.headers.get("x-real-ip") or (request.client.host if request.client else "unknown")
+
+
+# Limits, per window of failed attempts:
+#   email_ip - one account from one address: stops guessing, and only locks the guesser out;
+#   email    - one account from anywhere: a much higher ceiling against distributed guessing;
+#   ip       - one address across accounts: high, since a campus NAT shares one address.
+LIMIT_NAMES = ("email_ip", "email", "ip")
+
+
+class LoginThrottle:
+    def __init__(self, r: redis.Redis, window_seconds: int, per_email_ip: int, per_email: int, per_ip: int):
+        self._redis = r
+        self._script = r.register_script(SLIDING_WINDOW_LUA)
+        self._window_ms = window_seconds * 1000
+        self._limits = (per_email_ip, per_email, per_ip)
+        self.counters: Counter[str] = Counter()
+
+    def _keys(self, scope: str, email: str, ip: str) -> list[str]:
+        email = email.lower()
+        return [f"throttle:{scope}:email_ip:{email}:{ip}", f"throttle:{scope}:email:{email}", f"throttle:{scope}:ip:{ip}"]
+
+    async def check(self, scope: str, email: str, ip: str) -> str | None:
+        # Records the attempt and returns its id, to be handed to succeeded() if it works out.
+        now_ms = int(time.time() * 1000)
+        attempt = f"{now_ms}-{uuid.uuid4().hex}"
+        try:
+            retry_ms, exhausted = await self._script(
+                keys=self._keys(scope, email, ip),
+                args=[now_ms, self._window_ms, attempt, *self._limits],
+            )
+        except redis.RedisError:
+            # Fail open: an unavailable Redis must not lock everybody out.
+            self.counters[f"{scope}_errors"] += 1
+            return None
+        if retry_ms:
+            self.counters[f"{scope}_rejected_{LIMIT_NAMES[exhausted - 1]}"] += 1
+            raise Throttled(max(1, math.ceil(retry_ms / 1000)))
+        self.counters[f"{scope}_allowed"] += 1
+        return attempt
+
+    async def succeeded(self, scope: str, email: str, ip: str, attempt: str | None) -> None:
+        # A success clears the account's failures and takes this attempt off the address.
+        if attempt is None:
+            return
+        email_ip_key, email_key, ip_key = self._keys(scope, email, ip)
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                pipe.delete(email_ip_key, email_key)
+                pipe.zrem(ip_key, attempt)
+                await pipe.execute()
+        except redis.RedisError:
+            self.counters[f"{scope}_errors"] += 1
+
+    async def withdraw(self, scope: str, email: str, ip: str, attempt: str | None) -> None:
+        # The credentials were never checked (e.g. the hashing pool was saturated): the attempt
+        # comes off every window, so a load spike does not lock anybody out.
+        if attempt is None:
+            return
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for key in self._keys(scope, email, ip):
+                    pipe.zrem(key, attempt)
+                await pipe.execute()
+        except redis.RedisError:
+            self.counters[f"{scope}_errors"] += 1
+
+    def stats(self) -> dict[str, int]:
+        return dict(self.counters)
+
+
+login_throttle = LoginThrottle(
+    redis.from_url(settings.redis_url, decode_responses=True),
+    settings.login_throttle_window_seconds,
+    settings.login_throttle_per_email_ip,
+    settings.login_throttle_per_email,
+    settings.login_throttle_per_ip,
+)
@@ -0,0 +1,379 @@
+import asyncio
+import hashlib
+import hmac
+import os
+import re
+import tempfile
+import uuid
+import xml.etree.ElementTree as ET
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import datetime
+from urllib.parse import quote, urlsplit
+
+import httpx
+from sqlalchemy import BigInteger, DateTime, Integer, String, case, literal_column, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+
+from config import settings
+from database import Base
+
+# Content-addressed blob storage. Objects live under <namespace>/<aa>/<sha256><ext>, so a URL
+# always names the same bytes and can be cached as immutable. Each service keeps reference
+# counts for its own namespace in its own database; objects are only deleted by the sweeper,
+# after the count has stayed at zero for a grace period.
+# Identical copies of this module live in course-service, news-service and user-service.
+
+CHUNK_SIZE = 1024 * 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+BLOB_URL = re.compile(r"/[a-z0-9_-]+/[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(\.[A-Za-z0-9]{1,16})?$")
+EMPTY_SHA256 = hashlib.sha256(b"").hexdigest()
+S3_XMLNS = "{http://s3.amazonaws.com/doc/2006-03-01/}"
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    digest: Mapped[str] = mapped_column(String(64), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    content_type: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    refcount: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Set when refcount drops to zero, cleared when the content is referenced again.
+    released_at: Mapped[datetime | None] = mapped_column(DateTime, nullable=True, index=True)
+
+
+@dataclass
+class StagedFile:
+    path: str
+    size: int
+    digest: str
+
+
+def _write_hashed(out, data: bytes, hasher) -> None:
+    out.write(data)
+    hasher.update(data)
+
+
+def _link(source: str, target: str) -> None:
+    # An existing target has the same name, so the same bytes.
+    try:
+        os.link(source, target)
+    except FileExistsError:
+        pass
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+@dataclass
+class ScannedFile:
+    # `key` is the object key for backends, or the full path for plain directory scans.
+    key: str
+    size: int
+    mtime: float
+
+
+def _next_entries(iterator, limit: int) -> list[tuple[str, bool, int, float]]:
+    entries = []
+    for entry in iterator:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                entries.append((entry.path, True, 0, 0.0))
+            elif entry.is_file(follow_symlinks=False):
+                info = entry.stat(follow_symlinks=False)
+                entries.append((entry.path, False, info.st_size, info.st_mtime))
+        except FileNotFoundError:
+            continue
+        if len(entries) >= limit:
+            break
+    return entries
+
+
+async def scan_files(directory: str, batch: int, recursive: bool = True) -> AsyncIterator[list[ScannedFile]]:
+    # Streams a directory tree in batches: scandir iterators are advanced `batch` entries at a
+    # time in a worker thread, so neither the listing nor the event loop grows with the tree.
+    pending = [directory]
+    while pending:
+        try:
+            iterator = await asyncio.to_thread(os.scandir, pending.pop())
+        except FileNotFoundError:
+            continue
+        try:
+            while entries := await asyncio.to_thread(_next_entries, iterator, batch):
+                files = []
+                for path, is_dir, size, mtime in entries:
+                    if not is_dir:
+                        files.append(ScannedFile(path, size, mtime))
+                    elif recursive:
+                        pending.append(path)
+                if files:
+                    yield files
+        finally:
+            await asyncio.to_thread(iterator.close)
+
+
+class LocalBackend:
+    def __init__(self, root: str, public_url: str):
+        self.root = root
+        self.staging_dir = os.path.join(root, ".staging")
+        self._public_url = public_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, key)
+
+    async def exists(self, key: str) -> bool:
+        return await asyncio.to_thread(os.path.exists, self._path(key))
+
+    async def put(self, key: str, staged: StagedFile, content_type: str | None) -> None:
+        # Same filesystem as the staging area, so this is an atomic hard link, not a copy; the
+        # staged name stays until store() is done with it.
+        target = self._path(key)
+        await asyncio.to_thread(os.makedirs, os.path.dirname(target), exist_ok=True)
+        await asyncio.to_thread(_link, staged.path, target)
+
+    async def delete(self, key: str) -> None:
+        await asyncio.to_thread(_remove, self._path(key))
+
+    async def scan(self, prefix: str, batch: int) -> AsyncIterator[list[ScannedFile]]:
+        async for files in scan_files(self._path(prefix), batch):
+            yield [ScannedFile(os.path.relpath(file.key, self.root), file.size, file.mtime) for file in files]
+
+    def url(self, key: str) -> str:
+        return f"{self._public_url}/{key}"
+
+
+def canonical_request(method: str, path: str, query: str, headers: dict[str, str], payload_hash: str) -> str:
+    # SigV4 canonical request; `path` and `query` are already URI-encoded and sorted.
+    return "\n".join(
+        [
+            method,
+            path,
+            query,
+            "".join(f"{name}:{headers[name]}\n" for name in sorted(headers)),
+            ";".join(sorted(headers)),
+            payload_hash,
+        ]
+    )
+
+
+# Minimal S3 client (path-style PUT/HEAD/DELETE and ListObjectsV2 signed with SigV4), enough for AWS S3 and for
+# MinIO as a local stand-in. The blob digest doubles as x-amz-content-sha256, so uploads are
+# streamed from disk without hashing them a second time.
+class S3Backend:
+    def __init__(self, endpoint_url: str, bucket: str, access_key: str, secret_key: str, region: str, public_url: str):
+        self._endpoint = endpoint_url.rstrip("/")
+        self._host = urlsplit(self._endpoint).netloc
+        self._bucket = bucket
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._region = region
+        self._public_url = public_url.rstrip("/")
+        self._client = httpx.AsyncClient(timeout=httpx.Timeout(30.0, write=300.0))
+        self.staging_dir = tempfile.gettempdir()
+
+    def _signed_headers(self, method: str, path: str, payload_hash: str, query: str = "", now: datetime | None = None) -> dict[str, str]:
+        now = now or datetime.utcnow()
+        amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{amz_date[:8]}/{self._region}/s3/aws4_request"
+        headers = {"host": self._host, "x-amz-content-sha256": payload_hash, "x-amz-date": amz_date}
+        signed = ";".join(sorted(headers))
+        canonical = canonical_request(method, path, query, headers, payload_hash)
+        to_sign = "\n".join(["AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical.encode()).hexdigest()])
+        signing_key = f"AWS4{self._secret_key}".encode()
+        for part in (amz_date[:8], self._region, "s3", "aws4_request"):
+            signing_key = hmac.new(signing_key, part.encode(), hashlib.sha256).digest()
+        signature = hmac.new(signing_key, to_sign.encode(), hashlib.sha256).hexdigest()
+        headers["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self._access_key}/{scope}, SignedHeaders={signed}, Signature={signature}"
+        )
+        del headers["host"]
+        return headers
+
+    def _object_path(self, key: str) -> str:
+        return "/" + quote(f"{self._bucket}/{key}", safe="/-_.~")
+
+    async def exists(self, key: str) -> bool:
+        path = self._object_path(key)
+        response = await self._client.head(self._endpoint + path, headers=self._signed_headers("HEAD", path, EMPTY_SHA256))
+        if response.status_code == 404:
+            return False
+        response.raise_for_status()
+        return True
+
+    async def put(self, key: str, staged: StagedFile, content_type: str | None) -> None:
+        async def body():
+            src = await asyncio.to_thread(open, staged.path, "rb")
+            try:
+                while chunk := await asyncio.to_thread(src.read, CHUNK_SIZE):
+                    yield chunk
+            finally:
+                await asyncio.to_thread(src.close)
+
+        path = self._object_path(key)
+        headers = self._signed_headers("PUT", path, staged.digest)
+        headers.update({"content-length": str(staged.size), "cache-control": IMMUTABLE})
+        if content_type:
+            headers["content-type"] = content_type
+        response = await self._client.put(self._endpoint + path, headers=headers, content=body())
+        response.raise_for_status()
+
+    async def delete(self, key: str) -> None:
+        path = self._object_path(key)
+        response = await self._client.delete(self._endpoint + path, headers=self._signed_headers("DELETE", path, EMPTY_SHA256))
+        if response.status_code != 404:
+            response.raise_for_status()
+
+    async def scan(self, prefix: str, batch: int) -> AsyncIterator[list[ScannedFile]]:
+        path = "/" + quote(self._bucket, safe="-_.~")
+        params = {"list-type": "2", "max-keys": str(min(batch, 1000)), "prefix": f"{prefix}/"}
+        while True:
+            query = "&".join(f"{quote(name, safe='-_.~')}={quote(value, safe='-_.~')}" for name, value in sorted(params.items()))
+            response = await self._client.get(f"{self._endpoint}{path}?{query}", headers=self._signed_headers("GET", path, EMPTY_SHA256, query))
+            response.raise_for_status()
+            root = ET.fromstring(response.content)
+            files = [
+                ScannedFile(
+                    item.findtext(f"{S3_XMLNS}Key"),
+                    int(item.findtext(f"{S3_XMLNS}Size")),
+                    datetime.fromisoformat(item.findtext(f"{S3_XMLNS}LastModified").replace("Z", "+00:00")).timestamp(),
+                )
+                for item in root.iter(f"{S3_XMLNS}Contents")
+            ]
+            if files:
+                yield files
+            token = root.findtext(f"{S3_XMLNS}NextContinuationToken")
+            if root.findtext(f"{S3_XMLNS}IsTruncated") != "true" or not token:
+                return
+            params["continuation-token"] = token
+
+    def url(self, key: str) -> str:
+        return f"{self._public_url}/{key}"
+
+
+class BlobStore:
+    def __init__(self, backend: LocalBackend | S3Backend, namespace: str):
+        self.backend = backend
+        self.namespace = namespace
+        self.stored = 0
+        self.deduplicated = 0
+        self.bytes_saved = 0
+
+    async def stage(self, read) -> StagedFile:
+        # Copies an UploadFile-style reader to a staging file chunk by chunk, hashing as it
+        # goes; all file I/O runs in worker threads.
+        await asyncio.to_thread(os.makedirs, self.backend.staging_dir, exist_ok=True)
+        path = os.path.join(self.backend.staging_dir, uuid.uuid4().hex)
+        hasher = hashlib.sha256()
+        size = 0
+        out = await asyncio.to_thread(open, path, "wb")
+        try:
+            while chunk := await read(CHUNK_SIZE):
+                await asyncio.to_thread(_write_hashed, out, chunk, hasher)
+                size += len(chunk)
+        except BaseException:
+            await asyncio.to_thread(out.close)
+            await asyncio.to_thread(_remove, path)
+            raise
+        await asyncio.to_thread(out.close)
+        return StagedFile(path=path, size=size, digest=hasher.hexdigest())
+
+    async def store(self, db: AsyncSession, staged: StagedFile, ext: str = "", content_type: str | None = None) -> Blob:
+        # The object is written before any row lock is taken, so a slow backend only holds up
+        # this request. The reference is then taken in the caller's transaction: the row lock
+        # orders it against the sweeper, which deletes an object only while holding its row at
+        # refcount zero. If the transaction later rolls back, the object is left unreferenced
+        # for the sweeper.
+        ext = ext.lower() if re.fullmatch(r"\.[A-Za-z0-9]{1,16}", ext or "") else ""
+        key = f"{self.namespace}/{staged.digest[:2]}/{staged.digest}{ext}"
+        try:
+            existing = (await db.execute(select(Blob.key).where(Blob.digest == staged.digest))).scalar_one_or_none()
+            if existing is not None and await self.backend.exists(existing):
+                uploaded = None
+            else:
+                uploaded = existing or key
+                await self.backend.put(uploaded, staged, content_type)
+            result = await db.execute(
+                insert(Blob)
+                .values(
+                    digest=staged.digest,
+                    key=key,
+                    size=staged.size,
+                    content_type=content_type,
+                    refcount=1,
+                    created_at=datetime.utcnow(),
+                )
+                .on_conflict_do_update(index_elements=[Blob.digest], set_={"refcount": Blob.refcount + 1, "released_at": None})
+                .returning(Blob, literal_column("xmax = 0").label("inserted"))
+            )
+            blob, inserted = result.one()
+            if existing is not None and inserted:
+                # The row was swept after it was read, and its object with it.
+                await self.backend.put(blob.key, staged, content_type)
+                uploaded = blob.key
+            elif uploaded is not None and uploaded != blob.key:
+                # A concurrent store() of the same content won the insert under another name.
+                await self.backend.delete(uploaded)
+                uploaded = None
+        finally:
+            await asyncio.to_thread(_remove, staged.path)
+        if uploaded is None:
+            self.deduplicated += 1
+            self.bytes_saved += staged.size
+        else:
+            self.stored += 1
+        return blob
+
+    async def release(self, db: AsyncSession, url: str | None) -> None:
+        # Drops one reference to the blob behind `url`; files stored before the blob store
+        # (random names, no digest in the URL) are left alone.
+        digest = digest_from_url(url)
+        if digest is None:
+            return
+        await db.execute(
+            update(Blob)
+            .where(Blob.digest == digest, Blob.refcount > 0)
+            .values(
+                refcount=Blob.refcount - 1,
+                released_at=case((Blob.refcount <= 1, datetime.utcnow()), else_=Blob.released_at),
+            )
+        )
+
+    def url(self, blob: Blob) -> str:
+        return self.backend.url(blob.key)
+
+    def stats(self) -> dict[str, int | str]:
+        return {
+            "backend": type(self.backend).__name__,
+            "stored": self.stored,
+            "deduplicated": self.deduplicated,
+            "bytes_saved": self.bytes_saved,
+        }
+
+
+def digest_from_url(url: str | None) -> str | None:
+    match = BLOB_URL.search(url or "")
+    return match.group("digest") if match else None
+
+
+def make_backend() -> LocalBackend | S3Backend:
+    if settings.blob_backend == "s3":
+        return S3Backend(
+            settings.s3_endpoint_url,
+            settings.s3_bucket,
+            settings.s3_access_key,
+            settings.s3_secret_key,
+            settings.s3_region,
+            settings.blob_public_url,
+        )
+    return LocalBackend(settings.upload_dir, settings.blob_public_url)
+
+
+blob_store = BlobStore(make_backend(), settings.blob_namespace)
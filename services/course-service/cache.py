@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+import redis.asyncio as redis
+
+from config import settings
+
+# Read-through cache for catalog reads, shared by all replicas through Redis.
+# Keys embed the current version of every scope they depend on ("courses", "course:<id>",
+# "materials:<course_id>"); a mutation bumps the versions after committing, so the next read
+# builds a new key and old entries simply age out. Entries stay servable for stale_seconds
+# past their freshness, refreshed in the background meanwhile; concurrent misses for a key
+# share one load per process, and replicas coordinate through a short Redis lock.
+
+VERSION_PREFIX = "cache:version:"
+POLL_INTERVAL = 0.05
+
+
+def cache_key(name: str, **params: Any) -> str:
+    digest = hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+    return f"{name}:{digest}"
+
+
+class ReadCache:
+    def __init__(self, r: redis.Redis, fresh_seconds: float, stale_seconds: float, lock_seconds: float):
+        self._redis = r
+        self._fresh = fresh_seconds
+        self._stale = stale_seconds
+        self._lock = lock_seconds
+        self._inflight: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.loads = 0
+        self.invalidations = 0
+        self.errors = 0
+
+    async def get(self, key: str, scopes: tuple[str, ...], load: Callable[[], Awaitable[Any]]) -> Any:
+        # `load` must open its own session and return JSON-serialisable data: it may outlive
+        # the request that triggered it.
+        try:
+            versions = await self._redis.mget([VERSION_PREFIX + scope for scope in scopes])
+            versioned = f"cache:{key}@{'.'.join(version or '0' for version in versions)}"
+            raw = await self._redis.get(versioned)
+        except redis.RedisError:
+            self.errors += 1
+            return await load()
+        if raw is not None:
+            entry = json.loads(raw)
+            if entry["fresh_until"] > time.time():
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                self._start(versioned, load, wait_for_peer=False)
+            return entry["data"]
+        self.misses += 1
+        return await asyncio.shield(self._start(versioned, load, wait_for_peer=True))
+
+    async def invalidate(self, *scopes: str) -> None:
+        try:
+            async with self._redis.pipeline(transaction=False) as pipe:
+                for scope in scopes:
+                    pipe.incr(VERSION_PREFIX + scope)
+                await pipe.execute()
+            self.invalidations += 1
+        except redis.RedisError:
+            # Entries then live out their TTL; bounded by fresh + stale seconds.
+            self.errors += 1
+
+    def _start(self, versioned: str, load, wait_for_peer: bool) -> asyncio.Task:
+        task = self._inflight.get(versioned)
+        if task is not None:
+            self.coalesced += 1
+            return task
+        task = asyncio.create_task(self._fill(versioned, load, wait_for_peer))
+        self._inflight[versioned] = task
+        task.add_done_callback(lambda done: self._finish(versioned, done))
+        return task
+
+    def _finish(self, versioned: str, task: asyncio.Task) -> None:
+        self._inflight.pop(versioned, None)
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    async def _fill(self, versioned: str, load, wait_for_peer: bool) -> Any:
+        lock_key = f"{versioned}:lock"
+        try:
+            locked = await self._redis.set(lock_key, "1", nx=True, ex=max(int(self._lock), 1))
+        except redis.RedisError:
+            self.errors += 1
+            locked = True
+        if not locked:
+            if not wait_for_peer:
+                # Another replica is already refreshing this entry.
+                return None
+            deadline = time.monotonic() + self._lock
+            while time.monotonic() < deadline:
+                await asyncio.sleep(POLL_INTERVAL)
+                try:
+                    raw = await self._redis.get(versioned)
+                except redis.RedisError:
+                    break
+                if raw is not None:
+                    return json.loads(raw)["data"]
+        self.loads += 1
+        try:
+            data = await load()
+            entry = json.dumps({"fresh_until": time.time() + self._fresh, "data": data})
+            try:
+                await self._redis.set(versioned, entry, ex=max(int(self._fresh + self._stale), 1))
+            except redis.RedisError:
+                self.errors += 1
+            return data
+        finally:
+            if locked:
+                try:
+                    await self._redis.delete(lock_key)
+                except redis.RedisError:
+                    pass
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "loads": self.loads,
+            "invalidations": self.invalidations,
+            "inflight": len(self._inflight),
+            "errors": self.errors,
+        }
+
+
+read_cache = ReadCache(
+    redis.from_url(settings.redis_url, decode_responses=True),
+    settings.course_cache_fresh_seconds,
+    settings.course_cache_stale_seconds,
+    settings.course_cache_lock_seconds,
+)
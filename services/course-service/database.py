@@ -1,5 +1,7 @@
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.schema import CreateColumn
 
 from config import settings
 
@@ -11,3 +13,24 @@ Base = declarative_base()
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def sync_columns(conn) -> set[str]:
+    # create_all() only creates missing tables; add columns declared later. They must be
+    # nullable, generated or carry a server_default. Returns the added columns as "table.column".
+    inspector = inspect(conn)
+    added = set()
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                spec = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {spec}"))
+                added.add(f"{table.name}.{column.name}")
+    return added
+
+
+def sync_indexes(conn) -> None:
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
@@ -0,0 +1,211 @@
+import csv
+import io
+import re
+import uuid
+import zipfile
+from collections.abc import AsyncIterator
+from xml.sax.saxutils import escape
+
+import httpx
+from sqlalchemy import Select
+
+from config import settings
+from database import AsyncSessionLocal
+
+# Enrollment exports, streamed: rows come off a server-side cursor EXPORT_BATCH at a time, each
+# batch is enriched with one user-service lookup and encoded straight into the response, so
+# memory stays flat whatever the roster size.
+
+EXPORT_BATCH = 500  # also the most ids user-service accepts per /users/batch call
+EXPORT_COLUMNS = (
+    "course_code",
+    "course_title",
+    "semester",
+    "student_id",
+    "student_name",
+    "student_email",
+    "student_number",
+    "status",
+    "enrolled_at",
+    "waitlist_position",
+)
+USER_FIELDS = ["full_name", "email", "student_id"]
+# Spreadsheet apps evaluate text starting with these as a formula; names and emails come from
+# user-editable profiles, so such values are written as literal text.
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+
+def is_formula_like(value) -> bool:
+    return isinstance(value, str) and value.startswith(FORMULA_PREFIXES)
+
+
+async def lookup_students(client: httpx.AsyncClient, student_ids: list[uuid.UUID]) -> dict[str, dict]:
+    # The status code is already sent once rows stream, so a failed lookup leaves the names
+    # empty for that batch instead of aborting the file.
+    try:
+        response = await client.post("/users/batch", json={"ids": [str(student_id) for student_id in student_ids], "fields": USER_FIELDS})
+        response.raise_for_status()
+    except httpx.HTTPError:
+        return {}
+    return {user_id: profile for user_id, profile in response.json().items() if profile}
+
+
+class CsvEncoder:
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self):
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode()
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def start(self, columns) -> bytes:
+        # The BOM makes Excel open the file as UTF-8.
+        self._buffer.write("\ufeff")
+        self._writer.writerow(columns)
+        return self._drain()
+
+    def rows(self, rows) -> bytes:
+        # A leading apostrophe makes Excel show the cell as text instead of evaluating it.
+        self._writer.writerows([f"'{value}" if is_formula_like(value) else value for value in row] for row in rows)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+# Smallest valid SpreadsheetML package: one sheet with inline strings, so no shared-string table
+# has to be built (and held) before the sheet can be written.
+XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Enrollments" sheetId="1" r:id="rId1"/></sheets>'
+        "</workbook>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+SHEET_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_TAIL = "</sheetData></worksheet>"
+XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class _Sink:
+    # Write-only target for ZipFile; zipfile falls back to data descriptors when it cannot seek.
+    def __init__(self):
+        self._buffer = bytearray()
+
+    def write(self, data) -> int:
+        self._buffer += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        return data
+
+
+def xlsx_cell(value) -> str:
+    # Strings are always inline strings, never <f> formulas, so formula-like text stays text.
+    if value is None:
+        return "<c/>"
+    if isinstance(value, int) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = XML_ILLEGAL.sub("", str(value))
+    return f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>'
+
+
+class XlsxEncoder:
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+
+    def __init__(self):
+        self._sink = _Sink()
+        self._zip = zipfile.ZipFile(self._sink, "w", zipfile.ZIP_DEFLATED)
+        for name, content in XLSX_PARTS.items():
+            self._zip.writestr(name, content)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(SHEET_HEAD.encode())
+
+    def _write_rows(self, rows) -> None:
+        self._sheet.write("".join(f"<row>{''.join(xlsx_cell(value) for value in row)}</row>" for row in rows).encode())
+
+    def start(self, columns) -> bytes:
+        self._write_rows([columns])
+        return self._sink.drain()
+
+    def rows(self, rows) -> bytes:
+        self._write_rows(rows)
+        return self._sink.drain()
+
+    def finish(self) -> bytes:
+        self._sheet.write(SHEET_TAIL.encode())
+        self._sheet.close()
+        self._zip.close()
+        return self._sink.drain()
+
+
+ENCODERS = {"csv": CsvEncoder, "xlsx": XlsxEncoder}
+
+
+async def stream_enrollments(stmt: Select, encoder: CsvEncoder | XlsxEncoder, token: str) -> AsyncIterator[bytes]:
+    # `stmt` selects Course.code, Course.title, Course.semester and the Enrollment columns
+    # named in EXPORT_COLUMNS, already filtered and ordered. The student lookups carry the
+    # caller's bearer token: user-service only answers authenticated batch requests.
+    yield encoder.start(EXPORT_COLUMNS)
+    headers = {"Authorization": f"Bearer {token}"}
+    async with AsyncSessionLocal() as db, httpx.AsyncClient(base_url=settings.user_service_url, headers=headers, timeout=30) as client:
+        result = await db.stream(stmt.execution_options(yield_per=EXPORT_BATCH))
+        async for rows in result.partitions():
+            students = await lookup_students(client, list({row.student_id for row in rows}))
+            encoded = []
+            for row in rows:
+                student = students.get(str(row.student_id), {})
+                encoded.append(
+                    (
+                        row.code,
+                        row.title,
+                        row.semester,
+                        str(row.student_id),
+                        student.get("full_name"),
+                        student.get("email"),
+                        student.get("student_id"),
+                        row.status,
+                        row.enrolled_at.isoformat() if row.enrolled_at else None,
+                        row.waitlist_position,
+                    )
+                )
+            yield encoder.rows(encoded)
+    yield encoder.finish()
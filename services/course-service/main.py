@@ -3,12 +3,47 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
-from database import Base, engine
+from blobstore import blob_store
+from cache import read_cache
+from database import Base, engine, sync_columns, sync_indexes
+from pagination import NEXT_CURSOR_HEADER
+from revocation import revocation_filter
 from routers.courses import router as courses_router
 from routers.enrollment import router as enrollment_router
+from routers.exports import router as exports_router
 from routers.materials import router as materials_router
+from stats import course_stats_refresher, create_course_stats_view
+from sweeper import upload_sweeper
+from token_verifier import token_verifier
+from uploads import upload_hashes
+from waitlist import waitlist_events
+
+# Run once, when courses.enrolled_count is first added to an existing database: collapse
+# duplicate active enrollments (possible before the unique index existed) and seed the counter.
+ENROLLED_COUNT_BACKFILL = (
+    """
+    UPDATE enrollments SET status = 'dropped'
+    WHERE id IN (
+        SELECT id FROM (
+            SELECT id, row_number() OVER (PARTITION BY course_id, student_id ORDER BY enrolled_at, id) AS n
+            FROM enrollments WHERE status = 'active'
+        ) ranked
+        WHERE n > 1
+    )
+    """,
+    """
+    UPDATE courses SET enrolled_count = (
+        SELECT count(*) FROM enrollments WHERE enrollments.course_id = courses.id AND enrollments.status = 'active'
+    )
+    """,
+)
+
+# Replaced by uq_enrollments_current_course_student (which also covers the waitlist) and by
+# ix_materials_course_uploaded_id (which adds the pagination tiebreaker).
+SUPERSEDED_INDEXES = ("uq_enrollments_active_course_student", "ix_materials_course_uploaded")
 
 
 @asynccontextmanager
@@ -17,12 +52,28 @@ async def lifespan(app: FastAPI):
         try:
             async with engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                added = await conn.run_sync(sync_columns)
+                if "courses.enrolled_count" in added:
+                    for statement in ENROLLED_COUNT_BACKFILL:
+                        await conn.execute(text(statement))
+                for index in SUPERSEDED_INDEXES:
+                    await conn.execute(text(f"DROP INDEX IF EXISTS {index}"))
+                await conn.run_sync(sync_indexes)
+                await create_course_stats_view(conn)
             break
         except OperationalError:
             await asyncio.sleep(2)
     else:
         raise RuntimeError("Database is not reachable for course-service")
+    listeners = [
+        asyncio.create_task(revocation_filter.listen()),
+        asyncio.create_task(waitlist_events.listen()),
+        asyncio.create_task(course_stats_refresher.run()),
+        asyncio.create_task(upload_sweeper.run()),
+    ]
     yield
+    for listener in listeners:
+        listener.cancel()
 
 
 app = FastAPI(title="course-service", lifespan=lifespan)
@@ -32,13 +83,30 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin callers (the dev server) can only read listed response headers.
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(courses_router)
 app.include_router(enrollment_router)
+app.include_router(exports_router)
 app.include_router(materials_router)
 
 
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "course-service"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "token_verifier": token_verifier.stats(),
+        "revocations": revocation_filter.stats(),
+        "waitlist_events": waitlist_events.stats(),
+        "course_stats": course_stats_refresher.stats(),
+        "read_cache": read_cache.stats(),
+        "uploads": upload_hashes.stats(),
+        "blobs": blob_store.stats(),
+        "upload_gc": upload_sweeper.stats(),
+    }
@@ -1,15 +1,29 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import BigInteger, Boolean, Computed, DateTime, ForeignKey, Index, Integer, String, Text, text
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from database import Base
 
 
+# Code and title outrank the description; to_tsvector with an explicit config is immutable,
+# which a generated column requires.
+COURSE_SEARCH_DOCUMENT = (
+    "setweight(to_tsvector('english', coalesce(code, '') || ' ' || coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'B')"
+)
+
+
 class Course(Base):
     __tablename__ = "courses"
+    __table_args__ = (
+        Index("ix_courses_search", "search_vector", postgresql_using="gin"),
+        # Keyset pagination order for list_courses; the catalog mostly lists active courses.
+        Index("ix_courses_created", "created_at", "id"),
+        Index("ix_courses_active_created", "created_at", "id", postgresql_where=text("is_active")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -20,22 +34,54 @@ class Course(Base):
     department: Mapped[str] = mapped_column(String(100), nullable=False)
     semester: Mapped[str] = mapped_column(String(50), nullable=False)
     max_students: Mapped[int] = mapped_column(Integer, nullable=False)
+    # Active enrollments, maintained in the enroll/drop transactions.
+    enrolled_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
+    # Last waitlist ticket handed out; tickets order the queue and are never reused.
+    waitlist_seq: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0")
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    # Maintained by Postgres; deferred so ordinary course reads never load it.
+    search_vector: Mapped[str] = mapped_column(TSVECTOR, Computed(COURSE_SEARCH_DOCUMENT, persisted=True), deferred=True)
+
+
+# A student holds at most one seat or waitlist place per course.
+CURRENT_ENROLLMENT = text("status IN ('active', 'waitlisted')")
 
 
 class Enrollment(Base):
     __tablename__ = "enrollments"
+    __table_args__ = (
+        Index(
+            "uq_enrollments_current_course_student",
+            "course_id",
+            "student_id",
+            unique=True,
+            postgresql_where=CURRENT_ENROLLMENT,
+        ),
+        Index(
+            "ix_enrollments_waitlist",
+            "course_id",
+            "waitlist_position",
+            postgresql_where=text("status = 'waitlisted'"),
+        ),
+        Index("ix_enrollments_student_status", "student_id", "status"),
+        # Keyset pagination order for roster and "my courses" lists of active enrollments.
+        Index("ix_enrollments_course_active_enrolled", "course_id", "enrolled_at", "id", postgresql_where=text("status = 'active'")),
+        Index("ix_enrollments_student_active_enrolled", "student_id", "enrolled_at", "id", postgresql_where=text("status = 'active'")),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     course_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("courses.id"), nullable=False)
     student_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     enrolled_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
     status: Mapped[str] = mapped_column(String(32), default="active")
+    waitlist_position: Mapped[int | None] = mapped_column(Integer, nullable=True)
 
 
 class Material(Base):
     __tablename__ = "materials"
+    # Serves keyset pagination on (uploaded_at, id) and the latest-materials window per course.
+    __table_args__ = (Index("ix_materials_course_uploaded_id", "course_id", "uploaded_at", "id"),)
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     course_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("courses.id"), nullable=False)
@@ -45,3 +91,24 @@ class Material(Base):
     file_type: Mapped[str] = mapped_column(String(30), nullable=False)
     uploaded_by: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
     uploaded_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+
+
+# An in-progress resumable upload; the bytes live in <upload_dir>/.partial/<id hex> until
+# the upload is completed into a Material.
+class MaterialUpload(Base):
+    __tablename__ = "material_uploads"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    course_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("courses.id"), nullable=False)
+    uploaded_by: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=False)
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+    description: Mapped[str | None] = mapped_column(Text, nullable=True)
+    file_type: Mapped[str] = mapped_column(String(30), nullable=False)
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    size: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    received_bytes: Mapped[int] = mapped_column(BigInteger, nullable=False, default=0)
+    expected_sha256: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
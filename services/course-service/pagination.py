@@ -0,0 +1,54 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException, Response
+from sqlalchemy import Select, tuple_
+from sqlalchemy.orm import InstrumentedAttribute
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+# Sort values are timestamps, or integers for the waitlist queue position.
+def encode_cursor(sort_value: datetime | int, row_id: uuid.UUID) -> str:
+    value = sort_value.isoformat() if isinstance(sort_value, datetime) else sort_value
+    raw = json.dumps([value, str(row_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime | int, uuid.UUID]:
+    try:
+        sort_value, row_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        if isinstance(sort_value, str):
+            sort_value = datetime.fromisoformat(sort_value)
+        elif not isinstance(sort_value, int):
+            raise TypeError("cursor sort value")
+        return sort_value, uuid.UUID(row_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
+def paginate(
+    stmt: Select,
+    sort_column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    cursor: str | None,
+    skip: int,
+    limit: int,
+) -> Select:
+    # Keyset mode when a cursor is given, legacy offset mode otherwise; both use the same
+    # stable (sort_column, id) ordering and fetch one extra row to detect a next page.
+    stmt = stmt.order_by(sort_column, id_column).limit(limit + 1)
+    if cursor:
+        return stmt.where(tuple_(sort_column, id_column) > tuple_(*decode_cursor(cursor)))
+    return stmt.offset(skip)
+
+
+def page_rows(rows, sort_column: InstrumentedAttribute, limit: int, response: Response) -> list:
+    rows = list(rows)
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(getattr(last, sort_column.key), last.id)
+    return rows
@@ -1,36 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import and_, select
+import base64
+import json
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import and_, func, or_, select, text, true, tuple_
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import require_role
-from database import get_db
+from cache import cache_key, read_cache
+from database import AsyncSessionLocal, get_db
 from models import Course
-from schemas import CourseCreate, CourseOut, CourseUpdate
+from pagination import NEXT_CURSOR_HEADER, page_rows, paginate
+from schemas import (
+    CourseCreate,
+    CourseOut,
+    CourseSearchFacets,
+    CourseSearchHit,
+    CourseSearchResults,
+    CourseStatsOut,
+    CourseStatsReport,
+    CourseUpdate,
+    FacetCount,
+)
+from waitlist import promote_waitlist, waitlist_events
 
 router = APIRouter(tags=["courses"])
 
 
+def encode_search_cursor(rank: float, course_id: uuid.UUID) -> str:
+    raw = json.dumps([rank, str(course_id)]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_search_cursor(cursor: str) -> tuple[float, uuid.UUID]:
+    try:
+        rank, course_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return float(rank), uuid.UUID(course_id)
+    except (ValueError, TypeError) as exc:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from exc
+
+
 @router.get("/courses/", response_model=list[CourseOut])
 async def list_courses(
+    response: Response,
     department: str | None = None,
     semester: str | None = None,
     include_inactive: bool = False,
+    cursor: str | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
+):
+    async def load():
+        filters = []
+        if department:
+            filters.append(Course.department == department)
+        if semester:
+            filters.append(Course.semester == semester)
+        if not include_inactive:
+            filters.append(Course.is_active.is_(True))
+        stmt = select(Course)
+        if filters:
+            stmt = stmt.where(and_(*filters))
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(paginate(stmt, Course.created_at, Course.id, cursor, skip, limit))
+            page = Response()
+            courses = page_rows(result.scalars().all(), Course.created_at, limit, page)
+        return {
+            "items": [CourseOut.model_validate(course).model_dump(mode="json") for course in courses],
+            "next_cursor": page.headers.get(NEXT_CURSOR_HEADER),
+        }
+
+    key = cache_key(
+        "courses",
+        department=department,
+        semester=semester,
+        include_inactive=include_inactive,
+        cursor=cursor,
+        skip=skip,
+        limit=limit,
+    )
+    # Catalog edits invalidate "courses"; enrolled_count here may lag seat changes by up to the
+    # cache's fresh + stale seconds (GET /courses/{id} is exact).
+    page = await read_cache.get(key, ("courses",), load)
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return page["items"]
+
+
+@router.get("/courses/search", response_model=CourseSearchResults)
+async def search_courses(
+    q: str = Query(min_length=1, max_length=200),
+    department: str | None = None,
+    semester: str | None = None,
+    include_inactive: bool = False,
+    cursor: str | None = None,
+    limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
 ):
-    filters = []
-    if department:
-        filters.append(Course.department == department)
-    if semester:
-        filters.append(Course.semester == semester)
+    # Matches come from the GIN index on the generated search_vector column. Pages are keyset
+    # on (rank desc, id), so deep pages cost the same as the first one.
+    query = func.websearch_to_tsquery("english", q)
+    rank = func.ts_rank(Course.search_vector, query)
+    matched = [Course.search_vector.op("@@")(query)]
     if not include_inactive:
-        filters.append(Course.is_active.is_(True))
-    stmt = select(Course).offset(skip).limit(limit)
-    if filters:
-        stmt = stmt.where(and_(*filters))
-    result = await db.execute(stmt)
-    return result.scalars().all()
+        matched.append(Course.is_active.is_(True))
+    in_department = Course.department == department if department else true()
+    in_semester = Course.semester == semester if semester else true()
+
+    stmt = select(Course, rank.label("rank")).where(*matched, in_department, in_semester)
+    if cursor:
+        last_rank, last_id = decode_search_cursor(cursor)
+        stmt = stmt.where(or_(rank < last_rank, and_(rank == last_rank, Course.id > last_id)))
+    result = await db.execute(stmt.order_by(rank.desc(), Course.id).limit(limit + 1))
+    rows = result.all()
+    items = [CourseSearchHit(**CourseOut.model_validate(course).model_dump(), rank=row_rank) for course, row_rank in rows[:limit]]
+    next_cursor = encode_search_cursor(rows[limit - 1].rank, rows[limit - 1].Course.id) if len(rows) > limit else None
+    if cursor:
+        return CourseSearchResults(items=items, next_cursor=next_cursor)
+
+    # All facet counts and the total in one pass over the matches. Each facet ignores its own
+    # filter, so the client can show the other departments/semesters it could switch to.
+    facet_stmt = (
+        select(
+            Course.department,
+            Course.semester,
+            func.grouping(Course.department, Course.semester).label("grouping"),
+            func.count().filter(in_semester).label("by_department"),
+            func.count().filter(in_department).label("by_semester"),
+            func.count().filter(and_(in_department, in_semester)).label("total"),
+        )
+        .where(*matched)
+        .group_by(func.grouping_sets(tuple_(Course.department), tuple_(Course.semester), tuple_()))
+    )
+    facets = CourseSearchFacets(department=[], semester=[])
+    total = 0
+    for row in (await db.execute(facet_stmt)).all():
+        if row.grouping == 1 and row.by_department:
+            facets.department.append(FacetCount(value=row.department, count=row.by_department))
+        elif row.grouping == 2 and row.by_semester:
+            facets.semester.append(FacetCount(value=row.semester, count=row.by_semester))
+        elif row.grouping == 3:
+            total = row.total
+    facets.department.sort(key=lambda facet: (-facet.count, facet.value))
+    facets.semester.sort(key=lambda facet: (-facet.count, facet.value))
+    return CourseSearchResults(total=total, facets=facets, items=items, next_cursor=next_cursor)
 
 
 @router.post("/courses/", response_model=CourseOut, status_code=201)
@@ -44,14 +157,52 @@ async def create_course(
     course = Course(**payload.model_dump())
     db.add(course)
     await db.commit()
+    await read_cache.invalidate("courses")
     await db.refresh(course)
     return course
 
 
+@router.get("/courses/stats", response_model=CourseStatsReport)
+async def course_stats(
+    department: str | None = None,
+    semester: str | None = None,
+    include_inactive: bool = False,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_role("admin")),
+):
+    # Reads the course_stats materialized view (see stats.py), so the cost does not grow with
+    # enrollment or material volume; figures lag by at most one refresh interval.
+    filters = []
+    params = {}
+    if department:
+        filters.append("department = :department")
+        params["department"] = department
+    if semester:
+        filters.append("semester = :semester")
+        params["semester"] = semester
+    if not include_inactive:
+        filters.append("is_active")
+    where = f"WHERE {' AND '.join(filters)}" if filters else ""
+    result = await db.execute(text(f"SELECT * FROM course_stats {where} ORDER BY code"), params)
+    rows = result.mappings().all()
+    return CourseStatsReport(
+        refreshed_at=rows[0]["refreshed_at"] if rows else None,
+        total_courses=len(rows),
+        total_enrollments=sum(row["active_enrollments"] for row in rows),
+        total_materials=sum(row["materials"] for row in rows),
+        courses=[CourseStatsOut.model_validate(dict(row)) for row in rows],
+    )
+
+
 @router.get("/courses/{course_id}", response_model=CourseOut)
-async def get_course(course_id: str, db: AsyncSession = Depends(get_db)):
-    result = await db.execute(select(Course).where(Course.id == course_id))
-    course = result.scalar_one_or_none()
+async def get_course(course_id: uuid.UUID):
+    async def load():
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Course).where(Course.id == course_id))
+            course = result.scalar_one_or_none()
+        return CourseOut.model_validate(course).model_dump(mode="json") if course else None
+
+    course = await read_cache.get(cache_key("course", id=course_id), (f"course:{course_id}",), load)
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     return course
@@ -64,15 +215,28 @@ async def update_course(
     db: AsyncSession = Depends(get_db),
     user: dict = Depends(require_role("professor", "admin")),
 ):
-    result = await db.execute(select(Course).where(Course.id == course_id))
+    # The course row lock is held from the read to the commit, like enroll/drop, so the new
+    # capacity and the waitlist promotion land together and no enroll can take the seats between.
+    result = await db.execute(select(Course).where(Course.id == course_id).with_for_update())
     course = result.scalar_one_or_none()
     if not course:
         raise HTTPException(status_code=404, detail="Course not found")
     if user.get("role") == "professor" and str(course.professor_id) != user.get("sub"):
         raise HTTPException(status_code=403, detail="Professors can only edit their own courses")
-    for key, value in payload.model_dump(exclude_none=True).items():
+    changes = payload.model_dump(exclude_none=True)
+    reopened = changes.get("is_active") is True and not course.is_active
+    for key, value in changes.items():
         setattr(course, key, value)
+    promoted = []
+    if course.is_active and ("max_students" in changes or reopened):
+        # Free seats go to the waitlist first.
+        seats = course.max_students - course.enrolled_count if course.max_students > 0 else course.waitlist_seq
+        promoted = await promote_waitlist(db, course.id, seats)
+        course.enrolled_count += len(promoted)
     await db.commit()
+    if promoted:
+        await waitlist_events.publish(course.id)
+    await read_cache.invalidate("courses", f"course:{course.id}")
     await db.refresh(course)
     return course
 
@@ -92,4 +256,5 @@ async def delete_course(
     # Soft-delete to preserve enrollments/material history and avoid FK violations.
     course.is_active = False
     await db.commit()
+    await read_cache.invalidate("courses", f"course:{course.id}")
     return {"message": "Course deactivated"}
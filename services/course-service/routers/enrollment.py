@@ -1,51 +1,132 @@
+import asyncio
+import hashlib
 import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import func, select
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from auth import require_role
-from database import get_db
-from models import Course, Enrollment
-from schemas import EnrollmentOut
+from cache import read_cache
+from config import settings
+from database import AsyncSessionLocal, get_db
+from models import CURRENT_ENROLLMENT, Course, Enrollment, Material
+from pagination import page_rows, paginate
+from schemas import (
+    BulkEnrollReport,
+    BulkEnrollRequest,
+    CourseOut,
+    EnrollmentOut,
+    EnrollmentStatusOut,
+    MaterialOut,
+    StudentCourseOut,
+    StudentHomeOut,
+)
+from waitlist import enrollment_status, promote_waitlist, waitlist_events
 
 router = APIRouter(tags=["enrollment"])
 
 
+async def claim_seat(db: AsyncSession, course_id: uuid.UUID) -> bool:
+    # One conditional UPDATE: the row lock serializes concurrent enrollers on the course, so
+    # enrolled_count can never pass max_students (0 means unlimited).
+    result = await db.execute(
+        update(Course)
+        .where(
+            Course.id == course_id,
+            Course.is_active.is_(True),
+            or_(Course.max_students <= 0, Course.enrolled_count < Course.max_students),
+        )
+        .values(enrolled_count=Course.enrolled_count + 1)
+        .returning(Course.id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def take_waitlist_ticket(db: AsyncSession, course_id: uuid.UUID) -> int | None:
+    # Only succeeds while the course is still full; the course row stays locked until commit,
+    # so a concurrent drop cannot free a seat without seeing this waitlist entry.
+    result = await db.execute(
+        update(Course)
+        .where(
+            Course.id == course_id,
+            Course.is_active.is_(True),
+            Course.max_students > 0,
+            Course.enrolled_count >= Course.max_students,
+        )
+        .values(waitlist_seq=Course.waitlist_seq + 1)
+        .returning(Course.waitlist_seq)
+    )
+    return result.scalar_one_or_none()
+
+
+async def add_enrollment(db: AsyncSession, course_id: uuid.UUID, student_id: uuid.UUID, status: str, position: int | None = None):
+    result = await db.execute(
+        insert(Enrollment)
+        .values(
+            id=uuid.uuid4(),
+            course_id=course_id,
+            student_id=student_id,
+            enrolled_at=datetime.utcnow(),
+            status=status,
+            waitlist_position=position,
+        )
+        .on_conflict_do_nothing(index_elements=["course_id", "student_id"], index_where=CURRENT_ENROLLMENT)
+        .returning(Enrollment)
+    )
+    enrollment = result.scalar_one_or_none()
+    if enrollment is None:
+        await db.rollback()
+        result = await db.execute(
+            select(Enrollment.status).where(Enrollment.course_id == course_id, Enrollment.student_id == student_id, CURRENT_ENROLLMENT)
+        )
+        detail = "Already on the waitlist" if result.scalar_one_or_none() == "waitlisted" else "Already enrolled"
+        raise HTTPException(status_code=400, detail=detail)
+    await db.commit()
+    return enrollment
+
+
 @router.post("/courses/{course_id}/enroll", response_model=EnrollmentOut)
 async def enroll(
     course_id: uuid.UUID,
     student_id: uuid.UUID,
+    response: Response,
+    waitlist: bool = Query(False, description="Join the waitlist when the course is full"),
     db: AsyncSession = Depends(get_db),
     user: dict = Depends(require_role("student", "admin")),
 ):
     if user.get("role") == "student" and user.get("sub") != str(student_id):
         raise HTTPException(status_code=403, detail="Students can only enroll themselves")
-    result = await db.execute(select(Course).where(Course.id == course_id))
-    course = result.scalar_one_or_none()
-    if not course:
-        raise HTTPException(status_code=404, detail="Course not found")
-    if not course.is_active:
-        raise HTTPException(status_code=400, detail="Course is not active")
 
-    count_result = await db.execute(
-        select(func.count()).select_from(Enrollment).where(Enrollment.course_id == course_id, Enrollment.status == "active")
-    )
-    active_count = count_result.scalar_one()
-    if course.max_students > 0 and active_count >= course.max_students:
-        raise HTTPException(status_code=400, detail="Course full")
-
-    existing = await db.execute(
-        select(Enrollment).where(Enrollment.course_id == course_id, Enrollment.student_id == student_id, Enrollment.status == "active")
-    )
-    if existing.scalar_one_or_none():
-        raise HTTPException(status_code=400, detail="Already enrolled")
-
-    enrollment = Enrollment(course_id=course_id, student_id=student_id)
-    db.add(enrollment)
-    await db.commit()
-    await db.refresh(enrollment)
-    return enrollment
+    # A seat can free up between the two conditional updates; then simply try again. Seat
+    # changes only invalidate the course itself: list pages keep their counts until they expire,
+    # so a registration rush does not flush the whole catalog on every enrollment.
+    for _ in range(3):
+        if await claim_seat(db, course_id):
+            enrollment = await add_enrollment(db, course_id, student_id, "active")
+            await read_cache.invalidate(f"course:{course_id}")
+            return enrollment
+        if waitlist:
+            position = await take_waitlist_ticket(db, course_id)
+            if position is not None:
+                response.status_code = 202
+                return await add_enrollment(db, course_id, student_id, "waitlisted", position)
+        await db.rollback()
+        result = await db.execute(select(Course.is_active, Course.max_students, Course.enrolled_count).where(Course.id == course_id))
+        course = result.one_or_none()
+        if course is None:
+            raise HTTPException(status_code=404, detail="Course not found")
+        if not course.is_active:
+            raise HTTPException(status_code=400, detail="Course is not active")
+        if not waitlist and 0 < course.max_students <= course.enrolled_count:
+            raise HTTPException(status_code=400, detail="Course full")
+    raise HTTPException(status_code=409, detail="Enrollment contended, please retry")
 
 
 @router.delete("/courses/{course_id}/enroll")
@@ -57,34 +138,199 @@ async def drop(
 ):
     if user.get("role") == "student" and user.get("sub") != str(student_id):
         raise HTTPException(status_code=403, detail="Students can only drop themselves")
+    # Course row first, then the enrollment: the same order as enroll (claim_seat, then the
+    # insert) and bulk_enroll, so a drop racing a re-enroll cannot deadlock.
+    await db.execute(select(Course.id).where(Course.id == course_id).with_for_update())
     result = await db.execute(
-        select(Enrollment).where(Enrollment.course_id == course_id, Enrollment.student_id == student_id, Enrollment.status == "active")
+        select(Enrollment)
+        .where(Enrollment.course_id == course_id, Enrollment.student_id == student_id, CURRENT_ENROLLMENT)
+        .with_for_update()
     )
     enrollment = result.scalar_one_or_none()
     if not enrollment:
         raise HTTPException(status_code=404, detail="Enrollment not found")
+    was_active = enrollment.status == "active"
     enrollment.status = "dropped"
+    enrollment.waitlist_position = None
+    promoted = []
+    if was_active:
+        # Hand the freed seat straight to the head of the waitlist; the seat count only goes
+        # down when nobody is waiting.
+        promoted = await promote_waitlist(db, course_id, 1)
+        if not promoted:
+            await db.execute(
+                update(Course).where(Course.id == course_id).values(enrolled_count=func.greatest(Course.enrolled_count - 1, 0))
+            )
     await db.commit()
+    if was_active and not promoted:
+        await read_cache.invalidate(f"course:{course_id}")
+    if promoted or not was_active:
+        await waitlist_events.publish(course_id)
     return {"message": "Dropped"}
 
 
+@router.post("/courses/{course_id}/enroll/bulk", response_model=BulkEnrollReport)
+async def bulk_enroll(
+    course_id: uuid.UUID,
+    payload: BulkEnrollRequest,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_role("admin")),
+):
+    # The course row lock is taken once for the whole cohort; enroll/drop take the same lock,
+    # so the seat count and existing enrollments cannot move underneath the capacity check.
+    result = await db.execute(select(Course).where(Course.id == course_id).with_for_update())
+    course = result.scalar_one_or_none()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    if not course.is_active:
+        raise HTTPException(status_code=400, detail="Course is not active")
+
+    student_ids = list(dict.fromkeys(payload.student_ids))
+    result = await db.execute(
+        select(Enrollment.student_id, Enrollment.status).where(
+            Enrollment.course_id == course_id, Enrollment.student_id.in_(student_ids), CURRENT_ENROLLMENT
+        )
+    )
+    existing = dict(result.all())
+    candidates = [student_id for student_id in student_ids if existing.get(student_id) != "active"]
+    free = len(candidates) if course.max_students <= 0 else max(course.max_students - course.enrolled_count, 0)
+    accepted, rejected = candidates[:free], candidates[free:]
+
+    enrolled: set[uuid.UUID] = set()
+    now = datetime.utcnow()
+    # Cohort members already on the waitlist take their seat ahead of the queue.
+    promoted = [student_id for student_id in accepted if existing.get(student_id) == "waitlisted"]
+    if promoted:
+        result = await db.execute(
+            update(Enrollment)
+            .where(Enrollment.course_id == course_id, Enrollment.student_id.in_(promoted), Enrollment.status == "waitlisted")
+            .values(status="active", waitlist_position=None, enrolled_at=now)
+            .returning(Enrollment.student_id)
+        )
+        enrolled.update(result.scalars().all())
+    new = [student_id for student_id in accepted if student_id not in existing]
+    if new:
+        result = await db.execute(
+            insert(Enrollment)
+            .values(
+                [
+                    {
+                        "id": uuid.uuid4(),
+                        "course_id": course_id,
+                        "student_id": student_id,
+                        "enrolled_at": now,
+                        "status": "active",
+                        "waitlist_position": None,
+                    }
+                    for student_id in new
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=["course_id", "student_id"], index_where=CURRENT_ENROLLMENT)
+            .returning(Enrollment.student_id)
+        )
+        enrolled.update(result.scalars().all())
+    course.enrolled_count += len(enrolled)
+    await db.commit()
+    if enrolled:
+        await read_cache.invalidate(f"course:{course_id}")
+    if promoted:
+        await waitlist_events.publish(course_id)
+
+    turned_away = set(rejected)
+    return BulkEnrollReport(
+        enrolled=[student_id for student_id in student_ids if student_id in enrolled],
+        duplicates=[student_id for student_id in student_ids if student_id not in enrolled and student_id not in turned_away],
+        rejected=rejected,
+    )
+
+
+def status_etag(status: EnrollmentStatusOut) -> str:
+    return '"' + hashlib.sha1(status.model_dump_json().encode()).hexdigest() + '"'
+
+
+@router.get("/courses/{course_id}/enroll/status", response_model=EnrollmentStatusOut)
+async def enrollment_status_view(
+    course_id: uuid.UUID,
+    student_id: uuid.UUID,
+    response: Response,
+    if_none_match: str | None = Header(default=None),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("student", "admin")),
+):
+    if user.get("role") == "student" and user.get("sub") != str(student_id):
+        raise HTTPException(status_code=403, detail="Students can only view their own enrollment")
+    status = await enrollment_status(db, course_id, student_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    # Pollers revalidate with If-None-Match and get an empty 304 until their place changes.
+    headers = {"ETag": status_etag(status), "Cache-Control": "private, no-cache"}
+    if if_none_match is not None and headers["ETag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return status
+
+
+@router.get("/courses/{course_id}/enroll/status/stream")
+async def enrollment_status_stream(
+    course_id: uuid.UUID,
+    student_id: uuid.UUID,
+    user: dict = Depends(require_role("student", "admin")),
+):
+    if user.get("role") == "student" and user.get("sub") != str(student_id):
+        raise HTTPException(status_code=403, detail="Students can only view their own enrollment")
+
+    async def events():
+        # Server-sent events: one message per change of the student's place, ending once they
+        # hold a seat or left the queue. Sessions are opened per check, not held while idle.
+        with waitlist_events.watch(course_id) as changed:
+            last = None
+            while True:
+                changed.clear()
+                async with AsyncSessionLocal() as db:
+                    status = await enrollment_status(db, course_id, student_id)
+                if status is None:
+                    return
+                if status != last:
+                    yield f"data: {status.model_dump_json()}\n\n"
+                    last = status
+                if status.status != "waitlisted":
+                    return
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=settings.waitlist_stream_keepalive_seconds)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.get("/courses/{course_id}/students", response_model=list[EnrollmentOut])
 async def list_students(
     course_id: uuid.UUID,
+    response: Response,
+    status: Literal["active", "waitlisted"] = "active",
+    cursor: str | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(require_role("professor", "admin")),
 ):
-    result = await db.execute(
-        select(Enrollment).where(Enrollment.course_id == course_id, Enrollment.status == "active").offset(skip).limit(limit)
-    )
-    return result.scalars().all()
+    stmt = select(Enrollment).where(Enrollment.course_id == course_id, Enrollment.status == status)
+    # The waitlist is listed in queue order, everything else by enrollment time.
+    sort_column = Enrollment.waitlist_position if status == "waitlisted" else Enrollment.enrolled_at
+    result = await db.execute(paginate(stmt, sort_column, Enrollment.id, cursor, skip, limit))
+    return page_rows(result.scalars().all(), sort_column, limit, response)
 
 
 @router.get("/students/{student_id}/courses", response_model=list[EnrollmentOut])
 async def student_courses(
     student_id: uuid.UUID,
+    response: Response,
+    status: Literal["active", "waitlisted"] = "active",
+    cursor: str | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
@@ -92,7 +338,65 @@ async def student_courses(
 ):
     if user.get("role") == "student" and user.get("sub") != str(student_id):
         raise HTTPException(status_code=403, detail="Students can only access their own courses")
+    stmt = select(Enrollment).where(Enrollment.student_id == student_id, Enrollment.status == status)
+    result = await db.execute(paginate(stmt, Enrollment.enrolled_at, Enrollment.id, cursor, skip, limit))
+    return page_rows(result.scalars().all(), Enrollment.enrolled_at, limit, response)
+
+
+@router.get("/students/{student_id}/home", response_model=StudentHomeOut)
+async def student_home(
+    student_id: uuid.UUID,
+    materials_per_course: int = Query(5, ge=0, le=50),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("student", "admin")),
+):
+    if user.get("role") == "student" and user.get("sub") != str(student_id):
+        raise HTTPException(status_code=403, detail="Students can only access their own courses")
+    # Enrollments with their courses in one join...
     result = await db.execute(
-        select(Enrollment).where(Enrollment.student_id == student_id, Enrollment.status == "active").offset(skip).limit(limit)
+        select(Enrollment, Course)
+        .join(Course, Course.id == Enrollment.course_id)
+        .where(Enrollment.student_id == student_id, CURRENT_ENROLLMENT)
+        .order_by(Course.code)
+    )
+    rows = result.all()
+    course_ids = [course.id for _, course in rows]
+
+    # ...and the newest materials of all of them in one windowed query.
+    latest: dict[uuid.UUID, list[Material]] = defaultdict(list)
+    counts: dict[uuid.UUID, int] = {}
+    if course_ids:
+        ranked = (
+            select(
+                Material,
+                func.row_number().over(partition_by=Material.course_id, order_by=Material.uploaded_at.desc()).label("rank"),
+                func.count().over(partition_by=Material.course_id).label("total"),
+            )
+            .where(Material.course_id.in_(course_ids))
+            .subquery()
+        )
+        material = aliased(Material, ranked)
+        result = await db.execute(
+            select(material, ranked.c.total).where(ranked.c.rank <= max(materials_per_course, 1)).order_by(ranked.c.rank)
+        )
+        for item, total in result.all():
+            counts[item.course_id] = total
+            if materials_per_course:
+                latest[item.course_id].append(item)
+
+    entries = {"active": [], "waitlisted": []}
+    for enrollment, course in rows:
+        entries[enrollment.status].append(
+            StudentCourseOut(
+                enrollment=EnrollmentOut.model_validate(enrollment),
+                course=CourseOut.model_validate(course),
+                material_count=counts.get(course.id, 0),
+                latest_materials=[MaterialOut.model_validate(item) for item in latest[course.id]],
+            )
+        )
+    return StudentHomeOut(
+        student_id=student_id,
+        courses=entries["active"],
+        waitlisted=entries["waitlisted"],
+        total_materials=sum(entry.material_count for entry in entries["active"]),
     )
-    return result.scalars().all()
@@ -0,0 +1,76 @@
+import re
+import uuid
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth import require_role, security
+from database import get_db
+from exports import ENCODERS, stream_enrollments
+from models import Course, Enrollment
+
+router = APIRouter(tags=["exports"])
+
+EXPORT_FIELDS = (
+    Course.code,
+    Course.title,
+    Course.semester,
+    Enrollment.student_id,
+    Enrollment.status,
+    Enrollment.enrolled_at,
+    Enrollment.waitlist_position,
+)
+
+
+def export_response(stmt, fmt: str, name: str, token: str) -> StreamingResponse:
+    encoder = ENCODERS[fmt]()
+    filename = re.sub(r"[^A-Za-z0-9._-]+", "_", name) + "." + encoder.extension
+    return StreamingResponse(
+        stream_enrollments(stmt, encoder, token),
+        media_type=encoder.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"', "Cache-Control": "no-store"},
+    )
+
+
+@router.get("/courses/{course_id}/enrollments/export")
+async def export_roster(
+    course_id: uuid.UUID,
+    format: Literal["csv", "xlsx"] = "csv",
+    status: Literal["active", "waitlisted", "all"] = "active",
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("professor", "admin")),
+    token: HTTPAuthorizationCredentials = Depends(security),
+):
+    result = await db.execute(select(Course.code, Course.professor_id).where(Course.id == course_id))
+    course = result.one_or_none()
+    if not course:
+        raise HTTPException(status_code=404, detail="Course not found")
+    if user.get("role") == "professor" and str(course.professor_id) != user.get("sub"):
+        raise HTTPException(status_code=403, detail="Professors can only export their own courses")
+    stmt = select(*EXPORT_FIELDS).select_from(Enrollment).join(Course, Course.id == Enrollment.course_id).where(Enrollment.course_id == course_id)
+    if status != "all":
+        stmt = stmt.where(Enrollment.status == status)
+    stmt = stmt.order_by(Enrollment.enrolled_at, Enrollment.id)
+    return export_response(stmt, format, f"{course.code}-{status}", token.credentials)
+
+
+@router.get("/enrollments/export")
+async def export_semester(
+    semester: str,
+    department: str | None = None,
+    format: Literal["csv", "xlsx"] = "csv",
+    status: Literal["active", "waitlisted", "all"] = "active",
+    _: dict = Depends(require_role("admin")),
+    token: HTTPAuthorizationCredentials = Depends(security),
+):
+    stmt = select(*EXPORT_FIELDS).select_from(Enrollment).join(Course, Course.id == Enrollment.course_id).where(Course.semester == semester)
+    if department:
+        stmt = stmt.where(Course.department == department)
+    if status != "all":
+        stmt = stmt.where(Enrollment.status == status)
+    stmt = stmt.order_by(Course.code, Enrollment.enrolled_at, Enrollment.id)
+    return export_response(stmt, format, f"enrollments-{semester}-{status}", token.credentials)
@@ -1,15 +1,30 @@
+import mimetypes
 import os
 import uuid
+from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, UploadFile
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, File, Form, HTTPException, Query, Request, Response, UploadFile
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import get_current_user, require_role
 from config import settings
-from database import get_db
-from models import Material
-from schemas import MaterialOut
+from blobstore import StagedFile, blob_store
+from cache import cache_key, read_cache
+from database import AsyncSessionLocal, get_db
+from models import Course, Material, MaterialUpload
+from pagination import NEXT_CURSOR_HEADER, page_rows, paginate
+from schemas import MaterialOut, UploadCreate, UploadOut
+from uploads import (
+    PayloadTooLarge,
+    UploadBusy,
+    create_partial,
+    file_digest,
+    partial_path,
+    remove_partial,
+    upload_hashes,
+    write_chunk,
+)
 
 router = APIRouter(tags=["materials"])
 
@@ -17,12 +32,27 @@ router = APIRouter(tags=["materials"])
 @router.get("/courses/{course_id}/materials", response_model=list[MaterialOut])
 async def list_materials(
     course_id: uuid.UUID,
+    response: Response,
+    cursor: str | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
-    db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(Material).where(Material.course_id == course_id).offset(skip).limit(limit))
-    return result.scalars().all()
+    async def load():
+        stmt = select(Material).where(Material.course_id == course_id)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(paginate(stmt, Material.uploaded_at, Material.id, cursor, skip, limit))
+            page = Response()
+            materials = page_rows(result.scalars().all(), Material.uploaded_at, limit, page)
+        return {
+            "items": [MaterialOut.model_validate(material).model_dump(mode="json") for material in materials],
+            "next_cursor": page.headers.get(NEXT_CURSOR_HEADER),
+        }
+
+    key = cache_key("materials", course_id=course_id, cursor=cursor, skip=skip, limit=limit)
+    page = await read_cache.get(key, (f"materials:{course_id}",), load)
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return page["items"]
 
 
 @router.post("/courses/{course_id}/materials", response_model=MaterialOut, status_code=201)
@@ -35,27 +65,209 @@ async def upload_material(
     db: AsyncSession = Depends(get_db),
     user: dict = Depends(require_role("professor", "admin")),
 ):
-    os.makedirs(settings.upload_dir, exist_ok=True)
+    staged = await blob_store.stage(file.read)
     ext = os.path.splitext(file.filename or "material")[1]
-    filename = f"material_{course_id}_{uuid.uuid4()}{ext}"
-    target = os.path.join(settings.upload_dir, filename)
-    with open(target, "wb") as out:
-        out.write(await file.read())
+    blob = await blob_store.store(db, staged, ext, file.content_type)
 
     material = Material(
         course_id=course_id,
         title=title,
         description=description,
-        file_url=f"/uploads/{filename}",
+        file_url=blob_store.url(blob),
         file_type=file_type,
         uploaded_by=user.get("sub"),
+        size=staged.size,
+        sha256=staged.digest,
     )
     db.add(material)
     await db.commit()
+    await read_cache.invalidate(f"materials:{course_id}")
     await db.refresh(material)
     return material
 
 
+# Resumable uploads: create an upload, PUT the bytes in chunks at increasing offsets
+# (an interrupted client asks for received_bytes and resumes from there), then complete it.
+
+
+async def get_upload(
+    db: AsyncSession, course_id: uuid.UUID, upload_id: uuid.UUID, user: dict, for_update: bool = False
+) -> MaterialUpload:
+    query = select(MaterialUpload).where(
+        MaterialUpload.id == upload_id,
+        MaterialUpload.course_id == course_id,
+        MaterialUpload.expires_at > datetime.utcnow(),
+    )
+    if for_update:
+        query = query.with_for_update()
+    result = await db.execute(query)
+    upload = result.scalar_one_or_none()
+    if not upload:
+        raise HTTPException(status_code=404, detail="Upload not found")
+    if user.get("role") != "admin" and str(upload.uploaded_by) != user.get("sub"):
+        raise HTTPException(status_code=403, detail="Upload belongs to another user")
+    return upload
+
+
+def upload_out(upload: MaterialUpload) -> UploadOut:
+    return UploadOut(
+        id=upload.id,
+        course_id=upload.course_id,
+        filename=upload.filename,
+        size=upload.size,
+        received_bytes=upload.received_bytes,
+        chunk_size=settings.upload_chunk_max_bytes,
+        expires_at=upload.expires_at,
+    )
+
+
+@router.post("/courses/{course_id}/materials/uploads", response_model=UploadOut, status_code=201)
+async def create_upload(
+    course_id: uuid.UUID,
+    payload: UploadCreate,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("professor", "admin")),
+):
+    if payload.size > settings.upload_max_bytes:
+        raise HTTPException(status_code=413, detail=f"Uploads are limited to {settings.upload_max_bytes} bytes")
+    result = await db.execute(select(Course.id).where(Course.id == course_id))
+    if result.scalar_one_or_none() is None:
+        raise HTTPException(status_code=404, detail="Course not found")
+    upload = MaterialUpload(
+        id=uuid.uuid4(),
+        course_id=course_id,
+        uploaded_by=user.get("sub"),
+        title=payload.title,
+        description=payload.description,
+        file_type=payload.file_type,
+        filename=payload.filename,
+        size=payload.size,
+        received_bytes=0,
+        expected_sha256=payload.sha256.lower() if payload.sha256 else None,
+        expires_at=datetime.utcnow() + timedelta(hours=settings.upload_expiry_hours),
+    )
+    await create_partial(upload.id)
+    db.add(upload)
+    await db.commit()
+    return upload_out(upload)
+
+
+@router.get("/courses/{course_id}/materials/uploads/{upload_id}", response_model=UploadOut)
+async def upload_status(
+    course_id: uuid.UUID,
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("professor", "admin")),
+):
+    return upload_out(await get_upload(db, course_id, upload_id, user))
+
+
+@router.put("/courses/{course_id}/materials/uploads/{upload_id}", response_model=UploadOut)
+async def upload_chunk(
+    course_id: uuid.UUID,
+    upload_id: uuid.UUID,
+    request: Request,
+    offset: int = Query(..., ge=0),
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("professor", "admin")),
+):
+    upload = await get_upload(db, course_id, upload_id, user)
+    if offset != upload.received_bytes:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Expected offset {upload.received_bytes}",
+            headers={"Upload-Offset": str(upload.received_bytes)},
+        )
+    # Release the connection while the body streams in; close() keeps `upload` loaded, detached,
+    # and the offset is then advanced in a session of its own.
+    await db.close()
+    max_bytes = min(settings.upload_chunk_max_bytes, upload.size - offset)
+    try:
+        async with upload_hashes.lock(upload.id):
+            received, _ = await write_chunk(upload.id, offset, request.stream(), max_bytes)
+            # The offset only moves forward if nobody else advanced it (or completed the upload)
+            # meanwhile.
+            async with AsyncSessionLocal() as session:
+                result = await session.execute(
+                    update(MaterialUpload)
+                    .where(MaterialUpload.id == upload.id, MaterialUpload.received_bytes == offset)
+                    .values(received_bytes=received)
+                    .returning(MaterialUpload.id)
+                )
+                if result.scalar_one_or_none() is None:
+                    raise HTTPException(status_code=409, detail="Upload offset changed concurrently")
+                await session.commit()
+    except PayloadTooLarge:
+        raise HTTPException(status_code=413, detail=f"Chunk exceeds {max_bytes} bytes")
+    except UploadBusy:
+        raise HTTPException(status_code=409, detail="Another chunk for this upload is in progress")
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Upload data is gone, start a new upload")
+    upload.received_bytes = received
+    return upload_out(upload)
+
+
+@router.post("/courses/{course_id}/materials/uploads/{upload_id}/complete", response_model=MaterialOut, status_code=201)
+async def complete_upload(
+    course_id: uuid.UUID,
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("professor", "admin")),
+):
+    # The row lock serialises completions: a second call waits here, then finds the row gone
+    # (404) instead of hashing a partial file that has already been moved into the blob store.
+    upload = await get_upload(db, course_id, upload_id, user, for_update=True)
+    if upload.received_bytes != upload.size:
+        raise HTTPException(status_code=409, detail=f"Received {upload.received_bytes} of {upload.size} bytes")
+    try:
+        # A chunk still being written on any worker makes this a 409 for the client to retry.
+        async with upload_hashes.lock(upload.id):
+            sha256 = await file_digest(upload.id, upload.size)
+    except UploadBusy:
+        raise HTTPException(status_code=409, detail="A chunk for this upload is still being written")
+    except FileNotFoundError:
+        raise HTTPException(status_code=410, detail="Upload data is gone, start a new upload")
+    if upload.expected_sha256 and sha256 != upload.expected_sha256:
+        await remove_partial(upload.id)
+        await db.delete(upload)
+        await db.commit()
+        raise HTTPException(status_code=422, detail="Checksum mismatch, upload discarded")
+
+    upload_hashes.discard(upload.id)
+    staged = StagedFile(path=partial_path(upload.id), size=upload.size, digest=sha256)
+    blob = await blob_store.store(db, staged, os.path.splitext(upload.filename)[1], mimetypes.guess_type(upload.filename)[0])
+    material = Material(
+        course_id=course_id,
+        title=upload.title,
+        description=upload.description,
+        file_url=blob_store.url(blob),
+        file_type=upload.file_type,
+        uploaded_by=upload.uploaded_by,
+        size=upload.size,
+        sha256=sha256,
+    )
+    db.add(material)
+    await db.delete(upload)
+    await db.commit()
+    await read_cache.invalidate(f"materials:{course_id}")
+    await db.refresh(material)
+    return material
+
+
+@router.delete("/courses/{course_id}/materials/uploads/{upload_id}")
+async def abort_upload(
+    course_id: uuid.UUID,
+    upload_id: uuid.UUID,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("professor", "admin")),
+):
+    upload = await get_upload(db, course_id, upload_id, user)
+    await db.delete(upload)
+    await db.commit()
+    await remove_partial(upload.id)
+    return {"message": "Upload aborted"}
+
+
 @router.delete("/courses/{course_id}/materials/{material_id}")
 async def delete_material(
     course_id: uuid.UUID,
@@ -67,6 +279,8 @@ async def delete_material(
     material = result.scalar_one_or_none()
     if not material:
         raise HTTPException(status_code=404, detail="Material not found")
+    await blob_store.release(db, material.file_url)
     await db.delete(material)
     await db.commit()
+    await read_cache.invalidate(f"materials:{course_id}")
     return {"message": "Material deleted"}
@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class CourseCreate(BaseModel):
@@ -37,6 +37,7 @@ class CourseOut(BaseModel):
     department: str
     semester: str
     max_students: int
+    enrolled_count: int
     is_active: bool
     created_at: datetime
 
@@ -44,17 +45,85 @@ class CourseOut(BaseModel):
         from_attributes = True
 
 
+class CourseSearchHit(CourseOut):
+    rank: float
+
+
+class FacetCount(BaseModel):
+    value: str
+    count: int
+
+
+class CourseSearchFacets(BaseModel):
+    department: list[FacetCount]
+    semester: list[FacetCount]
+
+
+class CourseSearchResults(BaseModel):
+    # total and facets are only computed for the first page (no cursor).
+    total: int | None = None
+    facets: CourseSearchFacets | None = None
+    items: list[CourseSearchHit]
+    next_cursor: str | None = None
+
+
+class CourseStatsOut(BaseModel):
+    course_id: UUID
+    code: str
+    title: str
+    department: str
+    semester: str
+    is_active: bool
+    max_students: int
+    active_enrollments: int
+    waitlisted: int
+    materials: int
+    fill_ratio: float | None
+
+
+class CourseStatsReport(BaseModel):
+    refreshed_at: datetime | None
+    total_courses: int
+    total_enrollments: int
+    total_materials: int
+    courses: list[CourseStatsOut]
+
+
 class EnrollmentOut(BaseModel):
     id: UUID
     course_id: UUID
     student_id: UUID
     enrolled_at: datetime
     status: str
+    waitlist_position: int | None = None
 
     class Config:
         from_attributes = True
 
 
+class EnrollmentStatusOut(BaseModel):
+    course_id: UUID
+    student_id: UUID
+    status: str
+    # 1-based place in the queue while waitlisted.
+    position: int | None = None
+    waitlist_length: int
+    enrolled_count: int
+    max_students: int
+
+
+class BulkEnrollRequest(BaseModel):
+    student_ids: list[UUID] = Field(min_length=1, max_length=5000)
+
+
+class BulkEnrollReport(BaseModel):
+    enrolled: list[UUID]
+    # Already holding a seat in the course.
+    duplicates: list[UUID]
+    # Turned away because the course ran out of seats.
+    rejected: list[UUID]
+
+
 class MaterialOut(BaseModel):
     id: UUID
     course_id: UUID
@@ -64,6 +133,43 @@ class MaterialOut(BaseModel):
     file_type: str
     uploaded_by: UUID
     uploaded_at: datetime
+    size: int | None = None
+    sha256: str | None = None
 
     class Config:
         from_attributes = True
+
+
+class UploadCreate(BaseModel):
+    title: str
+    description: str = ""
+    file_type: str
+    filename: str = Field(min_length=1, max_length=255)
+    size: int = Field(gt=0)
+    # Optional hex sha256 of the whole file, verified when the upload is completed.
+    sha256: str | None = Field(default=None, pattern="^[0-9a-fA-F]{64}$")
+
+
+class UploadOut(BaseModel):
+    id: UUID
+    course_id: UUID
+    filename: str
+    size: int
+    received_bytes: int
+    chunk_size: int
+    expires_at: datetime
+
+
+class StudentCourseOut(BaseModel):
+    enrollment: EnrollmentOut
+    course: CourseOut
+    material_count: int
+    # Newest first.
+    latest_materials: list[MaterialOut]
+
+
+class StudentHomeOut(BaseModel):
+    student_id: UUID
+    courses: list[StudentCourseOut]
+    waitlisted: list[StudentCourseOut]
+    total_materials: int
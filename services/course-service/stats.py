@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+from sqlalchemy import text
+
+from config import settings
+from database import engine
+
+# One row per course, aggregated with a single GROUP BY per child table. The unique index is
+# what allows REFRESH ... CONCURRENTLY, so readers are never blocked by a refresh.
+COURSE_STATS_VIEW = (
+    """
+    CREATE MATERIALIZED VIEW IF NOT EXISTS course_stats AS
+    SELECT
+        c.id AS course_id,
+        c.code,
+        c.title,
+        c.department,
+        c.semester,
+        c.is_active,
+        c.max_students,
+        COALESCE(e.active, 0) AS active_enrollments,
+        COALESCE(e.waitlisted, 0) AS waitlisted,
+        COALESCE(m.materials, 0) AS materials,
+        CASE WHEN c.max_students > 0 THEN COALESCE(e.active, 0)::float / c.max_students END AS fill_ratio,
+        now() AS refreshed_at
+    FROM courses c
+    LEFT JOIN (
+        SELECT
+            course_id,
+            count(*) FILTER (WHERE status = 'active') AS active,
+            count(*) FILTER (WHERE status = 'waitlisted') AS waitlisted
+        FROM enrollments
+        GROUP BY course_id
+    ) e ON e.course_id = c.id
+    LEFT JOIN (
+        SELECT course_id, count(*) AS materials FROM materials GROUP BY course_id
+    ) m ON m.course_id = c.id
+    """,
+    "CREATE UNIQUE INDEX IF NOT EXISTS ix_course_stats_course_id ON course_stats (course_id)",
+)
+
+# Arbitrary advisory lock key, so only one replica refreshes at a time.
+REFRESH_LOCK_KEY = 7301
+
+
+async def create_course_stats_view(conn) -> None:
+    for statement in COURSE_STATS_VIEW:
+        await conn.execute(text(statement))
+
+
+class CourseStatsRefresher:
+    def __init__(self, interval: float):
+        self._interval = interval
+        self.refreshes = 0
+        self.skipped = 0
+        self.failures = 0
+        self.last_duration_ms = 0.0
+
+    async def refresh_once(self) -> bool:
+        async with engine.begin() as conn:
+            locked = (await conn.execute(text("SELECT pg_try_advisory_xact_lock(:key)"), {"key": REFRESH_LOCK_KEY})).scalar()
+            if not locked:
+                self.skipped += 1
+                return False
+            started = time.perf_counter()
+            await conn.execute(text("REFRESH MATERIALIZED VIEW CONCURRENTLY course_stats"))
+        self.last_duration_ms = round((time.perf_counter() - started) * 1000, 2)
+        self.refreshes += 1
+        return True
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.refresh_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "refreshes": self.refreshes,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "last_duration_ms": self.last_duration_ms,
+        }
+
+
+course_stats_refresher = CourseStatsRefresher(settings.course_stats_refresh_seconds)
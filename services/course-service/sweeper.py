@@ -0,0 +1,269 @@
+import asyncio
+import os
+import re
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, select, text
+from sqlalchemy.dialects.postgresql import insert
+
+from blobstore import BLOB_URL, Blob, BlobStore, LocalBackend, blob_store, scan_files
+from config import settings
+from database import AsyncSessionLocal, engine
+from models import Material, MaterialUpload
+from uploads import partial_dir, remove_partial
+
+# Garbage collector for the uploads volume (or bucket). One replica sweeps at a time, under an
+# advisory lock; every service sweeps only what it wrote, so together they cover the volume:
+#   1. blobs released for longer than the grace period: object deleted, then its row, under
+#      the row lock that orders this against a concurrent store() of the same content;
+#   2. objects in the service's namespace with no row (a store() whose transaction rolled
+#      back) are adopted as released rows, so step 1 removes them one grace period later;
+#   3. files from before the blob store (<legacy_prefix>* in the uploads root) that no row
+#      references any more;
+#   4. abandoned staging files, plus whatever sweep_extra() adds for the service.
+# A dry run only counts what would be reclaimed.
+# UploadSweeper is shared with news-service and user-service; the subclass at the bottom
+# is the course-service part.
+
+GC_LOCK_KEY = 7302
+LEGACY_URL_PREFIX = "/uploads/"
+
+
+class UploadSweeper:
+    legacy_prefix = ""
+
+    def __init__(self, store: BlobStore, interval: float, grace_hours: int, batch_size: int, dry_run: bool):
+        self.store = store
+        self.dry_run = dry_run
+        self.batch_size = batch_size
+        self._interval = interval
+        self._grace = timedelta(hours=grace_hours)
+        self.runs = 0
+        self.skipped = 0
+        self.failures = 0
+        self.files_deleted = 0
+        self.bytes_reclaimed = 0
+        self.blobs_adopted = 0
+        self.last_run: dict[str, int | float | bool | str] = {}
+
+    async def referenced_legacy(self, db, urls: list[str]) -> set[str]:
+        return set()
+
+    async def sweep_extra(self, report: dict, cutoff: datetime) -> None:
+        pass
+
+    def _reclaim(self, report: dict, size: int) -> None:
+        report["files"] += 1
+        report["bytes"] += size
+
+    async def sweep_once(self, dry_run: bool | None = None) -> dict | None:
+        dry_run = self.dry_run if dry_run is None else dry_run
+        async with engine.connect() as lock:
+            locked = (await lock.execute(text("SELECT pg_try_advisory_lock(:key)"), {"key": GC_LOCK_KEY})).scalar()
+            await lock.commit()
+            if not locked:
+                self.skipped += 1
+                return None
+            try:
+                started = time.perf_counter()
+                cutoff = datetime.utcnow() - self._grace
+                report = {"dry_run": dry_run, "scanned": 0, "files": 0, "bytes": 0, "adopted": 0}
+                await self._sweep_released(report, cutoff)
+                await self._sweep_objects(report, cutoff)
+                await self._sweep_legacy(report, cutoff)
+                await self._sweep_staging(report, cutoff)
+                await self.sweep_extra(report, cutoff)
+            finally:
+                await lock.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": GC_LOCK_KEY})
+                await lock.commit()
+        report["duration_ms"] = round((time.perf_counter() - started) * 1000, 2)
+        report["finished_at"] = datetime.utcnow().isoformat()
+        self.runs += 1
+        if not dry_run:
+            self.files_deleted += report["files"]
+            self.bytes_reclaimed += report["bytes"]
+            self.blobs_adopted += report["adopted"]
+        self.last_run = report
+        return report
+
+    async def _sweep_released(self, report: dict, cutoff: datetime) -> None:
+        last = ""
+        while True:
+            async with AsyncSessionLocal() as db:
+                query = (
+                    select(Blob)
+                    .where(Blob.refcount == 0, Blob.released_at < cutoff, Blob.digest > last)
+                    .order_by(Blob.digest)
+                    .limit(self.batch_size)
+                )
+                if not report["dry_run"]:
+                    query = query.with_for_update(skip_locked=True)
+                blobs = (await db.execute(query)).scalars().all()
+                if not blobs:
+                    return
+                last = blobs[-1].digest
+                for blob in blobs:
+                    self._reclaim(report, blob.size)
+                    if not report["dry_run"]:
+                        await self.store.backend.delete(blob.key)
+                if not report["dry_run"]:
+                    await db.execute(delete(Blob).where(Blob.digest.in_([blob.digest for blob in blobs])))
+                    await db.commit()
+
+    async def _sweep_objects(self, report: dict, cutoff: datetime) -> None:
+        cutoff_ts = _utc_timestamp(cutoff)
+        async for files in self.store.backend.scan(self.store.namespace, self.batch_size):
+            report["scanned"] += len(files)
+            candidates = {}
+            for file in files:
+                match = BLOB_URL.search("/" + file.key)
+                if match and file.mtime < cutoff_ts:
+                    candidates[file.key] = (match.group("digest"), file)
+            if not candidates:
+                continue
+            async with AsyncSessionLocal() as db:
+                digests = {digest for digest, _ in candidates.values()}
+                keys = dict((await db.execute(select(Blob.digest, Blob.key).where(Blob.digest.in_(digests)))).all())
+                orphans = []
+                for key, (digest, file) in candidates.items():
+                    if digest not in keys:
+                        orphans.append({"digest": digest, "key": key, "size": file.size, "refcount": 0, "released_at": datetime.utcnow()})
+                    elif keys[digest] != key:
+                        # Same content stored earlier under another extension; the row points elsewhere.
+                        self._reclaim(report, file.size)
+                        if not report["dry_run"]:
+                            await self.store.backend.delete(key)
+                report["adopted"] += len(orphans)
+                if orphans and not report["dry_run"]:
+                    await db.execute(insert(Blob).values(orphans).on_conflict_do_nothing(index_elements=[Blob.digest]))
+                    await db.commit()
+
+    async def _sweep_legacy(self, report: dict, cutoff: datetime) -> None:
+        if not self.legacy_prefix:
+            return
+        cutoff_ts = _utc_timestamp(cutoff)
+        async for files in scan_files(settings.upload_dir, self.batch_size, recursive=False):
+            names = {}
+            for file in files:
+                name = os.path.basename(file.key)
+                if name.startswith(self.legacy_prefix):
+                    report["scanned"] += 1
+                    if file.mtime < cutoff_ts:
+                        names[name] = file
+            if not names:
+                continue
+            async with AsyncSessionLocal() as db:
+                referenced = await self.referenced_legacy(db, [LEGACY_URL_PREFIX + name for name in names])
+            for name, file in names.items():
+                if LEGACY_URL_PREFIX + name not in referenced:
+                    self._reclaim(report, file.size)
+                    if not report["dry_run"]:
+                        await asyncio.to_thread(_unlink, file.key)
+
+    async def _sweep_staging(self, report: dict, cutoff: datetime) -> None:
+        # The S3 backend stages in the system temp dir, which is not ours to sweep.
+        if not isinstance(self.store.backend, LocalBackend):
+            return
+        await self.sweep_stale_files(report, self.store.backend.staging_dir, cutoff)
+
+    async def sweep_stale_files(self, report: dict, directory: str, cutoff: datetime, keep=None) -> None:
+        # Deletes files in `directory` older than `cutoff`; `keep(names)` may spare some by name.
+        cutoff_ts = _utc_timestamp(cutoff)
+        async for files in scan_files(directory, self.batch_size, recursive=False):
+            report["scanned"] += len(files)
+            stale = {os.path.basename(file.key): file for file in files if file.mtime < cutoff_ts}
+            if stale and keep is not None:
+                for name in await keep(list(stale)):
+                    stale.pop(name, None)
+            for file in stale.values():
+                self._reclaim(report, file.size)
+                if not report["dry_run"]:
+                    await asyncio.to_thread(_unlink, file.key)
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await self.sweep_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self.failures += 1
+
+    def stats(self) -> dict:
+        return {
+            "dry_run": self.dry_run,
+            "runs": self.runs,
+            "skipped": self.skipped,
+            "failures": self.failures,
+            "files_deleted": self.files_deleted,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "blobs_adopted": self.blobs_adopted,
+            "last_run": self.last_run,
+        }
+
+
+def _unlink(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _utc_timestamp(moment: datetime) -> float:
+    # Timestamps in the database are naive UTC; file mtimes are epoch seconds.
+    return (moment - datetime(1970, 1, 1)).total_seconds()
+
+
+class MaterialSweeper(UploadSweeper):
+    legacy_prefix = "material_"
+
+    async def referenced_legacy(self, db, urls: list[str]) -> set[str]:
+        result = await db.execute(select(Material.file_url).where(Material.file_url.in_(urls)))
+        return set(result.scalars().all())
+
+    async def sweep_extra(self, report: dict, cutoff: datetime) -> None:
+        # Resumable uploads past their expiry, then partial files that no upload row owns.
+        last = None
+        while True:
+            async with AsyncSessionLocal() as db:
+                query = (
+                    select(MaterialUpload.id, MaterialUpload.received_bytes)
+                    .where(MaterialUpload.expires_at < datetime.utcnow())
+                    .order_by(MaterialUpload.id)
+                    .limit(self.batch_size)
+                )
+                if last is not None:
+                    query = query.where(MaterialUpload.id > last)
+                if not report["dry_run"]:
+                    query = query.with_for_update(skip_locked=True)
+                expired = (await db.execute(query)).all()
+                if not expired:
+                    break
+                last = expired[-1].id
+                for upload in expired:
+                    self._reclaim(report, upload.received_bytes)
+                if not report["dry_run"]:
+                    await db.execute(delete(MaterialUpload).where(MaterialUpload.id.in_([upload.id for upload in expired])))
+                    await db.commit()
+                    for upload in expired:
+                        await remove_partial(upload.id)
+
+        async def owned(names: list[str]) -> list[str]:
+            ids = [uuid.UUID(name) for name in names if re.fullmatch(r"[0-9a-f]{32}", name)]
+            async with AsyncSessionLocal() as db:
+                result = await db.execute(select(MaterialUpload.id).where(MaterialUpload.id.in_(ids)))
+            return [upload_id.hex for upload_id in result.scalars().all()]
+
+        await self.sweep_stale_files(report, partial_dir(), cutoff, keep=owned)
+
+
+upload_sweeper = MaterialSweeper(
+    blob_store,
+    settings.upload_gc_interval_seconds,
+    settings.upload_gc_grace_hours,
+    settings.upload_gc_batch_size,
+    settings.upload_gc_dry_run,
+)
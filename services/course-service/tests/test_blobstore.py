@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from blobstore import EMPTY_SHA256, BlobStore, LocalBackend, S3Backend, StagedFile, canonical_request
+
+DIGEST = hashlib.sha256(b"hello").hexdigest()
+KEY = f"materials/{DIGEST[:2]}/{DIGEST}.pdf"
+SECRET = "wJalrXUtnFEMI/K7MDENG+bPxRfiCYEXAMPLEKEY"
+NOW = datetime(2026, 10, 18, 12, 0, 0)
+
+
+def sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+class Result:
+    def __init__(self, value=None, row=None):
+        self._value = value
+        self._row = row
+
+    def scalar_one_or_none(self):
+        return self._value
+
+    def one(self):
+        return self._row
+
+
+class RecordingSession:
+    def __init__(self, results, log):
+        self.statements = []
+        self._results = iter(results)
+        self._log = log
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        self._log.append(("execute", type(stmt).__name__))
+        return next(self._results, Result())
+
+
+class FakeBackend:
+    def __init__(self, log, objects=()):
+        self.objects = set(objects)
+        self._log = log
+
+    async def exists(self, key):
+        return key in self.objects
+
+    async def put(self, key, staged, content_type):
+        self._log.append(("put", key))
+        self.objects.add(key)
+
+    async def delete(self, key):
+        self._log.append(("delete", key))
+        self.objects.discard(key)
+
+
+@pytest.fixture
+def staged(tmp_path):
+    path = tmp_path / "staged"
+    path.write_bytes(b"hello")
+    return StagedFile(path=str(path), size=5, digest=DIGEST)
+
+
+def store_with(staged, existing, row, objects=()):
+    log = []
+    backend = FakeBackend(log, objects)
+    store = BlobStore(backend, "materials")
+    db = RecordingSession([Result(existing), Result(row=row)], log)
+    blob = asyncio.run(store.store(db, staged, ".pdf", "application/pdf"))
+    return blob, store, backend, db, log
+
+
+def test_new_content_is_uploaded_before_the_row_is_locked(staged):
+    blob, store, backend, db, log = store_with(staged, None, (SimpleNamespace(key=KEY), True))
+    assert log == [("execute", "Select"), ("put", KEY), ("execute", "Insert")]
+    upsert = sql(db.statements[1])
+    assert "ON CONFLICT (digest) DO UPDATE SET refcount = (blobs.refcount + " in upsert
+    assert "released_at = " in upsert
+    assert db.statements[1].compile().params["refcount"] == 1
+    assert (store.stored, store.deduplicated) == (1, 0)
+    assert not os.path.exists(staged.path)
+
+
+def test_known_content_only_takes_a_reference(staged):
+    blob, store, backend, db, log = store_with(staged, KEY, (SimpleNamespace(key=KEY), False), objects={KEY})
+    assert [entry for entry in log if entry[0] != "execute"] == []
+    assert (store.stored, store.deduplicated, store.bytes_saved) == (0, 1, 5)
+
+
+def test_losing_the_insert_race_removes_the_orphan(staged):
+    # Another store() of the same bytes, with another extension, inserted the row first.
+    winner = f"materials/{DIGEST[:2]}/{DIGEST}.txt"
+    blob, store, backend, db, log = store_with(staged, None, (SimpleNamespace(key=winner), False), objects={winner})
+    assert log[-1] == ("delete", KEY)
+    assert backend.objects == {winner}
+    assert blob.key == winner
+    assert (store.stored, store.deduplicated) == (0, 1)
+
+
+def test_row_swept_after_the_lookup_is_uploaded_again(staged):
+    # The lookup found the blob, but the sweeper removed it before the upsert inserted anew.
+    blob, store, backend, db, log = store_with(staged, KEY, (SimpleNamespace(key=KEY), True), objects={KEY})
+    assert log == [("execute", "Select"), ("execute", "Insert"), ("put", KEY)]
+    assert store.stored == 1
+
+
+def test_failed_upload_takes_no_reference(staged):
+    class Failing(FakeBackend):
+        async def put(self, key, staged, content_type):
+            raise OSError("disk full")
+
+    log = []
+    db = RecordingSession([Result(None)], log)
+    with pytest.raises(OSError):
+        asyncio.run(BlobStore(Failing(log), "materials").store(db, staged, ".pdf"))
+    assert log == [("execute", "Select")]
+
+
+def test_release_drops_one_reference_and_dates_the_last():
+    log = []
+    db = RecordingSession([], log)
+    asyncio.run(BlobStore(FakeBackend(log), "materials").release(db, f"/uploads/{KEY}"))
+    statement = sql(db.statements[0])
+    assert "refcount=(blobs.refcount - " in statement
+    assert "released_at=CASE WHEN (blobs.refcount <= " in statement
+    assert "WHERE blobs.digest = " in statement and "blobs.refcount > " in statement
+    assert db.statements[0].compile().params["digest_1"] == DIGEST
+
+    asyncio.run(BlobStore(FakeBackend(log), "materials").release(db, "/uploads/3f2a9c.pdf"))
+    assert len(db.statements) == 1
+
+
+def test_local_put_keeps_the_staged_file(tmp_path, staged):
+    backend = LocalBackend(str(tmp_path / "root"), "/uploads")
+    asyncio.run(backend.put(KEY, staged, None))
+    asyncio.run(backend.put(KEY, staged, None))
+    assert (tmp_path / "root" / KEY).read_bytes() == b"hello"
+    assert (tmp_path / "staged").exists()
+
+
+# Reference values computed with botocore's S3SigV4Auth for the same request.
+def test_sigv4_canonical_request_and_signature():
+    backend = S3Backend("http://minio:9000", "faculty", "AKIDEXAMPLE", SECRET, "us-east-1", "/uploads")
+    path = backend._object_path(KEY)
+    headers = {"x-amz-date": "20261018T120000Z", "host": "minio:9000", "x-amz-content-sha256": DIGEST}
+    assert canonical_request("PUT", path, "", headers, DIGEST) == (
+        f"PUT\n/faculty/{KEY}\n\n"
+        f"host:minio:9000\nx-amz-content-sha256:{DIGEST}\nx-amz-date:20261018T120000Z\n\n"
+        f"host;x-amz-content-sha256;x-amz-date\n{DIGEST}"
+    )
+    signed = backend._signed_headers("PUT", path, DIGEST, now=NOW)
+    assert signed["authorization"] == (
+        "AWS4-HMAC-SHA256 Credential=AKIDEXAMPLE/20261018/us-east-1/s3/aws4_request, "
+        "SignedHeaders=host;x-amz-content-sha256;x-amz-date, "
+        "Signature=30584f6bcb670c4b5a96a9e506edac354cd47c5bd298dce4d4a01b9a07fcf73e"
+    )
+    assert "host" not in signed
+
+    query = "list-type=2&max-keys=1000&prefix=materials%2F"
+    listing = backend._signed_headers("GET", "/faculty", EMPTY_SHA256, query, now=NOW)
+    assert listing["authorization"].endswith("Signature=02213b4169d7e292223e830be5bb099b8409ec18e91a85ac444aa2dbcfdc24b3")
+
+
+def test_sigv4_matches_botocore():
+    auth = pytest.importorskip("botocore.auth")
+    from botocore.awsrequest import AWSRequest
+    from botocore.credentials import Credentials
+
+    backend = S3Backend("http://minio:9000", "faculty", "AKIDEXAMPLE", SECRET, "us-east-1", "/uploads")
+    path = backend._object_path(KEY)
+    request = AWSRequest(
+        method="PUT",
+        url=f"http://minio:9000{path}",
+        headers={"X-Amz-Content-SHA256": DIGEST, "X-Amz-Date": "20261018T120000Z"},
+    )
+    request.context["timestamp"] = "20261018T120000Z"
+    signer = auth.S3SigV4Auth(Credentials("AKIDEXAMPLE", SECRET), "s3", "us-east-1")
+    canonical = signer.canonical_request(request)
+    signature = signer.signature(signer.string_to_sign(request, canonical), request)
+    assert backend._signed_headers("PUT", path, DIGEST, now=NOW)["authorization"].endswith(f"Signature={signature}")
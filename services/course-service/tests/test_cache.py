@@ -0,0 +1,124 @@
+import asyncio
+
+from cache import ReadCache, cache_key
+
+
+class FakeRedis:
+    # Just the commands ReadCache uses; expiry is not modelled.
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    async def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class FakePipeline:
+    def __init__(self, r):
+        self._redis = r
+        self._keys = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self._keys.append(key)
+
+    async def execute(self):
+        for key in self._keys:
+            self._redis.data[key] = str(int(self._redis.data.get(key, "0")) + 1)
+
+
+class Loader:
+    def __init__(self, delay=0.0):
+        self.calls = 0
+        self._delay = delay
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self._delay)
+        return {"version": self.calls}
+
+
+def test_invalidating_a_scope_only_drops_entries_that_depend_on_it():
+    cache = ReadCache(FakeRedis(), fresh_seconds=30, stale_seconds=300, lock_seconds=1)
+    catalog, course = Loader(), Loader()
+
+    async def scenario():
+        pages = cache_key("courses", skip=0)
+        detail = cache_key("course", id="c1")
+        assert await cache.get(pages, ("courses",), catalog) == {"version": 1}
+        assert await cache.get(detail, ("course:c1",), course) == {"version": 1}
+        await cache.invalidate("course:c1")
+        assert await cache.get(pages, ("courses",), catalog) == {"version": 1}
+        assert await cache.get(detail, ("course:c1",), course) == {"version": 2}
+        await cache.invalidate("courses")
+        assert await cache.get(pages, ("courses",), catalog) == {"version": 2}
+
+    asyncio.run(scenario())
+    assert (catalog.calls, course.calls) == (2, 2)
+    assert cache.stats()["hits"] == 1
+
+
+def test_stale_entry_is_served_while_it_refreshes():
+    cache = ReadCache(FakeRedis(), fresh_seconds=0, stale_seconds=300, lock_seconds=1)
+    load = Loader()
+
+    async def scenario():
+        key = cache_key("courses", skip=0)
+        assert await cache.get(key, ("courses",), load) == {"version": 1}
+        # Already past its freshness: the old data comes back and a refresh starts behind it.
+        assert await cache.get(key, ("courses",), load) == {"version": 1}
+        await asyncio.sleep(0.01)
+        assert await cache.get(key, ("courses",), load) == {"version": 2}
+
+    asyncio.run(scenario())
+    assert cache.stats()["stale_hits"] == 2
+    assert cache.stats()["inflight"] == 0
+
+
+def test_concurrent_misses_share_one_load():
+    cache = ReadCache(FakeRedis(), fresh_seconds=30, stale_seconds=300, lock_seconds=1)
+    load = Loader(delay=0.02)
+
+    async def scenario():
+        key = cache_key("courses", skip=0)
+        return await asyncio.gather(*(cache.get(key, ("courses",), load) for _ in range(5)))
+
+    assert asyncio.run(scenario()) == [{"version": 1}] * 5
+    assert load.calls == 1
+    assert cache.stats()["coalesced"] == 4
+
+
+def test_miss_waits_for_a_peer_replica_that_holds_the_lock():
+    r = FakeRedis()
+    cache = ReadCache(r, fresh_seconds=30, stale_seconds=300, lock_seconds=1)
+    peer = ReadCache(r, fresh_seconds=30, stale_seconds=300, lock_seconds=1)
+    load = Loader(delay=0.05)
+
+    async def scenario():
+        key = cache_key("courses", skip=0)
+        first = asyncio.create_task(peer.get(key, ("courses",), load))
+        await asyncio.sleep(0.01)
+        return await asyncio.gather(first, cache.get(key, ("courses",), load))
+
+    assert asyncio.run(scenario()) == [{"version": 1}, {"version": 1}]
+    assert load.calls == 1
+    assert cache.stats()["loads"] == 0
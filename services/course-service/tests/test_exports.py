@@ -0,0 +1,31 @@
+import csv
+import io
+import zipfile
+
+from exports import CsvEncoder, XlsxEncoder
+
+ROWS = [
+    ("CS101", "Intro", "2026F", "id-1", "=HYPERLINK(\"http://x\",\"y\")", "+1@example.com", "-5", "active", None, 3),
+    ("CS101", "Intro", "2026F", "id-2", "@SUM(A1)", "ada@example.com", "S2", "active", None, None),
+]
+
+
+def test_csv_escapes_formula_like_cells():
+    encoder = CsvEncoder()
+    data = encoder.start(["a"] * 10) + encoder.rows(ROWS) + encoder.finish()
+    rows = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+    assert rows[1][4] == "'=HYPERLINK(\"http://x\",\"y\")"
+    assert rows[1][5] == "'+1@example.com"
+    assert rows[1][6] == "'-5"
+    assert rows[2][4] == "'@SUM(A1)"
+    assert rows[2][5] == "ada@example.com"
+    assert rows[1][9] == "3"
+
+
+def test_xlsx_keeps_formula_like_cells_as_inline_text():
+    encoder = XlsxEncoder()
+    data = encoder.start(["a"] * 10) + encoder.rows(ROWS) + encoder.finish()
+    sheet = zipfile.ZipFile(io.BytesIO(data)).read("xl/worksheets/sheet1.xml").decode()
+    assert "<f>" not in sheet
+    assert '<c t="inlineStr"><is><t xml:space="preserve">=HYPERLINK("http://x","y")</t></is></c>' in sheet
+    assert "<c><v>3</v></c>" in sheet
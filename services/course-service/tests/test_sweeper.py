@@ -0,0 +1,192 @@
+import asyncio
+import os
+import uuid
+from collections import namedtuple
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import TextClause
+from sqlalchemy.orm.evaluator import _EvaluatorCompiler
+
+import sweeper
+from blobstore import Blob, BlobStore, LocalBackend
+from config import settings
+from models import Material, MaterialUpload
+from sweeper import MaterialSweeper
+from uploads import partial_dir, partial_path
+
+GRACE_HOURS = 24
+OLD = datetime.utcnow() - timedelta(hours=GRACE_HOURS + 1)
+RECENT = datetime.utcnow() - timedelta(hours=1)
+
+
+class Result:
+    def __init__(self, rows):
+        self._rows = rows
+
+    def scalars(self):
+        return SimpleNamespace(all=lambda: self._rows)
+
+    def all(self):
+        return self._rows
+
+    def scalar(self):
+        return True
+
+
+class FakeDatabase:
+    # In-memory tables; WHERE clauses are evaluated in Python with SQLAlchemy's ORM evaluator
+    # (the one behind synchronize_session="evaluate"), so the sweeper's own criteria decide.
+    def __init__(self):
+        self.tables = {Blob: [], MaterialUpload: [], Material: []}
+        self.locking_selects = 0
+
+    def _matching(self, model, clause):
+        test = _EvaluatorCompiler(model).process(clause) if clause is not None else (lambda row: True)
+        return sorted((row for row in self.tables[model] if test(row)), key=lambda row: str(row.__mapper__.primary_key_from_instance(row)))
+
+    async def execute(self, stmt, params=None):
+        if isinstance(stmt, TextClause):
+            # The advisory lock.
+            return Result([])
+        if stmt.is_select:
+            columns = stmt.column_descriptions
+            rows = self._matching(columns[0]["entity"], stmt.whereclause)
+            if stmt._for_update_arg is not None:
+                self.locking_selects += 1
+            if columns[0]["expr"] is columns[0]["entity"]:
+                return Result(rows)
+            if len(columns) == 1:
+                return Result([getattr(row, columns[0]["name"]) for row in rows])
+            Row = namedtuple("Row", [column["name"] for column in columns])
+            return Result([Row(*(getattr(row, field) for field in Row._fields)) for row in rows])
+        model = stmt.entity_description["entity"]
+        if stmt.is_delete:
+            for row in self._matching(model, stmt.whereclause):
+                self.tables[model].remove(row)
+        else:
+            existing = {row.digest for row in self.tables[model]}
+            for values in stmt._multi_values[0]:
+                row = model(**{column.key: value for column, value in values.items()})
+                if row.digest not in existing:
+                    self.tables[model].append(row)
+        return Result([])
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def commit(self):
+        pass
+
+    def connect(self):
+        return self
+
+
+def write(path, data=b"x" * 10, mtime=OLD):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+    stamp = (mtime - datetime(1970, 1, 1)).total_seconds()
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+def key(digest):
+    return f"materials/{digest[:2]}/{digest}.pdf"
+
+
+def blob(digest, refcount, released_at):
+    return Blob(digest=digest, key=key(digest), size=10, refcount=refcount, released_at=released_at)
+
+
+def upload(expires_at):
+    return MaterialUpload(id=uuid.uuid4(), received_bytes=10, expires_at=expires_at)
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    return tmp_path
+
+
+def run_sweep(monkeypatch, root, db, dry_run=False):
+    monkeypatch.setattr(sweeper, "AsyncSessionLocal", db)
+    monkeypatch.setattr(sweeper, "engine", db)
+    store = BlobStore(LocalBackend(str(root), "/uploads"), "materials")
+    gc = MaterialSweeper(store, interval=60, grace_hours=GRACE_HOURS, batch_size=100, dry_run=dry_run)
+    return asyncio.run(gc.sweep_once())
+
+
+def test_only_unreferenced_blobs_past_the_grace_period_are_deleted(monkeypatch, root):
+    # Released long ago, released within the grace period, re-referenced since, never released.
+    blobs = [blob("a" * 64, 0, OLD), blob("b" * 64, 0, RECENT), blob("c" * 64, 2, OLD), blob("d" * 64, 1, None)]
+    for row in blobs:
+        write(str(root / row.key), mtime=OLD)
+    db = FakeDatabase()
+    db.tables[Blob] = list(blobs)
+
+    report = run_sweep(monkeypatch, root, db)
+    assert db.tables[Blob] == blobs[1:]
+    assert [os.path.exists(root / row.key) for row in blobs] == [False, True, True, True]
+    assert (report["files"], report["bytes"], report["adopted"]) == (1, 10, 0)
+    assert db.locking_selects > 0
+
+
+def test_dry_run_deletes_nothing(monkeypatch, root):
+    expired = blob("a" * 64, 0, OLD)
+    write(str(root / expired.key))
+    stale_partial = write(os.path.join(partial_dir(), uuid.uuid4().hex))
+    db = FakeDatabase()
+    db.tables[Blob] = [expired]
+    db.tables[MaterialUpload] = [upload(OLD)]
+
+    report = run_sweep(monkeypatch, root, db, dry_run=True)
+    assert report["dry_run"] and report["files"] == 3
+    assert len(db.tables[Blob]) == 1 and len(db.tables[MaterialUpload]) == 1
+    assert os.path.exists(root / expired.key) and os.path.exists(stale_partial)
+    assert db.locking_selects == 0
+
+
+def test_unreferenced_objects_are_adopted_not_deleted(monkeypatch, root):
+    old_orphan = write(str(root / key("e" * 64)))
+    new_orphan = write(str(root / key("f" * 64)), mtime=RECENT)
+    db = FakeDatabase()
+
+    report = run_sweep(monkeypatch, root, db)
+    # Adopted as released rows, so the next run one grace period later removes them.
+    assert [(row.digest, row.refcount) for row in db.tables[Blob]] == [("e" * 64, 0)]
+    assert os.path.exists(old_orphan) and os.path.exists(new_orphan)
+    assert report["adopted"] == 1 and report["files"] == 0
+
+
+def test_partial_uploads_in_grace_or_still_owned_are_kept(monkeypatch, root):
+    live, expired = upload(datetime.utcnow() + timedelta(hours=1)), upload(OLD)
+    # An old partial file whose upload is still open, e.g. a slow client resuming.
+    owned = write(partial_path(live.id))
+    finished = write(partial_path(expired.id))
+    abandoned = write(os.path.join(partial_dir(), uuid.uuid4().hex))
+    fresh = write(os.path.join(partial_dir(), uuid.uuid4().hex), mtime=RECENT)
+    db = FakeDatabase()
+    db.tables[MaterialUpload] = [live, expired]
+
+    run_sweep(monkeypatch, root, db)
+    assert db.tables[MaterialUpload] == [live]
+    assert [os.path.exists(path) for path in (owned, finished, abandoned, fresh)] == [True, False, False, True]
+
+
+def test_legacy_files_still_referenced_are_kept(monkeypatch, root):
+    kept = write(str(root / "material_kept.pdf"))
+    dropped = write(str(root / "material_dropped.pdf"))
+    recent = write(str(root / "material_recent.pdf"), mtime=RECENT)
+    db = FakeDatabase()
+    db.tables[Material] = [Material(file_url="/uploads/material_kept.pdf")]
+
+    run_sweep(monkeypatch, root, db)
+    assert [os.path.exists(path) for path in (kept, dropped, recent)] == [True, False, True]
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import subprocess
+import sys
+import uuid
+
+import pytest
+
+from config import settings
+from uploads import UploadBusy, create_partial, partial_path, upload_hashes, write_chunk
+
+# Holds an exclusive flock on argv[1] until stdin closes, like another worker mid-chunk.
+HOLD_LOCK = """
+import fcntl, sys
+with open(sys.argv[1], "r+b") as f:
+    fcntl.flock(f, fcntl.LOCK_EX)
+    print("locked", flush=True)
+    sys.stdin.read()
+"""
+
+
+@pytest.fixture(autouse=True)
+def upload_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+
+
+async def body(*pieces, gate=None):
+    for piece in pieces:
+        if gate is not None:
+            await gate.wait()
+        yield piece
+
+
+def test_concurrent_writes_to_one_upload_are_refused():
+    upload_id = uuid.uuid4()
+
+    async def scenario():
+        await create_partial(upload_id)
+        gate = asyncio.Event()
+        locked = asyncio.Event()
+
+        async def first():
+            async with upload_hashes.lock(upload_id):
+                locked.set()
+                return await write_chunk(upload_id, 0, body(b"hello ", b"world", gate=gate), 100)
+
+        writing = asyncio.create_task(first())
+        await locked.wait()
+        # A retry of the same chunk while the first write is still streaming.
+        with pytest.raises(UploadBusy):
+            async with upload_hashes.lock(upload_id):
+                await write_chunk(upload_id, 0, body(b"HELLO"), 100)
+        gate.set()
+        return await writing
+
+    received, digest = asyncio.run(scenario())
+    assert received == 11
+    with open(partial_path(upload_id), "rb") as f:
+        assert f.read() == b"hello world"
+    assert digest == hashlib.sha256(b"hello world").hexdigest()
+    assert upload_hashes.stats()["writing"] == 0
+
+
+def test_lock_is_held_against_other_processes():
+    upload_id = uuid.uuid4()
+    asyncio.run(create_partial(upload_id))
+    holder = subprocess.Popen(
+        [sys.executable, "-c", HOLD_LOCK, partial_path(upload_id)],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert holder.stdout.readline().strip() == "locked"
+
+        async def attempt():
+            async with upload_hashes.lock(upload_id):
+                pass
+
+        with pytest.raises(UploadBusy):
+            asyncio.run(attempt())
+    finally:
+        holder.stdin.close()
+        holder.wait(timeout=5)
+    asyncio.run(attempt())
+
+
+def test_lock_on_a_removed_upload_reports_it_gone():
+    async def attempt():
+        async with upload_hashes.lock(uuid.uuid4()):
+            pass
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(attempt())
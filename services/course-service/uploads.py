@@ -0,0 +1,164 @@
+import asyncio
+import fcntl
+import hashlib
+import os
+import uuid
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from config import settings
+
+# Bytes handed to a worker thread per write; bounds memory per upload regardless of file size.
+WRITE_BUFFER = 1024 * 1024
+
+
+def partial_dir() -> str:
+    return os.path.join(settings.upload_dir, ".partial")
+
+
+def partial_path(upload_id: uuid.UUID) -> str:
+    return os.path.join(partial_dir(), upload_id.hex)
+
+
+def _write_at(path: str, offset: int, data: bytes, hasher) -> None:
+    with open(path, "r+b") as out:
+        out.seek(offset)
+        out.write(data)
+    hasher.update(data)
+
+
+def _hash_prefix(path: str, length: int):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as src:
+        remaining = length
+        while remaining:
+            block = src.read(min(WRITE_BUFFER, remaining))
+            if not block:
+                break
+            hasher.update(block)
+            remaining -= len(block)
+    return hasher
+
+
+def _create(path: str) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    open(path, "wb").close()
+
+
+def _lock(path: str) -> int:
+    fd = os.open(path, os.O_RDWR)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise UploadBusy()
+    return fd
+
+
+def _truncate(path: str, length: int) -> None:
+    with open(path, "r+b") as out:
+        out.truncate(length)
+
+
+class PayloadTooLarge(Exception):
+    pass
+
+
+class UploadBusy(Exception):
+    pass
+
+
+# Running sha256 per in-progress upload, keyed by id and the offset it has hashed up to.
+# hashlib state cannot be persisted, so after a restart (or on another replica) the hash is
+# rebuilt once from the partial file and then carried forward chunk by chunk again.
+class UploadHashes:
+    def __init__(self, max_entries: int):
+        self._entries: OrderedDict[uuid.UUID, tuple[int, object]] = OrderedDict()
+        self._max_entries = max_entries
+        self._writing: set[uuid.UUID] = set()
+        self.rebuilds = 0
+
+    async def get(self, upload_id: uuid.UUID, offset: int):
+        entry = self._entries.pop(upload_id, None)
+        if entry is not None and entry[0] == offset:
+            return entry[1]
+        self.rebuilds += 1
+        return await asyncio.to_thread(_hash_prefix, partial_path(upload_id), offset)
+
+    def put(self, upload_id: uuid.UUID, offset: int, hasher) -> None:
+        self._entries[upload_id] = (offset, hasher)
+        self._entries.move_to_end(upload_id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, upload_id: uuid.UUID) -> None:
+        self._entries.pop(upload_id, None)
+
+    @asynccontextmanager
+    async def lock(self, upload_id: uuid.UUID):
+        # One writer per upload across workers and replicas: an exclusive flock on the partial
+        # file (upload_dir is shared), held while a chunk is written and its offset recorded,
+        # or while the upload completes. A second caller gets UploadBusy instead of waiting.
+        fd = await asyncio.to_thread(_lock, partial_path(upload_id))
+        self._writing.add(upload_id)
+        try:
+            yield
+        finally:
+            self._writing.discard(upload_id)
+            os.close(fd)
+
+    def stats(self) -> dict[str, int]:
+        return {"tracked": len(self._entries), "writing": len(self._writing), "rebuilds": self.rebuilds}
+
+
+upload_hashes = UploadHashes(settings.upload_hash_cache_entries)
+
+
+async def create_partial(upload_id: uuid.UUID) -> None:
+    await asyncio.to_thread(_create, partial_path(upload_id))
+
+
+async def write_chunk(upload_id: uuid.UUID, offset: int, stream: AsyncIterator[bytes], max_bytes: int) -> tuple[int, str]:
+    # Appends the request body at `offset`, buffering at most WRITE_BUFFER bytes in memory;
+    # file I/O and hashing run in worker threads so the event loop keeps serving requests.
+    # Returns the new offset and the hex digest of everything received so far. The caller
+    # holds upload_hashes.lock(upload_id).
+    path = partial_path(upload_id)
+    position = offset
+    buffer = bytearray()
+    try:
+        hasher = await upload_hashes.get(upload_id, offset)
+        await asyncio.to_thread(_truncate, path, offset)
+        async for piece in stream:
+            buffer += piece
+            if position - offset + len(buffer) > max_bytes:
+                raise PayloadTooLarge()
+            if len(buffer) >= WRITE_BUFFER:
+                await asyncio.to_thread(_write_at, path, position, bytes(buffer), hasher)
+                position += len(buffer)
+                buffer.clear()
+        if buffer:
+            await asyncio.to_thread(_write_at, path, position, bytes(buffer), hasher)
+            position += len(buffer)
+    except BaseException:
+        # A broken chunk leaves the file ragged past `offset`; the caller keeps the old offset
+        # and the next attempt truncates back to it.
+        upload_hashes.discard(upload_id)
+        raise
+    upload_hashes.put(upload_id, position, hasher)
+    return position, hasher.copy().hexdigest()
+
+
+async def file_digest(upload_id: uuid.UUID, offset: int) -> str:
+    hasher = await upload_hashes.get(upload_id, offset)
+    upload_hashes.put(upload_id, offset, hasher)
+    return hasher.copy().hexdigest()
+
+
+async def remove_partial(upload_id: uuid.UUID) -> None:
+    upload_hashes.discard(upload_id)
+    try:
+        await asyncio.to_thread(os.remove, partial_path(upload_id))
+    except FileNotFoundError:
+        pass
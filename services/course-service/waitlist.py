@@ -0,0 +1,119 @@
+import asyncio
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime
+
+import redis.asyncio as redis
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config import settings
+from models import Course, Enrollment
+from schemas import EnrollmentStatusOut
+
+WAITLIST_CHANNEL = "waitlist"
+
+
+async def promote_waitlist(db: AsyncSession, course_id: uuid.UUID, seats: int) -> list[uuid.UUID]:
+    # Moves up to `seats` students from the head of the queue into seats. The caller must hold
+    # the course row lock, so waitlist joins committed before it are visible and none slip past.
+    if seats <= 0:
+        return []
+    head = (
+        select(Enrollment.id)
+        .where(Enrollment.course_id == course_id, Enrollment.status == "waitlisted")
+        .order_by(Enrollment.waitlist_position)
+        .limit(seats)
+        .with_for_update(skip_locked=True)
+    )
+    result = await db.execute(
+        update(Enrollment)
+        .where(Enrollment.id.in_(head.scalar_subquery()))
+        .values(status="active", waitlist_position=None, enrolled_at=datetime.utcnow())
+        .returning(Enrollment.student_id)
+    )
+    return list(result.scalars().all())
+
+
+async def enrollment_status(db: AsyncSession, course_id: uuid.UUID, student_id: uuid.UUID) -> EnrollmentStatusOut | None:
+    result = await db.execute(select(Course.enrolled_count, Course.max_students).where(Course.id == course_id))
+    course = result.one_or_none()
+    if course is None:
+        return None
+    result = await db.execute(
+        select(Enrollment.status, Enrollment.waitlist_position)
+        .where(Enrollment.course_id == course_id, Enrollment.student_id == student_id, Enrollment.status.in_(["active", "waitlisted"]))
+    )
+    enrollment = result.one_or_none()
+    # Both counts are served by the partial waitlist index.
+    waitlisted = select(func.count()).where(Enrollment.course_id == course_id, Enrollment.status == "waitlisted")
+    waitlist_length = (await db.execute(waitlisted)).scalar_one()
+    position = None
+    if enrollment is not None and enrollment.status == "waitlisted":
+        position = (await db.execute(waitlisted.where(Enrollment.waitlist_position <= enrollment.waitlist_position))).scalar_one()
+    return EnrollmentStatusOut(
+        course_id=course_id,
+        student_id=student_id,
+        status=enrollment.status if enrollment else "none",
+        position=position,
+        waitlist_length=waitlist_length,
+        enrolled_count=course.enrolled_count,
+        max_students=course.max_students,
+    )
+
+
+# Fans waitlist changes out to status streams. Each process holds one subscription and wakes
+# only the local watchers of the changed course, instead of one Redis connection per client.
+class WaitlistEvents:
+    def __init__(self, r: redis.Redis):
+        self._redis = r
+        self._watchers: dict[str, set[asyncio.Event]] = defaultdict(set)
+        self.published = 0
+        self.delivered = 0
+
+    async def publish(self, course_id: uuid.UUID) -> None:
+        try:
+            await self._redis.publish(WAITLIST_CHANNEL, str(course_id))
+            self.published += 1
+        except redis.RedisError:
+            # Watchers still re-check on their keepalive timeout.
+            pass
+
+    @contextmanager
+    def watch(self, course_id: uuid.UUID):
+        event = asyncio.Event()
+        self._watchers[str(course_id)].add(event)
+        try:
+            yield event
+        finally:
+            watchers = self._watchers[str(course_id)]
+            watchers.discard(event)
+            if not watchers:
+                del self._watchers[str(course_id)]
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                await pubsub.subscribe(WAITLIST_CHANNEL)
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    for event in self._watchers.get(message["data"], ()):
+                        event.set()
+                        self.delivered += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                await asyncio.sleep(2)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "watchers": sum(len(watchers) for watchers in self._watchers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+        }
+
+
+waitlist_events = WaitlistEvents(redis.from_url(settings.redis_url, decode_responses=True))
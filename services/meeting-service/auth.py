@@ -1,17 +1,21 @@
-from jose import JWTError, jwt
 from fastapi import Depends, HTTPException
 from fastapi.security import HTTPBearer
+from jwt import InvalidTokenError
 
-from config import settings
+from revocation import revocation_filter
+from token_verifier import token_verifier
 
 security = HTTPBearer()
 
 
 async def get_current_user(token=Depends(security)):
     try:
-        return jwt.decode(token.credentials, settings.secret_key, algorithms=[settings.jwt_algorithm])
-    except JWTError as exc:
+        payload = token_verifier.verify(token.credentials)
+    except InvalidTokenError as exc:
         raise HTTPException(status_code=401, detail="Invalid token") from exc
+    if await revocation_filter.is_revoked(payload.get("jti")):
+        raise HTTPException(status_code=401, detail="Token revoked")
+    return payload
 
 
 def require_role(*roles):
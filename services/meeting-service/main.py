@@ -5,9 +5,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import OperationalError
 
-from database import Base, engine
+from database import Base, engine, sync_columns, sync_indexes
+from recurrence import series_cache
+from revocation import revocation_filter
 from routers.meetings import router as meetings_router
 from routers.sessions import router as sessions_router
+from token_verifier import token_verifier
 
 
 @asynccontextmanager
@@ -16,12 +19,16 @@ async def lifespan(app: FastAPI):
         try:
             async with engine.begin() as conn:
                 await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(sync_columns)
+                await conn.run_sync(sync_indexes)
             break
         except OperationalError:
             await asyncio.sleep(2)
     else:
         raise RuntimeError("Database is not reachable for meeting-service")
+    listener = asyncio.create_task(revocation_filter.listen())
     yield
+    listener.cancel()
 
 
 app = FastAPI(title="meeting-service", lifespan=lifespan)
@@ -40,3 +47,12 @@ app.include_router(sessions_router)
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "meeting-service"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "token_verifier": token_verifier.stats(),
+        "revocations": revocation_filter.stats(),
+        "recurrence": series_cache.stats(),
+    }
@@ -1,15 +1,28 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import DateTime, Integer, String, Text
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy import DateTime, Index, Integer, String, Text, and_, text
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
 from database import Base
 
 
+# Spelled out as SQL (not a bound parameter) so the planner can match it to the partial index.
+NOT_CANCELLED = text("status <> 'cancelled'")
+RECURRING = text("rrule IS NOT NULL")
+
+
 class Meeting(Base):
     __tablename__ = "meetings"
+    __table_args__ = (
+        # Calendar range scans: per course, by start time, cancelled meetings left out.
+        Index("ix_meetings_course_scheduled", "course_id", "scheduled_at", "id", postgresql_where=NOT_CANCELLED),
+        # Series rows, few per course, checked against every calendar window.
+        Index("ix_meetings_course_series", "course_id", "scheduled_at", postgresql_where=and_(NOT_CANCELLED, RECURRING)),
+        # One replacement row per moved occurrence.
+        Index("uq_meetings_series_original", "series_id", "original_start", unique=True),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
@@ -21,6 +34,16 @@ class Meeting(Base):
     duration_minutes: Mapped[int] = mapped_column(Integer, nullable=False)
     is_recurring: Mapped[bool] = mapped_column(default=False)
     status: Mapped[str] = mapped_column(String(20), default="scheduled")
+    # Recurrence (see recurrence.py): scheduled_at is the first occurrence, recurrence_end the
+    # last one expanded (open-ended rules stop at the series horizon) and exdates the skipped or
+    # moved occurrences. time_zone is the IANA zone whose wall clock the rule follows.
+    rrule: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    time_zone: Mapped[str] = mapped_column(String(64), default="UTC", server_default="UTC")
+    recurrence_end: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
+    exdates: Mapped[list[datetime]] = mapped_column(ARRAY(DateTime), default=list, server_default=text("'{}'"))
+    # Set on the row that replaces a moved occurrence of a series.
+    series_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), nullable=True)
+    original_start: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
 
 class SessionReservation(Base):
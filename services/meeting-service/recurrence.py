@@ -0,0 +1,165 @@
+import re
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from itertools import islice, takewhile
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from dateutil.rrule import rrule, rruleset, rrulestr
+
+from config import settings
+
+# Recurring meetings are stored once: the row's scheduled_at is DTSTART, `rrule` the RFC 5545
+# rule and `exdates` the occurrences that were skipped or moved (a moved occurrence also gets
+# its own row pointing back at the series). Occurrences are expanded on read, only inside the
+# requested window. Stored times are naive UTC, like the rest of the table; a series repeats
+# on the wall clock of its time_zone (10:00 Berlin stays 10:00 across DST), so rules are
+# expanded from a zone-aware DTSTART and the occurrences converted back to UTC.
+#
+# dateutil walks a rule from DTSTART on every query, so the work per read is bounded instead:
+# at most one occurrence a day (single BYHOUR/BYMINUTE/BYSECOND values), nothing expanded past
+# SERIES_HORIZON after the start, and at most MAX_WINDOW_OCCURRENCES per series per window.
+
+ALLOWED_FREQUENCIES = {"DAILY", "WEEKLY", "MONTHLY", "YEARLY"}
+MAX_OCCURRENCES = 1000
+MAX_RULE_LENGTH = 255  # Meeting.rrule
+SERIES_HORIZON = timedelta(days=3 * 366)
+MAX_WINDOW_OCCURRENCES = 100  # a calendar window is at most 92 days
+TIME_OF_DAY_PARTS = ("BYHOUR", "BYMINUTE", "BYSECOND")
+UNTIL = re.compile(r"UNTIL=(\d{8})(T\d{6})?(Z?)")
+
+
+def zone(name: str) -> ZoneInfo:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValueError(f"Unknown time zone: {name}") from exc
+
+
+def aware(moment: datetime) -> datetime:
+    return moment.replace(tzinfo=timezone.utc)
+
+
+def naive_utc(moment: datetime) -> datetime:
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def utc_until(rule: str, tz: ZoneInfo) -> str:
+    # A zone-aware DTSTART needs UNTIL in UTC. A floating UNTIL is read on the series' wall
+    # clock, and a bare date means through the end of that day.
+    def rewrite(match: re.Match) -> str:
+        day, clock, utc = match.groups()
+        if clock and utc:
+            return match.group(0)
+        until = datetime.strptime(day + (clock or "T235959"), "%Y%m%dT%H%M%S").replace(tzinfo=tz)
+        return f"UNTIL={naive_utc(until):%Y%m%dT%H%M%S}Z"
+
+    return UNTIL.sub(rewrite, rule)
+
+
+def parse_rule(rule: str, dtstart: datetime, tz: ZoneInfo) -> rrule:
+    return rrulestr(utc_until(rule, tz), dtstart=aware(dtstart).astimezone(tz))
+
+
+def normalize_rule(rule: str, dtstart: datetime, time_zone: str) -> tuple[str, datetime]:
+    # Validates a single RRULE and returns it in canonical form with the last occurrence that
+    # will be expanded (for an open-ended rule, the last one within SERIES_HORIZON). Raises
+    # ValueError with a user-facing message.
+    rule = rule.strip().upper().removeprefix("RRULE:")
+    if not rule or len(rule) > MAX_RULE_LENGTH or "\n" in rule or ":" in rule:
+        raise ValueError("Recurrence must be a single RRULE, e.g. FREQ=WEEKLY;BYDAY=MO,WE")
+    freq = re.search(r"(?:^|;)FREQ=([A-Z]+)", rule)
+    if freq is None or freq.group(1) not in ALLOWED_FREQUENCIES:
+        raise ValueError(f"Recurrence FREQ must be one of {', '.join(sorted(ALLOWED_FREQUENCIES))}")
+    for part in TIME_OF_DAY_PARTS:
+        values = re.search(rf"(?:^|;){part}=([^;]*)", rule)
+        if values and "," in values.group(1):
+            raise ValueError(f"Recurrence {part} takes a single value; meetings recur at most daily")
+    tz = zone(time_zone)
+    try:
+        rule = utc_until(rule, tz)
+        parsed = parse_rule(rule, dtstart, tz)
+    except ValueError as exc:
+        raise ValueError(f"Invalid recurrence rule: {exc}") from exc
+    horizon = aware(dtstart + SERIES_HORIZON)
+    if "COUNT=" not in rule and "UNTIL=" not in rule:
+        last = parsed.before(horizon, inc=True)
+        if last is None:
+            raise ValueError("Recurrence rule produces no occurrences")
+        return rule, naive_utc(last)
+    occurrences = list(islice(parsed, MAX_OCCURRENCES + 1))
+    if not occurrences:
+        raise ValueError("Recurrence rule produces no occurrences")
+    if len(occurrences) > MAX_OCCURRENCES:
+        raise ValueError(f"Recurrence is limited to {MAX_OCCURRENCES} occurrences")
+    if occurrences[-1] > horizon:
+        raise ValueError(f"Recurrence may not run longer than {SERIES_HORIZON.days} days")
+    return rule, naive_utc(occurrences[-1])
+
+
+def wall_clock(moment: datetime, tz: ZoneInfo) -> datetime:
+    return aware(moment).astimezone(tz).replace(tzinfo=None)
+
+
+def rescheduled(moments: list[datetime], old_start: datetime, old_zone: str, meeting) -> list[datetime]:
+    # Maps occurrences of a series that started at old_start in old_zone onto its current start
+    # and zone, keeping each one's wall-clock offset from the start.
+    old_tz, new_tz = zone(old_zone), zone(meeting.time_zone)
+    offset = wall_clock(meeting.scheduled_at, new_tz) - wall_clock(old_start, old_tz)
+    return [naive_utc((wall_clock(moment, old_tz) + offset).replace(tzinfo=new_tz)) for moment in moments]
+
+
+def is_occurrence(meeting, moment: datetime) -> bool:
+    # Whether the rule itself produces moment, exception dates aside.
+    if not meeting.scheduled_at <= moment <= meeting.scheduled_at + SERIES_HORIZON:
+        return False
+    parsed = parse_rule(meeting.rrule, meeting.scheduled_at, zone(meeting.time_zone))
+    return parsed.after(aware(moment), inc=True) == aware(moment)
+
+
+# Parsed series by meeting id. The key also holds the rule, start, zone and exception dates,
+# so an edited series simply misses and rebuilds. Only the rule objects are kept, never
+# generated occurrences, so an entry stays small whatever windows it is read for.
+class SeriesCache:
+    def __init__(self, max_entries: int):
+        self._entries: OrderedDict[uuid.UUID, tuple[tuple, rruleset]] = OrderedDict()
+        self._max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+    def _series(self, meeting) -> rruleset:
+        key = (meeting.rrule, meeting.scheduled_at, meeting.time_zone, tuple(meeting.exdates or ()))
+        entry = self._entries.get(meeting.id)
+        if entry is not None and entry[0] == key:
+            self.hits += 1
+            self._entries.move_to_end(meeting.id)
+            return entry[1]
+        self.misses += 1
+        series = rruleset()
+        series.rrule(parse_rule(meeting.rrule, meeting.scheduled_at, zone(meeting.time_zone)))
+        for skipped in meeting.exdates or ():
+            series.exdate(aware(skipped))
+        self._entries[meeting.id] = (key, series)
+        self._entries.move_to_end(meeting.id)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+        return series
+
+    def between(self, meeting, start: datetime, end: datetime) -> list[datetime]:
+        # Occurrence starts in [start, end), clipped to the series' start and horizon.
+        start = max(start, meeting.scheduled_at)
+        end = min(end, meeting.scheduled_at + SERIES_HORIZON)
+        if start >= end:
+            return []
+        until = aware(end)
+        occurrences = self._series(meeting).xafter(aware(start), count=MAX_WINDOW_OCCURRENCES, inc=True)
+        return [naive_utc(moment) for moment in takewhile(lambda moment: moment < until, occurrences)]
+
+    def contains(self, meeting, moment: datetime) -> bool:
+        return moment in self.between(meeting, moment, moment + timedelta(seconds=1))
+
+    def stats(self) -> dict[str, int]:
+        return {"series": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+series_cache = SeriesCache(settings.recurrence_cache_max_entries)
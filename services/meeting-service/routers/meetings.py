@@ -1,17 +1,20 @@
 import uuid
-from datetime import timezone
+from datetime import datetime, timedelta, timezone
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy import select
+from sqlalchemy import or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import require_role
 from database import get_db
-from models import Meeting
-from schemas import MeetingCreate, MeetingOut, MeetingUpdate
+from models import NOT_CANCELLED, Meeting
+from recurrence import is_occurrence, normalize_rule, rescheduled, series_cache, zone
+from schemas import MeetingCreate, MeetingOut, MeetingUpdate, OccurrenceMove, OccurrenceSkip
 
 router = APIRouter(tags=["meetings"])
 
+MAX_CALENDAR_RANGE = timedelta(days=92)
+
 
 def to_db_datetime(dt):
     if dt is None:
@@ -21,6 +24,58 @@ def to_db_datetime(dt):
     return dt
 
 
+def apply_recurrence(meeting: Meeting) -> None:
+    # Validates meeting.rrule and time_zone against its start and refreshes the derived fields.
+    try:
+        zone(meeting.time_zone)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    if not meeting.rrule:
+        meeting.rrule = None
+        meeting.recurrence_end = None
+        return
+    if meeting.series_id is not None:
+        raise HTTPException(status_code=400, detail="A moved occurrence cannot recur")
+    try:
+        meeting.rrule, meeting.recurrence_end = normalize_rule(meeting.rrule, meeting.scheduled_at, meeting.time_zone)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    meeting.is_recurring = True
+
+
+async def follow_series(db: AsyncSession, meeting: Meeting, old_start: datetime, old_zone: str) -> None:
+    # Skipped and moved occurrences keep their place when a series is rescheduled or its rule
+    # changes; if one would no longer fall on the series, the change is refused.
+    exdates = rescheduled(meeting.exdates, old_start, old_zone, meeting)
+    if not all(is_occurrence(meeting, moment) for moment in exdates):
+        raise HTTPException(status_code=409, detail="Skipped or moved occurrences would not fall on the new schedule")
+    meeting.exdates = sorted(exdates)
+    if meeting.scheduled_at == old_start and meeting.time_zone == old_zone:
+        return
+    result = await db.execute(select(Meeting.id, Meeting.original_start).where(Meeting.series_id == meeting.id))
+    # One row at a time, far end first, so (series_id, original_start) stays unique throughout.
+    moved = sorted(result.all(), key=lambda row: row.original_start, reverse=meeting.scheduled_at > old_start)
+    for row in moved:
+        [original_start] = rescheduled([row.original_start], old_start, old_zone, meeting)
+        await db.execute(update(Meeting).where(Meeting.id == row.id).values(original_start=original_start))
+
+
+async def get_series(db: AsyncSession, meeting_id: uuid.UUID, occurrence: datetime) -> tuple[Meeting, datetime]:
+    # Locks the series row: exception dates are read-modify-write.
+    result = await db.execute(select(Meeting).where(Meeting.id == meeting_id).with_for_update())
+    meeting = result.scalar_one_or_none()
+    if not meeting:
+        raise HTTPException(status_code=404, detail="Meeting not found")
+    if not meeting.rrule:
+        raise HTTPException(status_code=400, detail="Meeting is not recurring")
+    occurrence = to_db_datetime(occurrence)
+    if occurrence in meeting.exdates:
+        raise HTTPException(status_code=409, detail="Occurrence already skipped or moved")
+    if not series_cache.contains(meeting, occurrence):
+        raise HTTPException(status_code=404, detail="No such occurrence")
+    return meeting, occurrence
+
+
 @router.get("/meetings/", response_model=list[MeetingOut])
 async def list_meetings(
     course_id: uuid.UUID | None = None,
@@ -35,6 +90,49 @@ async def list_meetings(
     return result.scalars().all()
 
 
+@router.get("/meetings/calendar", response_model=list[MeetingOut])
+async def calendar(
+    from_: datetime = Query(alias="from"),
+    to: datetime = Query(),
+    course_id: list[uuid.UUID] = Query(default=[], max_length=200),
+    include_general: bool = False,
+    db: AsyncSession = Depends(get_db),
+):
+    # Meetings starting in [from, to) for the given courses (plus course-less ones when asked),
+    # in start order. One-off meetings and moved occurrences come from a range scan per course
+    # on ix_meetings_course_scheduled (its predicate matches NOT_CANCELLED); series rows come
+    # from ix_meetings_course_series and are expanded in memory for this window only.
+    start, end = to_db_datetime(from_), to_db_datetime(to)
+    if end <= start:
+        raise HTTPException(status_code=400, detail="'to' must be after 'from'")
+    if end - start > MAX_CALENDAR_RANGE:
+        raise HTTPException(status_code=400, detail=f"Range is limited to {MAX_CALENDAR_RANGE.days} days")
+    scopes = []
+    if course_id:
+        scopes.append(Meeting.course_id.in_(course_id))
+    if include_general:
+        scopes.append(Meeting.course_id.is_(None))
+    if not scopes:
+        return []
+    single = select(Meeting).where(
+        or_(*scopes), Meeting.scheduled_at >= start, Meeting.scheduled_at < end, Meeting.rrule.is_(None), NOT_CANCELLED
+    )
+    series = select(Meeting).where(
+        or_(*scopes),
+        Meeting.scheduled_at < end,
+        Meeting.rrule.is_not(None),
+        or_(Meeting.recurrence_end.is_(None), Meeting.recurrence_end >= start),
+        NOT_CANCELLED,
+    )
+    entries = [MeetingOut.model_validate(meeting) for meeting in (await db.execute(single)).scalars()]
+    for meeting in (await db.execute(series)).scalars():
+        out = MeetingOut.model_validate(meeting)
+        for moment in series_cache.between(meeting, start, end):
+            entries.append(out.model_copy(update={"scheduled_at": moment, "series_id": meeting.id, "original_start": moment}))
+    entries.sort(key=lambda entry: (entry.scheduled_at, entry.id))
+    return entries
+
+
 @router.post("/meetings/", response_model=MeetingOut, status_code=201)
 async def create_meeting(
     payload: MeetingCreate,
@@ -44,6 +142,7 @@ async def create_meeting(
     payload_data = payload.model_dump()
     payload_data["scheduled_at"] = to_db_datetime(payload_data["scheduled_at"])
     meeting = Meeting(**payload_data, created_by=user["sub"])
+    apply_recurrence(meeting)
     db.add(meeting)
     await db.commit()
     await db.refresh(meeting)
@@ -66,14 +165,23 @@ async def update_meeting(
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(require_role("professor", "admin")),
 ):
-    result = await db.execute(select(Meeting).where(Meeting.id == meeting_id))
+    # Locked like get_series: a reschedule rewrites the exception dates.
+    result = await db.execute(select(Meeting).where(Meeting.id == meeting_id).with_for_update())
     meeting = result.scalar_one_or_none()
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
-    for key, value in payload.model_dump(exclude_none=True).items():
+    changes = payload.model_dump(exclude_none=True)
+    old_start, old_zone = meeting.scheduled_at, meeting.time_zone
+    for key, value in changes.items():
         if key == "scheduled_at":
             value = to_db_datetime(value)
         setattr(meeting, key, value)
+    if changes.get("rrule") == "":
+        meeting.is_recurring = False
+    if {"rrule", "time_zone"} & changes.keys() or ("scheduled_at" in changes and meeting.rrule):
+        apply_recurrence(meeting)
+        if meeting.rrule:
+            await follow_series(db, meeting, old_start, old_zone)
     await db.commit()
     await db.refresh(meeting)
     return meeting
@@ -90,10 +198,55 @@ async def cancel_meeting(
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
     meeting.status = "cancelled"
+    if meeting.rrule:
+        # Moved occurrences go with their series.
+        await db.execute(update(Meeting).where(Meeting.series_id == meeting.id).values(status="cancelled"))
     await db.commit()
     return {"message": "Meeting cancelled"}
 
 
+@router.post("/meetings/{meeting_id}/occurrences/skip", response_model=MeetingOut)
+async def skip_occurrence(
+    meeting_id: uuid.UUID,
+    payload: OccurrenceSkip,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_role("professor", "admin")),
+):
+    meeting, occurrence = await get_series(db, meeting_id, payload.occurrence)
+    meeting.exdates = sorted([*meeting.exdates, occurrence])
+    await db.commit()
+    await db.refresh(meeting)
+    return meeting
+
+
+@router.post("/meetings/{meeting_id}/occurrences/move", response_model=MeetingOut, status_code=201)
+async def move_occurrence(
+    meeting_id: uuid.UUID,
+    payload: OccurrenceMove,
+    db: AsyncSession = Depends(get_db),
+    user: dict = Depends(require_role("professor", "admin")),
+):
+    # The occurrence becomes an exception date of the series and a one-off row takes its place;
+    # later edits to that occurrence go through PUT on the new row.
+    meeting, occurrence = await get_series(db, meeting_id, payload.occurrence)
+    meeting.exdates = sorted([*meeting.exdates, occurrence])
+    moved = Meeting(
+        title=meeting.title,
+        description=meeting.description,
+        course_id=meeting.course_id,
+        created_by=user["sub"],
+        meeting_url=meeting.meeting_url,
+        scheduled_at=to_db_datetime(payload.scheduled_at),
+        duration_minutes=payload.duration_minutes or meeting.duration_minutes,
+        series_id=meeting.id,
+        original_start=occurrence,
+    )
+    db.add(moved)
+    await db.commit()
+    await db.refresh(moved)
+    return moved
+
+
 @router.post("/meetings/{meeting_id}/join")
 async def join_meeting(meeting_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Meeting).where(Meeting.id == meeting_id))
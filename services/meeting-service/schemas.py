@@ -12,6 +12,10 @@ class MeetingCreate(BaseModel):
     scheduled_at: datetime
     duration_minutes: int
     is_recurring: bool = False
+    # RFC 5545 RRULE, e.g. "FREQ=WEEKLY;BYDAY=MO,WE;UNTIL=20261218"; starts at scheduled_at and
+    # repeats on the wall clock of time_zone (an IANA name such as "Europe/Berlin").
+    rrule: str | None = None
+    time_zone: str = "UTC"
 
 
 class MeetingUpdate(BaseModel):
@@ -21,9 +25,22 @@ class MeetingUpdate(BaseModel):
     scheduled_at: datetime | None = None
     duration_minutes: int | None = None
     is_recurring: bool | None = None
+    # An empty string ends the recurrence.
+    rrule: str | None = None
+    time_zone: str | None = None
     status: str | None = None
 
 
+class OccurrenceSkip(BaseModel):
+    occurrence: datetime
+
+
+class OccurrenceMove(BaseModel):
+    occurrence: datetime
+    scheduled_at: datetime
+    duration_minutes: int | None = None
+
+
 class SessionCreate(BaseModel):
     room: str
     reserved_at: datetime
@@ -46,6 +63,13 @@ class MeetingOut(BaseModel):
     duration_minutes: int
     is_recurring: bool
     status: str
+    rrule: str | None = None
+    time_zone: str = "UTC"
+    recurrence_end: datetime | None = None
+    exdates: list[datetime] = []
+    # Occurrences of a series, expanded or moved, carry the series id and their original start.
+    series_id: UUID | None = None
+    original_start: datetime | None = None
 
     class Config:
         from_attributes = True
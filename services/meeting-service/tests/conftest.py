@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Service modules are flat (`import config`, `from models import ...`), as in the container's /app.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
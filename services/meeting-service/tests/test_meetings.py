@@ -0,0 +1,93 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from models import Meeting
+from routers.meetings import update_meeting
+from schemas import MeetingUpdate
+
+START = datetime(2026, 9, 7, 10, 0)  # a Monday
+SKIPPED = START + timedelta(weeks=1)
+MOVED = START + timedelta(weeks=2)
+
+
+class Result:
+    def __init__(self, value=None, rows=()):
+        self._value = value
+        self._rows = list(rows)
+
+    def scalar_one_or_none(self):
+        return self._value
+
+    def all(self):
+        return self._rows
+
+
+class RecordingSession:
+    def __init__(self, results):
+        self.statements = []
+        self._results = iter(results)
+        self.commits = 0
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return next(self._results, Result())
+
+    async def commit(self):
+        self.commits += 1
+
+    async def refresh(self, _):
+        pass
+
+
+def weekly_series() -> Meeting:
+    return Meeting(
+        id=uuid.uuid4(),
+        title="Lecture",
+        created_by=uuid.uuid4(),
+        meeting_url="https://meet.example.com/x",
+        scheduled_at=START,
+        duration_minutes=60,
+        rrule="FREQ=WEEKLY;BYDAY=MO",
+        time_zone="UTC",
+        exdates=[SKIPPED, MOVED],
+    )
+
+
+def test_reschedule_moves_exceptions_with_the_series():
+    meeting = weekly_series()
+    moved = SimpleNamespace(id=uuid.uuid4(), original_start=MOVED)
+    db = RecordingSession([Result(meeting), Result(rows=[moved])])
+    payload = MeetingUpdate(scheduled_at=START + timedelta(hours=1))
+    asyncio.run(update_meeting(meeting.id, payload, db=db, _={}))
+    assert meeting.exdates == [SKIPPED + timedelta(hours=1), MOVED + timedelta(hours=1)]
+    assert db.statements[-1].compile().params["original_start"] == MOVED + timedelta(hours=1)
+    assert db.commits == 1
+
+
+def test_reschedule_off_the_rule_is_refused():
+    # BYDAY=MO still holds, so exceptions shifted to Tuesdays would never occur.
+    meeting = weekly_series()
+    db = RecordingSession([Result(meeting)])
+    payload = MeetingUpdate(scheduled_at=START + timedelta(days=1))
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(update_meeting(meeting.id, payload, db=db, _={}))
+    assert exc.value.status_code == 409
+    assert db.commits == 0
+
+
+def test_rule_change_keeps_exceptions_that_still_occur():
+    meeting = weekly_series()
+    db = RecordingSession([Result(meeting)])
+    asyncio.run(update_meeting(meeting.id, MeetingUpdate(rrule="FREQ=WEEKLY;BYDAY=MO,WE"), db=db, _={}))
+    assert meeting.exdates == [SKIPPED, MOVED]
+    assert len(db.statements) == 1
+
+    db = RecordingSession([Result(meeting)])
+    with pytest.raises(HTTPException) as exc:
+        asyncio.run(update_meeting(meeting.id, MeetingUpdate(rrule="FREQ=WEEKLY;INTERVAL=2"), db=db, _={}))
+    assert exc.value.status_code == 409
@@ -0,0 +1,146 @@
+import time
+import uuid
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from recurrence import (
+    MAX_WINDOW_OCCURRENCES,
+    SERIES_HORIZON,
+    SeriesCache,
+    is_occurrence,
+    normalize_rule,
+    rescheduled,
+)
+
+START = datetime(2026, 9, 7, 10, 0)  # a Monday
+
+
+def series(rule, exdates=(), start=START, time_zone="UTC"):
+    return SimpleNamespace(id=uuid.uuid4(), rrule=rule, scheduled_at=start, time_zone=time_zone, exdates=list(exdates))
+
+
+def test_normalize_rule_canonicalises_and_bounds():
+    rule, last = normalize_rule("rrule:freq=weekly;byday=mo;count=3", START, "UTC")
+    assert rule == "FREQ=WEEKLY;BYDAY=MO;COUNT=3"
+    assert last == START + timedelta(weeks=2)
+
+    rule, last = normalize_rule("FREQ=WEEKLY", START, "UTC")
+    assert START + SERIES_HORIZON - timedelta(weeks=1) < last <= START + SERIES_HORIZON
+
+
+@pytest.mark.parametrize(
+    "rule",
+    [
+        "FREQ=HOURLY",
+        "FREQ=DAILY;BYHOUR=9,10",
+        "FREQ=WEEKLY;BYMINUTE=0,30",
+        "FREQ=DAILY;COUNT=1001",
+        "FREQ=DAILY;UNTIL=20400101T000000Z",
+        "FREQ=WEEKLY;UNTIL=20260101T000000Z",
+        "DTSTART:20260101T000000\nRRULE:FREQ=DAILY",
+    ],
+)
+def test_normalize_rule_rejects(rule):
+    with pytest.raises(ValueError):
+        normalize_rule(rule, START, "UTC")
+
+
+def test_single_time_of_day_is_allowed():
+    rule, _ = normalize_rule("FREQ=DAILY;BYHOUR=9;BYMINUTE=30;COUNT=2", START, "UTC")
+    assert rule == "FREQ=DAILY;BYHOUR=9;BYMINUTE=30;COUNT=2"
+
+
+def test_unknown_time_zone_is_rejected():
+    with pytest.raises(ValueError, match="Unknown time zone"):
+        normalize_rule("FREQ=WEEKLY", START, "Mars/Olympus")
+
+
+def test_floating_until_is_local():
+    # 2026-12-18 23:59:59 in Berlin (CET) is 22:59:59 UTC.
+    rule, last = normalize_rule("FREQ=WEEKLY;UNTIL=20261218", START, "Europe/Berlin")
+    assert rule == "FREQ=WEEKLY;UNTIL=20261218T225959Z"
+    assert last == datetime(2026, 12, 14, 11, 0)
+    rule, _ = normalize_rule("FREQ=WEEKLY;UNTIL=20261218T120000Z", START, "Europe/Berlin")
+    assert rule == "FREQ=WEEKLY;UNTIL=20261218T120000Z"
+
+
+def test_series_keeps_wall_clock_across_dst():
+    # 10:00 in Berlin: 08:00 UTC in summer time, 09:00 UTC after 2026-10-25.
+    meeting = series("FREQ=WEEKLY;BYDAY=MO", start=datetime(2026, 10, 19, 8, 0), time_zone="Europe/Berlin")
+    cache = SeriesCache(max_entries=10)
+    assert cache.between(meeting, datetime(2026, 10, 1), datetime(2026, 11, 3)) == [
+        datetime(2026, 10, 19, 8, 0),
+        datetime(2026, 10, 26, 9, 0),
+        datetime(2026, 11, 2, 9, 0),
+    ]
+    meeting.exdates = [datetime(2026, 10, 26, 9, 0)]
+    assert not cache.contains(meeting, datetime(2026, 10, 26, 9, 0))
+    assert cache.contains(meeting, datetime(2026, 11, 2, 9, 0))
+
+
+def test_between_is_half_open_and_skips_exdates():
+    meeting = series("FREQ=WEEKLY;BYDAY=MO", exdates=[START + timedelta(weeks=1)])
+    cache = SeriesCache(max_entries=10)
+    moments = cache.between(meeting, START, START + timedelta(weeks=3))
+    assert moments == [START, START + timedelta(weeks=2)]
+    assert cache.contains(meeting, START + timedelta(weeks=2))
+    assert not cache.contains(meeting, START + timedelta(weeks=1))
+    assert not cache.contains(meeting, START + timedelta(weeks=2, hours=1))
+
+
+def test_window_before_start_is_clipped():
+    cache = SeriesCache(max_entries=10)
+    meeting = series("FREQ=DAILY")
+    assert cache.between(meeting, START - timedelta(days=30), START - timedelta(days=1)) == []
+    assert cache.between(meeting, START - timedelta(days=30), START + timedelta(days=2)) == [
+        START,
+        START + timedelta(days=1),
+    ]
+
+
+def test_distant_window_is_not_expanded():
+    cache = SeriesCache(max_entries=10)
+    meeting = series("FREQ=DAILY")
+    began = time.perf_counter()
+    assert cache.between(meeting, datetime(9000, 1, 1), datetime(9000, 4, 1)) == []
+    last = cache.between(meeting, START + SERIES_HORIZON - timedelta(days=92), START + SERIES_HORIZON + timedelta(days=92))
+    assert len(last) == 92
+    assert time.perf_counter() - began < 1
+
+
+def test_window_is_capped():
+    cache = SeriesCache(max_entries=10)
+    meeting = series("FREQ=DAILY")
+    assert len(cache.between(meeting, START, START + timedelta(days=365))) == MAX_WINDOW_OCCURRENCES
+
+
+def test_cache_reuses_parsed_series_until_edited():
+    cache = SeriesCache(max_entries=10)
+    meeting = series("FREQ=WEEKLY")
+    cache.between(meeting, START, START + timedelta(days=7))
+    cache.between(meeting, START, START + timedelta(days=7))
+    meeting.exdates = [START]
+    assert cache.between(meeting, START, START + timedelta(days=8)) == [START + timedelta(weeks=1)]
+    assert cache.stats() == {"series": 1, "hits": 1, "misses": 2}
+
+
+def test_rescheduled_keeps_wall_clock_offset():
+    # Moving a Berlin series from 10:00 to 11:00 moves a winter exception from 09:00 to 10:00 UTC.
+    meeting = series("FREQ=WEEKLY;BYDAY=MO", start=datetime(2026, 10, 19, 9, 0), time_zone="Europe/Berlin")
+    assert rescheduled([datetime(2026, 11, 2, 9, 0)], datetime(2026, 10, 19, 8, 0), "Europe/Berlin", meeting) == [
+        datetime(2026, 11, 2, 10, 0)
+    ]
+    # Starting a week later, across the DST change, keeps 10:00 local.
+    meeting.scheduled_at = datetime(2026, 10, 26, 9, 0)
+    assert rescheduled([datetime(2026, 11, 2, 9, 0)], datetime(2026, 10, 19, 8, 0), "Europe/Berlin", meeting) == [
+        datetime(2026, 11, 9, 9, 0)
+    ]
+
+
+def test_is_occurrence_ignores_exdates():
+    meeting = series("FREQ=WEEKLY;BYDAY=MO", exdates=[START + timedelta(weeks=1)])
+    assert is_occurrence(meeting, START + timedelta(weeks=1))
+    assert not is_occurrence(meeting, START + timedelta(days=8))
+    assert not is_occurrence(meeting, START - timedelta(weeks=1))
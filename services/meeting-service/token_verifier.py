@@ -0,0 +1,46 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any
+
+import jwt
+
+from config import settings
+
+
+# Bounded LRU of already-verified claims keyed by a digest of the token, so a token is
+# cryptographically verified once per process and then served from memory until its exp.
+class TokenVerifier:
+    def __init__(self, secret: str, algorithm: str, max_entries: int):
+        self._secret = secret
+        self._algorithms = [algorithm]
+        self._max_entries = max_entries
+        self._entries: OrderedDict[bytes, tuple[float, dict[str, Any]]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def verify(self, token: str) -> dict[str, Any]:
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(key)
+        if entry is not None:
+            exp, claims = entry
+            if exp > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return claims
+            del self._entries[key]
+
+        self.misses += 1
+        claims = jwt.decode(token, self._secret, algorithms=self._algorithms)
+        exp = claims.get("exp")
+        if exp is not None:
+            self._entries[key] = (float(exp), claims)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return claims
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+token_verifier = TokenVerifier(settings.secret_key, settings.jwt_algorithm, settings.token_cache_max_entries)
@@ -5,8 +5,12 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.exc import OperationalError
 
+from blobstore import blob_store
 from database import Base, engine
+from revocation import revocation_filter
 from routers.news import router as news_router
+from sweeper import upload_sweeper
+from token_verifier import token_verifier
 
 
 @asynccontextmanager
@@ -20,7 +24,13 @@ async def lifespan(app: FastAPI):
             await asyncio.sleep(2)
     else:
         raise RuntimeError("Database is not reachable for news-service")
+    listeners = [
+        asyncio.create_task(revocation_filter.listen()),
+        asyncio.create_task(upload_sweeper.run()),
+    ]
     yield
+    for listener in listeners:
+        listener.cancel()
 
 
 app = FastAPI(title="news-service", lifespan=lifespan)
@@ -38,3 +48,13 @@ app.include_router(news_router)
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "news-service"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "token_verifier": token_verifier.stats(),
+        "revocations": revocation_filter.stats(),
+        "blobs": blob_store.stats(),
+        "upload_gc": upload_sweeper.stats(),
+    }
@@ -7,7 +7,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth import require_role
-from config import settings
+from blobstore import blob_store
 from database import get_db
 from models import NewsPost
 from schemas import NewsCreate, NewsOut, NewsUpdate
@@ -88,6 +88,8 @@ async def delete_news(
     post = result.scalar_one_or_none()
     if not post:
         raise HTTPException(status_code=404, detail="News not found")
+    for url in post.images or []:
+        await blob_store.release(db, url)
     await db.delete(post)
     await db.commit()
     return {"message": "News deleted"}
@@ -105,15 +107,12 @@ async def upload_images(
     if not post:
         raise HTTPException(status_code=404, detail="News not found")
 
-    os.makedirs(settings.upload_dir, exist_ok=True)
     urls = list(post.images or [])
     for file in files:
+        staged = await blob_store.stage(file.read)
         ext = os.path.splitext(file.filename or "image.jpg")[1] or ".jpg"
-        filename = f"news_{news_id}_{uuid.uuid4()}{ext}"
-        path = os.path.join(settings.upload_dir, filename)
-        with open(path, "wb") as out:
-            out.write(await file.read())
-        urls.append(f"/uploads/{filename}")
+        blob = await blob_store.store(db, staged, ext, file.content_type)
+        urls.append(blob_store.url(blob))
 
     post.images = urls
     await db.commit()
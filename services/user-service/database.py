@@ -1,5 +1,7 @@
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.schema import CreateColumn
 
 from config import settings
 
@@ -11,3 +13,17 @@ Base = declarative_base()
 async def get_db():
     async with AsyncSessionLocal() as session:
         yield session
+
+
+def sync_schema(conn) -> None:
+    # create_all() only creates missing tables; add columns and indexes declared later.
+    # New columns on existing tables must be nullable or carry a server_default.
+    inspector = inspect(conn)
+    for table in Base.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                spec = CreateColumn(column).compile(dialect=conn.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN IF NOT EXISTS {spec}"))
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
@@ -3,10 +3,16 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlalchemy import text
 from sqlalchemy.exc import OperationalError
 
-from database import Base, engine
+from blobstore import blob_store
+from database import Base, engine, sync_schema
+from pagination import NEXT_CURSOR_HEADER
+from revocation import revocation_filter
 from routers.users import router as users_router
+from sweeper import upload_sweeper
+from token_verifier import token_verifier
 
 
 @asynccontextmanager
@@ -14,13 +20,21 @@ async def lifespan(app: FastAPI):
     for _ in range(20):
         try:
             async with engine.begin() as conn:
+                await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
                 await conn.run_sync(Base.metadata.create_all)
+                await conn.run_sync(sync_schema)
             break
         except OperationalError:
             await asyncio.sleep(2)
     else:
         raise RuntimeError("Database is not reachable for user-service")
+    listeners = [
+        asyncio.create_task(revocation_filter.listen()),
+        asyncio.create_task(upload_sweeper.run()),
+    ]
     yield
+    for listener in listeners:
+        listener.cancel()
 
 
 app = FastAPI(title="user-service", lifespan=lifespan)
@@ -30,6 +44,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cross-origin callers (the dev server) can only read listed response headers.
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(users_router)
@@ -38,3 +54,13 @@ app.include_router(users_router)
 @app.get("/health")
 async def health():
     return {"status": "ok", "service": "user-service"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "token_verifier": token_verifier.stats(),
+        "revocations": revocation_filter.stats(),
+        "blobs": blob_store.stats(),
+        "upload_gc": upload_sweeper.stats(),
+    }
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+import time
+
+import redis.asyncio as redis
+
+from config import settings
+
+REVOCATION_CHANNEL = "revocations"
+
+log = logging.getLogger(__name__)
+
+
+def revocation_key(jti: str) -> str:
+    return f"revoked:{jti}"
+
+
+# Local mirror of revoked jtis. Revocations are short-lived (bounded by the lifetime of the
+# revoked token), so a plain dict jti -> exp stays small and answers checks without a Redis hop.
+# While the pub/sub subscription is down, checks fall back to Redis; if Redis itself is
+# unreachable they fail open to the local mirror, so an outage degrades revocation instead of
+# rejecting every authenticated request. A revocation made while Redis is unreachable takes
+# effect locally at once and is queued; it is published on the next successful revoke or when
+# the subscription reconnects, so other workers see it then.
+class RevocationFilter:
+    def __init__(self, r: redis.Redis):
+        self._redis = r
+        self._revoked: dict[str, float] = {}
+        self._synced = False
+        self._last_prune = time.time()
+        self.local_checks = 0
+        self.remote_checks = 0
+        self.rejected = 0
+        self.fallback_checks = 0
+        self._degraded = False
+        self._unpublished: dict[str, float] = {}
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        if exp <= time.time():
+            return
+        self._revoked[jti] = exp
+        self._unpublished[jti] = exp
+        try:
+            await self._publish_pending()
+        except redis.RedisError as exc:
+            log.warning("Redis unreachable, revocation queued for publishing: %s", exc)
+
+    async def _publish_pending(self) -> None:
+        for jti, exp in list(self._unpublished.items()):
+            ttl = int(exp - time.time()) + 1
+            if ttl > 0:
+                await self._redis.setex(revocation_key(jti), ttl, str(exp))
+                await self._redis.publish(REVOCATION_CHANNEL, f"{jti}:{exp}")
+            self._unpublished.pop(jti, None)
+
+    async def is_revoked(self, jti: str | None) -> bool:
+        if not jti:
+            return False
+        if self._synced:
+            self.local_checks += 1
+            revoked = self._revoked_locally(jti)
+        else:
+            self.remote_checks += 1
+            try:
+                revoked = bool(await self._redis.exists(revocation_key(jti)))
+                self._degraded = False
+            except redis.RedisError as exc:
+                self.fallback_checks += 1
+                if not self._degraded:
+                    log.warning("Redis unreachable, checking revocations against the local mirror only: %s", exc)
+                    self._degraded = True
+                revoked = self._revoked_locally(jti)
+        if revoked:
+            self.rejected += 1
+        return revoked
+
+    def _revoked_locally(self, jti: str) -> bool:
+        exp = self._revoked.get(jti)
+        return exp is not None and exp > time.time()
+
+    async def _load(self) -> None:
+        keys = [key async for key in self._redis.scan_iter(match=revocation_key("*"), count=1000)]
+        for start in range(0, len(keys), 1000):
+            chunk = keys[start : start + 1000]
+            for key, exp in zip(chunk, await self._redis.mget(chunk)):
+                if exp is not None:
+                    self._revoked[key.split(":", 1)[1]] = float(exp)
+
+    def _prune(self) -> None:
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        self._last_prune = now
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                pubsub = self._redis.pubsub()
+                # Subscribe before the snapshot so revocations published meanwhile are not lost.
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                await self._publish_pending()
+                await self._load()
+                self._synced = True
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    jti, _, exp = message["data"].rpartition(":")
+                    self._revoked[jti] = float(exp)
+                    if time.time() - self._last_prune > 60:
+                        self._prune()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._synced = False
+                await asyncio.sleep(2)
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "size": len(self._revoked),
+            "synced": self._synced,
+            "local_checks": self.local_checks,
+            "remote_checks": self.remote_checks,
+            "rejected": self.rejected,
+            "fallback_checks": self.fallback_checks,
+            "unpublished": len(self._unpublished),
+        }
+
+
+revocation_filter = RevocationFilter(redis.from_url(settings.redis_url, decode_responses=True))
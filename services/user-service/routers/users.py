@@ -1,28 +1,78 @@
 import os
 import uuid
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
-from sqlalchemy import select
+from fastapi import APIRouter, Depends, File, Header, HTTPException, Query, Response, UploadFile
+from sqlalchemy import any_, bindparam, case, func, literal, or_, select
+from sqlalchemy.dialects.postgresql import ARRAY, UUID, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from auth import require_role
+from auth import get_current_user, require_role
+from blobstore import blob_store
 from config import settings
 from database import get_db
 from models import User, UserRole
-from schemas import UserCreate, UserOut, UserUpdate
+from pagination import page_rows, paginate
+from schemas import UserBatchRequest, UserCreate, UserOut, UserSearchOut, UserUpdate
 
 router = APIRouter(prefix="/users", tags=["users"])
 
+SEARCH_COLUMNS = (User.full_name, User.email, User.department, User.student_id)
+
 
 @router.get("/", response_model=list[UserOut])
 async def list_users(
+    response: Response,
+    is_active: bool | None = None,
+    cursor: str | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
     _: dict = Depends(require_role("admin")),
 ):
-    result = await db.execute(select(User).offset(skip).limit(limit))
-    return result.scalars().all()
+    stmt = select(User)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active.is_(is_active))
+    result = await db.execute(paginate(stmt, User.created_at, User.id, cursor, skip, limit))
+    return page_rows(result.scalars().all(), User.created_at, limit, response)
+
+
+@router.get("/search", response_model=list[UserSearchOut])
+async def search_users(
+    q: str = Query(min_length=1, max_length=100),
+    role: UserRole | None = None,
+    is_active: bool | None = None,
+    limit: int = Query(20, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(require_role("admin")),
+):
+    term = q.strip().lower()
+    escaped = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    # Every predicate below is answerable from the per-column gin_trgm_ops indexes (BitmapOr).
+    # Very short terms only match as prefixes, which keeps typeahead from scanning everything.
+    pattern = f"{escaped}%" if len(term) < 3 else f"%{escaped}%"
+    predicates = [column.ilike(pattern) for column in SEARCH_COLUMNS]
+    if len(term) >= 3:
+        predicates.append(User.full_name.op("%")(term))
+    prefix_match = or_(*(func.lower(column).startswith(term, autoescape=True) for column in SEARCH_COLUMNS))
+    similarity = func.greatest(
+        func.word_similarity(term, User.full_name),
+        *(func.similarity(column, term) for column in SEARCH_COLUMNS),
+    )
+    score = (case((prefix_match, literal(1.0)), else_=literal(0.0)) + func.coalesce(similarity, 0.0)).label("score")
+
+    stmt = select(User, score).where(or_(*predicates))
+    if role:
+        stmt = stmt.where(User.role == role)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active.is_(is_active))
+    stmt = stmt.order_by(score.desc(), User.full_name, User.id).limit(limit)
+    result = await db.execute(stmt)
+    return [
+        UserSearchOut(**UserOut.model_validate(user).model_dump(), score=round(row_score, 4))
+        for user, row_score in result.all()
+    ]
 
 
 @router.post("/", response_model=UserOut, status_code=201)
@@ -37,12 +87,73 @@ async def create_user(payload: UserCreate, db: AsyncSession = Depends(get_db)):
     return user
 
 
+@router.post("/bulk", status_code=201)
+async def create_users_bulk(payload: list[UserCreate], db: AsyncSession = Depends(get_db)):
+    if not payload:
+        return {"created": 0}
+    rows = [{**item.model_dump(), "id": item.id or uuid.uuid4()} for item in payload]
+    # Existing profiles (same id or email) count as synced, like create_user's "Email already exists".
+    stmt = insert(User).values(rows).on_conflict_do_nothing().returning(User.id)
+    result = await db.execute(stmt)
+    created = len(result.all())
+    await db.commit()
+    return {"created": created}
+
+
+@router.post("/batch", response_model=dict[str, dict | None])
+async def get_users_batch(
+    payload: UserBatchRequest,
+    db: AsyncSession = Depends(get_db),
+    _: dict = Depends(get_current_user),
+):
+    fields = payload.fields or list(UserOut.model_fields)
+    columns = [getattr(User, name) for name in dict.fromkeys(["id", *fields])]
+    ids = bindparam("ids", payload.ids, type_=ARRAY(UUID(as_uuid=True)))
+    result = await db.execute(select(*columns).where(User.id == any_(ids)))
+    found = {row.id: {name: row._mapping[name] for name in fields} for row in result}
+    return {str(user_id): found.get(user_id) for user_id in payload.ids}
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison (RFC 9110 13.1.2).
+    candidates = [candidate.strip().removeprefix("W/") for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+
+def not_modified_since(if_modified_since: str, last_modified) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    return since is not None and last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= since
+
+
 @router.get("/{user_id}", response_model=UserOut)
-async def get_user(user_id: uuid.UUID, db: AsyncSession = Depends(get_db)):
+async def get_user(
+    user_id: uuid.UUID,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    if_none_match: str | None = Header(default=None),
+    if_modified_since: str | None = Header(default=None),
+):
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
+    # The row version lives in the shared database, so both replicas emit identical validators.
+    headers = {
+        "ETag": f'"{user.id.hex}-{user.version}"',
+        "Last-Modified": format_datetime(user.updated_at.replace(tzinfo=timezone.utc), usegmt=True),
+        "Cache-Control": f"public, max-age={settings.profile_cache_max_age}, must-revalidate",
+        "Vary": "Accept-Encoding",
+    }
+    if if_none_match is not None:
+        not_modified = etag_matches(if_none_match, headers["ETag"])
+    else:
+        not_modified = if_modified_since is not None and not_modified_since(if_modified_since, user.updated_at)
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return user
 
 
@@ -77,12 +188,18 @@ async def deactivate_user(
 @router.get("/by-role/{role}", response_model=list[UserOut])
 async def users_by_role(
     role: UserRole,
+    response: Response,
+    is_active: bool | None = None,
+    cursor: str | None = None,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     db: AsyncSession = Depends(get_db),
 ):
-    result = await db.execute(select(User).where(User.role == role).offset(skip).limit(limit))
-    return result.scalars().all()
+    stmt = select(User).where(User.role == role)
+    if is_active is not None:
+        stmt = stmt.where(User.is_active.is_(is_active))
+    result = await db.execute(paginate(stmt, User.created_at, User.id, cursor, skip, limit))
+    return page_rows(result.scalars().all(), User.created_at, limit, response)
 
 
 @router.post("/avatar", response_model=dict)
@@ -95,12 +212,11 @@ async def upload_avatar(
     user = result.scalar_one_or_none()
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
-    os.makedirs(settings.upload_dir, exist_ok=True)
+    # A new avatar gets a new content-addressed URL, so cached copies of the old one never go stale.
+    staged = await blob_store.stage(file.read)
     ext = os.path.splitext(file.filename or "avatar.png")[1] or ".png"
-    filename = f"avatar_{user_id}{ext}"
-    target = os.path.join(settings.upload_dir, filename)
-    with open(target, "wb") as out:
-        out.write(await file.read())
-    user.avatar_url = f"/uploads/{filename}"
+    blob = await blob_store.store(db, staged, ext, file.content_type)
+    await blob_store.release(db, user.avatar_url)
+    user.avatar_url = blob_store.url(blob)
     await db.commit()
     return {"avatar_url": user.avatar_url}
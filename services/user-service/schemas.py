@@ -1,7 +1,7 @@
 from datetime import datetime
 from uuid import UUID
 
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, field_validator
 
 from models import UserRole
 
@@ -36,3 +36,21 @@ class UserOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class UserSearchOut(UserOut):
+    score: float
+
+
+class UserBatchRequest(BaseModel):
+    ids: list[UUID] = Field(min_length=1, max_length=500)
+    fields: list[str] | None = None
+
+    @field_validator("fields")
+    @classmethod
+    def known_fields(cls, value: list[str] | None) -> list[str] | None:
+        if value is not None:
+            unknown = set(value) - set(UserOut.model_fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+        return value
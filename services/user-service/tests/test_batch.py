@@ -0,0 +1,52 @@
+import time
+import uuid
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from database import get_db
+from main import app
+from revocation import revocation_filter
+
+
+class EmptySession:
+    async def execute(self, stmt):
+        return []
+
+
+async def empty_db():
+    yield EmptySession()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def not_revoked(jti):
+        return False
+
+    monkeypatch.setattr(revocation_filter, "is_revoked", not_revoked)
+    app.dependency_overrides[get_db] = empty_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def test_batch_requires_a_bearer_token(client):
+    response = client.post("/users/batch", json={"ids": [str(uuid.uuid4())]})
+    assert response.status_code == 403
+
+
+def test_batch_answers_authenticated_callers(client):
+    user_id = uuid.uuid4()
+    token = jwt.encode(
+        {"sub": str(uuid.uuid4()), "role": "professor", "exp": int(time.time()) + 60},
+        settings.secret_key,
+        algorithm=settings.jwt_algorithm,
+    )
+    response = client.post(
+        "/users/batch",
+        json={"ids": [str(user_id)], "fields": ["full_name"]},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert response.status_code == 200
+    assert response.json() == {str(user_id): None}
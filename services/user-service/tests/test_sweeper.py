@@ -0,0 +1,59 @@
+import asyncio
+import os
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+import sweeper
+from blobstore import BlobStore, LocalBackend
+from config import settings
+from sweeper import AvatarSweeper
+
+OLD = datetime.utcnow() - timedelta(hours=25)
+
+
+class ReferencingSession:
+    # Answers referenced_legacy() with the avatar URLs users still point at.
+    def __init__(self, avatar_urls):
+        self.statements = []
+        self._urls = avatar_urls
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        asked = stmt.compile().params["avatar_url_1"]
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: [url for url in self._urls if url in asked]))
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def write(path, mtime):
+    with open(path, "wb") as f:
+        f.write(b"x" * 10)
+    stamp = (mtime - datetime(1970, 1, 1)).total_seconds()
+    os.utime(path, (stamp, stamp))
+    return path
+
+
+@pytest.mark.parametrize("dry_run", [False, True])
+def test_legacy_avatars_still_in_use_are_kept(tmp_path, monkeypatch, dry_run):
+    monkeypatch.setattr(settings, "upload_dir", str(tmp_path))
+    db = ReferencingSession(["/uploads/avatar_kept.png"])
+    monkeypatch.setattr(sweeper, "AsyncSessionLocal", db)
+    kept = write(tmp_path / "avatar_kept.png", OLD)
+    dropped = write(tmp_path / "avatar_dropped.png", OLD)
+    recent = write(tmp_path / "avatar_recent.png", datetime.utcnow())
+    other = write(tmp_path / "news_other.png", OLD)
+
+    gc = AvatarSweeper(BlobStore(LocalBackend(str(tmp_path), "/uploads"), "avatars"), 60, 24, 100, dry_run)
+    report = {"dry_run": dry_run, "scanned": 0, "files": 0, "bytes": 0}
+    asyncio.run(gc._sweep_legacy(report, datetime.utcnow() - timedelta(hours=24)))
+    assert (report["scanned"], report["files"], report["bytes"]) == (3, 1, 10)
+    assert [os.path.exists(path) for path in (kept, dropped, recent, other)] == [True, dry_run, True, True]